@@ -0,0 +1,385 @@
+"""
+agency_aggregate.py
+
+Streaming fleet-wide statistics over assessment scores. A FleetAggregator consumes
+assessments (or stored reports) in batches and keeps, for every marker, feature and
+agency level, a set of mergeable sketches:
+
+    - running moments (count, mean, variance, min, max), merged with Chan's formula
+    - a KLL quantile sketch, whose size grows only logarithmically with the stream
+    - a fixed-bin histogram over [0, 1], binned like visualize_results
+
+Memory does not depend on how many systems have been assessed, and aggregators
+built by parallel workers over disjoint parts of a fleet merge into one whose
+moments and histograms are exact and whose quantiles keep the KLL error bound.
+
+License: PolyForm Noncommercial License 1.0
+"""
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Sequence
+import logging
+
+from robust_agency_assessment import AgencyFramework
+from agency_batch import HISTOGRAM_BINS, AssessmentBatch, BatchScorer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+class MomentSketch:
+    """Running count, mean, variance, min and max of a vector of quantities."""
+
+    def __init__(self, size: int):
+        """
+        Initialize an empty moment sketch.
+
+        Args:
+            size: Number of quantities tracked
+        """
+        self.count = np.zeros(size, dtype=np.int64)
+        self.mean = np.zeros(size)
+        self.m2 = np.zeros(size)
+        self.minimum = np.full(size, np.inf)
+        self.maximum = np.full(size, -np.inf)
+
+    def _combine(self, count: np.ndarray, mean: np.ndarray, m2: np.ndarray):
+        """Combine partial moments into this sketch (Chan et al. parallel update)."""
+        total = self.count + count
+        safe_total = np.maximum(total, 1)
+        delta = mean - self.mean
+        self.mean = self.mean + delta * count / safe_total
+        self.m2 = self.m2 + m2 + delta ** 2 * self.count * count / safe_total
+        self.count = total
+
+    def update(self, values: np.ndarray, mask: Optional[np.ndarray] = None):
+        """
+        Add a batch of observations.
+
+        Args:
+            values: Array of shape (N, D) with one row per observation
+            mask: Optional boolean array of shape (N, D) selecting the values to add
+        """
+        if mask is None:
+            mask = np.ones(values.shape, dtype=bool)
+        count = mask.sum(axis=0)
+        safe_count = np.maximum(count, 1)
+        mean = np.where(mask, values, 0.0).sum(axis=0) / safe_count
+        m2 = np.where(mask, (values - mean) ** 2, 0.0).sum(axis=0)
+        self.minimum = np.minimum(self.minimum, np.where(mask, values, np.inf).min(axis=0, initial=np.inf))
+        self.maximum = np.maximum(self.maximum, np.where(mask, values, -np.inf).max(axis=0, initial=-np.inf))
+        self._combine(count, mean, m2)
+
+    def merge(self, other: 'MomentSketch'):
+        """Merge another sketch over the same quantities into this one."""
+        self.minimum = np.minimum(self.minimum, other.minimum)
+        self.maximum = np.maximum(self.maximum, other.maximum)
+        self._combine(other.count, other.mean, other.m2)
+
+    @property
+    def variance(self) -> np.ndarray:
+        """Population variance of each quantity (0 where nothing was observed)."""
+        return self.m2 / np.maximum(self.count, 1)
+
+    def to_dict(self) -> Dict:
+        """Convert sketch to dictionary representation."""
+        return {
+            "count": self.count.tolist(),
+            "mean": self.mean.tolist(),
+            "m2": self.m2.tolist(),
+            "min": self.minimum.tolist(),
+            "max": self.maximum.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'MomentSketch':
+        """Create sketch from dictionary representation."""
+        sketch = cls(len(data["count"]))
+        sketch.count = np.array(data["count"], dtype=np.int64)
+        sketch.mean = np.array(data["mean"], dtype=np.float64)
+        sketch.m2 = np.array(data["m2"], dtype=np.float64)
+        sketch.minimum = np.array(data["min"], dtype=np.float64)
+        sketch.maximum = np.array(data["max"], dtype=np.float64)
+        return sketch
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch of one stream of values.
+
+    Values live in a stack of compactors; an item in compactor h stands for 2^h
+    original values. When the sketch exceeds its capacity, the lowest overfull
+    compactor is sorted and every other item (from a random offset) is promoted to
+    the next compactor. Rank error is roughly 1.7 / k with high probability.
+    """
+
+    def __init__(self, k: int = 200, rng: Optional[np.random.Generator] = None):
+        """
+        Initialize an empty sketch.
+
+        Args:
+            k: Capacity of the top compactor; larger values are more accurate
+            rng: Random generator choosing compaction offsets
+        """
+        self.k = k
+        self.count = 0
+        self.compactors = [np.empty(0)]
+        self._rng = rng if rng is not None else np.random.default_rng()
+
+    def _capacity(self, height: int) -> int:
+        depth = len(self.compactors) - height - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        """Compact overfull compactors until the sketch fits its total capacity."""
+        while sum(len(c) for c in self.compactors) > sum(self._capacity(h) for h in range(len(self.compactors))):
+            height = next(h for h, c in enumerate(self.compactors) if len(c) > self._capacity(h))
+            if height == len(self.compactors) - 1:
+                self.compactors.append(np.empty(0))
+            items = np.sort(self.compactors[height])
+            # An odd item out stays behind at its own weight
+            keep = items[:1] if len(items) % 2 else items[:0]
+            items = items[len(keep):]
+            promoted = items[self._rng.integers(2)::2]
+            self.compactors[height] = keep
+            self.compactors[height + 1] = np.concatenate([self.compactors[height + 1], promoted])
+
+    def update(self, values: np.ndarray):
+        """Add a batch of values."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if not len(values):
+            return
+        self.compactors[0] = np.concatenate([self.compactors[0], values])
+        self.count += len(values)
+        self._compress()
+
+    def merge(self, other: 'KLLSketch'):
+        """Merge another sketch into this one."""
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append(np.empty(0))
+        for height, items in enumerate(other.compactors):
+            self.compactors[height] = np.concatenate([self.compactors[height], items])
+        self.count += other.count
+        self._compress()
+
+    def quantiles(self, probabilities: Sequence[float]) -> np.ndarray:
+        """Estimate quantiles of the stream (NaN if it is empty)."""
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        if self.count == 0:
+            return np.full(probabilities.shape, np.nan)
+        items = np.concatenate(self.compactors)
+        weights = np.concatenate([np.full(len(c), 2.0 ** h) for h, c in enumerate(self.compactors)])
+        order = np.argsort(items, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        positions = np.searchsorted(cumulative, probabilities * cumulative[-1], side="left")
+        return items[order][np.minimum(positions, len(items) - 1)]
+
+    def to_dict(self) -> Dict:
+        """Convert sketch to dictionary representation."""
+        return {"k": self.k, "count": self.count, "compactors": [c.tolist() for c in self.compactors]}
+
+    @classmethod
+    def from_dict(cls, data: Dict, rng: Optional[np.random.Generator] = None) -> 'KLLSketch':
+        """Create sketch from dictionary representation."""
+        sketch = cls(data["k"], rng)
+        sketch.count = data["count"]
+        sketch.compactors = [np.array(c, dtype=np.float64) for c in data["compactors"]]
+        return sketch
+
+
+class ScoreSketches:
+    """Moments, quantile sketches and histograms for a set of named scores."""
+
+    def __init__(
+        self,
+        names: List[str],
+        k: int = 200,
+        bins: int = HISTOGRAM_BINS,
+        rng: Optional[np.random.Generator] = None
+    ):
+        """
+        Initialize empty sketches.
+
+        Args:
+            names: Name of each tracked score
+            k: KLL sketch size
+            bins: Number of histogram bins over [0, 1]
+            rng: Random generator shared by the quantile sketches
+        """
+        self.names = names
+        self.bins = bins
+        self.moments = MomentSketch(len(names))
+        self.quantile_sketches = [KLLSketch(k, rng) for _ in names]
+        self.histograms = np.zeros((len(names), bins), dtype=np.int64)
+
+    def update(self, values: np.ndarray, mask: Optional[np.ndarray] = None):
+        """
+        Add a batch of scores.
+
+        Args:
+            values: Array of shape (N, D) with one row of scores per assessment
+            mask: Optional boolean array of shape (N, D) selecting the scores to add
+        """
+        self.moments.update(values, mask)
+        columns = np.broadcast_to(np.arange(len(self.names)), values.shape)
+        bins = np.clip((values * self.bins).astype(np.int64), 0, self.bins - 1)
+        flat = columns * self.bins + bins
+        if mask is not None:
+            flat = flat[mask]
+        self.histograms += np.bincount(flat.ravel(), minlength=self.histograms.size).reshape(self.histograms.shape)
+        for d, sketch in enumerate(self.quantile_sketches):
+            sketch.update(values[:, d] if mask is None else values[mask[:, d], d])
+
+    def merge(self, other: 'ScoreSketches'):
+        """Merge sketches over the same scores into these."""
+        if other.names != self.names or other.bins != self.bins:
+            raise ValueError("Cannot merge sketches over different scores or histogram bins")
+        self.moments.merge(other.moments)
+        self.histograms += other.histograms
+        for sketch, other_sketch in zip(self.quantile_sketches, other.quantile_sketches):
+            sketch.merge(other_sketch)
+
+    def summary(self, quantiles: Sequence[float] = DEFAULT_QUANTILES) -> Dict[str, Dict]:
+        """Summarize every score as a dictionary keyed by score name."""
+        result = {}
+        variance = self.moments.variance
+        for d, name in enumerate(self.names):
+            count = int(self.moments.count[d])
+            entry = {
+                "count": count,
+                "mean": float(self.moments.mean[d]) if count else None,
+                "std": float(np.sqrt(variance[d])) if count else None,
+                "min": float(self.moments.minimum[d]) if count else None,
+                "max": float(self.moments.maximum[d]) if count else None,
+                "histogram": self.histograms[d].tolist()
+            }
+            for probability, value in zip(quantiles, self.quantile_sketches[d].quantiles(quantiles)):
+                entry[f"q{probability:g}"] = float(value) if count else None
+            result[name] = entry
+        return result
+
+    def to_dict(self) -> Dict:
+        """Convert sketches to dictionary representation."""
+        return {
+            "names": list(self.names),
+            "bins": self.bins,
+            "moments": self.moments.to_dict(),
+            "quantiles": [s.to_dict() for s in self.quantile_sketches],
+            "histograms": self.histograms.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, rng: Optional[np.random.Generator] = None) -> 'ScoreSketches':
+        """Create sketches from dictionary representation."""
+        sketches = cls(data["names"], bins=data["bins"], rng=rng)
+        sketches.moments = MomentSketch.from_dict(data["moments"])
+        sketches.quantile_sketches = [KLLSketch.from_dict(s, rng) for s in data["quantiles"]]
+        sketches.histograms = np.array(data["histograms"], dtype=np.int64).reshape(len(data["names"]), data["bins"])
+        return sketches
+
+
+class FleetAggregator:
+    """Bounded-memory aggregate statistics of marker, feature and level scores across a fleet."""
+
+    def __init__(
+        self,
+        framework: AgencyFramework,
+        k: int = 200,
+        bins: int = HISTOGRAM_BINS,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize an empty aggregator.
+
+        Args:
+            framework: The agency framework the assessments use
+            k: KLL sketch size; quantile rank error is roughly 1.7 / k
+            bins: Number of histogram bins over [0, 1]
+            seed: Optional seed for reproducible quantile sketches
+        """
+        self.scorer = scorer = BatchScorer(framework)
+        self.count = 0
+        rng = np.random.default_rng(seed)
+        self.markers = ScoreSketches(scorer.markers, k, bins, rng)
+        self.features = ScoreSketches(scorer.feature_names, k, bins, rng)
+        self.levels = ScoreSketches([level.name for level in scorer.levels], k, bins, rng)
+        self._rng = rng
+
+    def add_batch(self, batch: AssessmentBatch):
+        """
+        Add a batch of assessments.
+
+        Marker statistics cover assessed markers only; feature and level statistics
+        cover every assessment.
+        """
+        scores = self.scorer.score(batch)
+        self.markers.update(scores.marker_scores, batch.assessed)
+        self.features.update(scores.feature_scores)
+        self.levels.update(scores.level_scores)
+        self.count += len(batch)
+
+    def add_assessments(self, assessments: Iterable, batch_size: int = 1000):
+        """Add a stream of assessments, scoring batch_size of them at a time."""
+        chunk = []
+        for assessment in assessments:
+            chunk.append(assessment)
+            if len(chunk) >= batch_size:
+                self.add_batch(self.scorer.batch_from_assessments(chunk))
+                chunk = []
+        if chunk:
+            self.add_batch(self.scorer.batch_from_assessments(chunk))
+
+    def add_reports(self, reports: Iterable[Dict], batch_size: int = 1000):
+        """Add a stream of generate_report outputs, e.g. from agency_jsonl.iter_reports."""
+        chunk = []
+        for report in reports:
+            chunk.append(report)
+            if len(chunk) >= batch_size:
+                self.add_batch(self.scorer.batch_from_reports(chunk))
+                chunk = []
+        if chunk:
+            self.add_batch(self.scorer.batch_from_reports(chunk))
+
+    def merge(self, other: 'FleetAggregator') -> 'FleetAggregator':
+        """Merge an aggregator over the same framework into this one and return self."""
+        self.markers.merge(other.markers)
+        self.features.merge(other.features)
+        self.levels.merge(other.levels)
+        self.count += other.count
+        return self
+
+    def summary(self, quantiles: Sequence[float] = DEFAULT_QUANTILES) -> Dict:
+        """
+        Summarize the fleet.
+
+        Returns:
+            Dictionary with the number of assessments and, per level, feature and
+            marker, the count, mean, std, min, max, quantiles and histogram
+        """
+        return {
+            "assessments": self.count,
+            "levels": self.levels.summary(quantiles),
+            "features": self.features.summary(quantiles),
+            "markers": self.markers.summary(quantiles)
+        }
+
+    def to_dict(self) -> Dict:
+        """Convert aggregator state to dictionary representation."""
+        return {
+            "count": self.count,
+            "levels": self.levels.to_dict(),
+            "features": self.features.to_dict(),
+            "markers": self.markers.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, framework: AgencyFramework, data: Dict, seed: Optional[int] = None) -> 'FleetAggregator':
+        """Create aggregator from dictionary representation."""
+        aggregator = cls(framework, seed=seed)
+        for name in ("levels", "features", "markers"):
+            sketches = ScoreSketches.from_dict(data[name], aggregator._rng)
+            if sketches.names != getattr(aggregator, name).names:
+                raise ValueError(f"Stored {name} do not match the framework")
+            setattr(aggregator, name, sketches)
+        aggregator.count = data["count"]
+        return aggregator
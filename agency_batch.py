@@ -0,0 +1,294 @@
+"""
+agency_batch.py
+
+Vectorized batch scoring for large collections of agency assessments. Presence and
+confidence values for N assessments x M markers are held in NumPy arrays and scored
+with a handful of array operations against index and weight matrices derived from an
+AgencyFramework, reproducing AgencyAssessment.get_feature_score and get_level_score
+bit for bit.
+
+License: PolyForm Noncommercial License 1.0
+"""
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+import logging
+
+from robust_agency_assessment import AgencyLevel, AgencyFramework, AgencyAssessment
+
+logger = logging.getLogger(__name__)
+
+# Equal-width bins over [0, 1] used for marker score histograms
+HISTOGRAM_BINS = 10
+
+
+class AssessmentBatch:
+    """Presence and confidence arrays for a batch of assessments over a fixed marker set."""
+
+    def __init__(
+        self,
+        markers: List[str],
+        presence: np.ndarray,
+        confidence: np.ndarray,
+        assessed: np.ndarray,
+        extra_assessed: Optional[np.ndarray] = None,
+        labels: Optional[List[str]] = None
+    ):
+        """
+        Initialize an assessment batch.
+
+        Args:
+            markers: Marker names indexing the columns of the arrays
+            presence: Array of shape (N, M) with estimated marker presence (0-1)
+            confidence: Array of shape (N, M) with confidence in each estimate (0-1)
+            assessed: Boolean array of shape (N, M) marking which markers were assessed
+            extra_assessed: Optional array of shape (N,) counting assessed markers that
+                are not part of the framework (they still count towards coverage)
+            labels: Optional label for each assessment in the batch
+        """
+        n = presence.shape[0]
+        self.markers = markers
+        self.presence = presence
+        self.confidence = confidence
+        self.assessed = assessed
+        self.extra_assessed = (
+            extra_assessed if extra_assessed is not None else np.zeros(n, dtype=np.int64)
+        )
+        self.labels = labels if labels is not None else [str(i) for i in range(n)]
+
+    def __len__(self) -> int:
+        return self.presence.shape[0]
+
+
+class BatchScores:
+    """Scores computed for every assessment in a batch."""
+
+    def __init__(
+        self,
+        marker_scores: np.ndarray,
+        feature_scores: np.ndarray,
+        level_scores: np.ndarray,
+        coverage: np.ndarray,
+        feature_names: List[str],
+        levels: List[AgencyLevel],
+        labels: List[str]
+    ):
+        """
+        Initialize batch scores.
+
+        Args:
+            marker_scores: Array of shape (N, M) with presence * confidence per marker
+            feature_scores: Array of shape (N, F) with feature scores
+            level_scores: Array of shape (N, L) with level scores
+            coverage: Array of shape (N,) with assessment coverage
+            feature_names: Feature names indexing the columns of feature_scores
+            levels: Agency levels indexing the columns of level_scores
+            labels: Label of each assessment in the batch
+        """
+        self.marker_scores = marker_scores
+        self.feature_scores = feature_scores
+        self.level_scores = level_scores
+        self.coverage = coverage
+        self.feature_names = feature_names
+        self.levels = levels
+        self.labels = labels
+
+    def get_level_scores(self, index: int) -> Dict[AgencyLevel, float]:
+        """Get level scores for one assessment, shaped like get_overall_agency_score."""
+        return {level: float(self.level_scores[index, j]) for j, level in enumerate(self.levels)}
+
+    def get_feature_scores(self, index: int) -> Dict[str, float]:
+        """Get feature scores for one assessment keyed by feature name."""
+        return {name: float(self.feature_scores[index, j]) for j, name in enumerate(self.feature_names)}
+
+
+class BatchScorer:
+    """Scores batches of assessments using precomputed framework weight matrices."""
+
+    def __init__(self, framework: AgencyFramework):
+        """
+        Initialize a batch scorer.
+
+        Args:
+            framework: The agency framework whose features define the weight matrices
+        """
+        self.framework = framework
+        self.compiled = compiled = framework.compile()
+        self.levels = list(AgencyLevel)
+        self.feature_names = [f.name for f in compiled.features]
+        self.markers = list(compiled.markers)
+        self.marker_index = compiled.marker_ids
+
+        n_features = len(compiled.features)
+        n_markers = len(self.markers)
+
+        # marker -> feature layout: row i lists the marker columns of feature i in
+        # declaration order, padded with a sentinel column that always scores 0.0
+        width = max((len(ids) for ids in compiled.feature_marker_ids), default=0)
+        self.feature_markers = np.full((n_features, width), n_markers, dtype=np.int64)
+        self.feature_lengths = np.ones(n_features)
+        for i, marker_ids in enumerate(compiled.feature_marker_ids):
+            self.feature_markers[i, :len(marker_ids)] = marker_ids
+            if marker_ids:
+                self.feature_lengths[i] = len(marker_ids)
+
+        # feature -> level layout: row j lists the features of level j with their weights
+        width = max((len(fs) for fs in compiled.level_features.values()), default=0)
+        self.level_features = np.full((len(self.levels), width), n_features, dtype=np.int64)
+        self.level_feature_weights = np.zeros((len(self.levels), width))
+        self.level_weights = np.zeros(len(self.levels))
+        for j, level in enumerate(self.levels):
+            for k, feature in enumerate(compiled.level_features[level]):
+                self.level_features[j, k] = compiled.get_feature_position(feature)
+                self.level_feature_weights[j, k] = feature.weight
+            self.level_weights[j] = compiled.level_weights[level]
+
+        self.total_markers = compiled.total_markers
+
+    def new_batch(self, size: int, labels: Optional[List[str]] = None) -> AssessmentBatch:
+        """Create an empty batch of the given size over this scorer's markers."""
+        shape = (size, len(self.markers))
+        return AssessmentBatch(
+            markers=self.markers,
+            presence=np.zeros(shape),
+            confidence=np.ones(shape),
+            assessed=np.zeros(shape, dtype=bool),
+            labels=labels
+        )
+
+    def batch_from_assessments(
+        self,
+        assessments: Sequence[AgencyAssessment],
+        labels: Optional[List[str]] = None
+    ) -> AssessmentBatch:
+        """
+        Pack existing assessments into a batch.
+
+        Args:
+            assessments: Assessments to pack, one row per assessment
+            labels: Optional label for each assessment
+
+        Returns:
+            AssessmentBatch over this scorer's markers
+        """
+        batch = self.new_batch(len(assessments), labels)
+        for row, assessment in enumerate(assessments):
+            if hasattr(assessment, "marker_arrays"):
+                compiled, presence, confidence = assessment.marker_arrays()
+                if compiled is self.compiled:
+                    # Compact assessments share our marker IDs; copy the arrays directly
+                    mask = ~np.isnan(presence)
+                    batch.presence[row, mask] = presence[mask]
+                    batch.confidence[row, mask] = confidence[mask]
+                    batch.assessed[row] = mask
+                    batch.extra_assessed[row] = assessment.assessed_count - int(mask.sum())
+                    continue
+            extra = 0
+            for marker, presence in assessment.results.items():
+                column = self.marker_index.get(marker)
+                if column is None:
+                    extra += 1
+                    continue
+                batch.presence[row, column] = presence
+                batch.confidence[row, column] = assessment.confidence.get(marker, 1.0)
+                batch.assessed[row, column] = True
+            batch.extra_assessed[row] = extra
+        return batch
+
+    def batch_from_reports(
+        self,
+        reports: Sequence[Dict],
+        labels: Optional[List[str]] = None
+    ) -> AssessmentBatch:
+        """
+        Pack reports produced by generate_report into a batch.
+
+        Reports list only assessed markers, so no assessment objects need to be rebuilt.
+        Markers outside this scorer's framework are ignored.
+
+        Args:
+            reports: Reports to pack, one row per report
+            labels: Optional label for each report
+
+        Returns:
+            AssessmentBatch over this scorer's markers
+        """
+        batch = self.new_batch(len(reports), labels)
+        for row, report in enumerate(reports):
+            for feature_data in report.get("feature_scores", {}).values():
+                for marker, values in feature_data.get("markers", {}).items():
+                    column = self.marker_index.get(marker)
+                    if column is None:
+                        continue
+                    batch.presence[row, column] = values["presence"]
+                    batch.confidence[row, column] = values["confidence"]
+                    batch.assessed[row, column] = True
+        return batch
+
+    def marker_scores(self, batch: AssessmentBatch) -> np.ndarray:
+        """Calculate marker scores (presence * confidence) for a batch."""
+        return np.where(batch.assessed, batch.presence * batch.confidence, 0.0)
+
+    def feature_scores(self, marker_scores: np.ndarray) -> np.ndarray:
+        """Calculate feature scores from a matrix of marker scores."""
+        padded = np.concatenate([marker_scores, np.zeros((marker_scores.shape[0], 1))], axis=1)
+        gathered = padded[:, self.feature_markers]
+        # Accumulate in marker order so results are bit-identical to get_feature_score
+        total = np.zeros(gathered.shape[:2])
+        for k in range(gathered.shape[2]):
+            total = total + gathered[:, :, k]
+        return total / self.feature_lengths
+
+    def level_scores(self, feature_scores: np.ndarray) -> np.ndarray:
+        """Calculate level scores from a matrix of feature scores."""
+        padded = np.concatenate([feature_scores, np.zeros((feature_scores.shape[0], 1))], axis=1)
+        weighted = padded[:, self.level_features] * self.level_feature_weights
+        # Accumulate in feature order so results are bit-identical to get_level_score
+        total = np.zeros(weighted.shape[:2])
+        for k in range(weighted.shape[2]):
+            total = total + weighted[:, :, k]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = total / self.level_weights
+        return np.where(self.level_weights == 0, 0.0, scores)
+
+    def coverage(self, batch: AssessmentBatch) -> np.ndarray:
+        """Calculate assessment coverage for a batch."""
+        if self.total_markers == 0:
+            return np.zeros(len(batch))
+        assessed = batch.assessed.sum(axis=1) + batch.extra_assessed
+        return assessed / self.total_markers
+
+    def score(self, batch: AssessmentBatch) -> BatchScores:
+        """
+        Score every assessment in a batch.
+
+        Args:
+            batch: Batch built over this scorer's markers
+
+        Returns:
+            BatchScores with marker, feature, level and coverage scores
+        """
+        if batch.markers is not self.markers and list(batch.markers) != self.markers:
+            raise ValueError("Batch markers do not match the scorer's framework markers")
+
+        marker_scores = self.marker_scores(batch)
+        feature_scores = self.feature_scores(marker_scores)
+        level_scores = self.level_scores(feature_scores)
+        return BatchScores(
+            marker_scores=marker_scores,
+            feature_scores=feature_scores,
+            level_scores=level_scores,
+            coverage=self.coverage(batch),
+            feature_names=self.feature_names,
+            levels=self.levels,
+            labels=batch.labels
+        )
+
+
+def score_assessments(
+    framework: AgencyFramework,
+    assessments: Sequence[AgencyAssessment],
+    labels: Optional[List[str]] = None
+) -> BatchScores:
+    """Score a sequence of assessments against a framework in one batch."""
+    scorer = BatchScorer(framework)
+    return scorer.score(scorer.batch_from_assessments(assessments, labels))
@@ -0,0 +1,373 @@
+"""
+agency_cache.py
+
+Probe result caching for AISystemAnalyzer. Results of the _test_* probes are stored
+under content-addressed keys derived from (system_name, version, probe name, prompt
+template hash), in an in-memory LRU tier, an on-disk SQLite tier, or both, with
+eviction by entry count, by stored bytes (JSON-encoded results) and by TTL, and
+hit/miss counters.
+
+License: PolyForm Noncommercial License 1.0
+"""
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def probe_cache_key(system_name: str, version: str, probe_name: str, prompt_template: str) -> str:
+    """
+    Build the content-addressed cache key for a probe invocation.
+
+    Args:
+        system_name: Name of the AI system
+        version: Version of the AI system
+        probe_name: Name of the probe method
+        prompt_template: Prompt template passed to the probe
+
+    Returns:
+        Hex SHA-256 digest identifying the invocation
+    """
+    template_hash = hashlib.sha256(prompt_template.encode("utf-8")).hexdigest()
+    identity = json.dumps([system_name, version, probe_name, template_hash])
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+
+class CacheStats:
+    """Hit, miss and eviction counters for a probe cache."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def to_dict(self) -> Dict:
+        """Convert counters to dictionary representation."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hit_rate
+        }
+
+
+def _entry_size(value: Dict[str, Dict]) -> int:
+    """Size of probe results in bytes, measured as their JSON encoding."""
+    return len(json.dumps(value).encode("utf-8"))
+
+
+class ProbeCache(ABC):
+    """Base class for probe result caches."""
+
+    def __init__(self):
+        self.stats = CacheStats()
+
+    def make_key(self, system_name: str, version: str, probe_name: str, prompt_template: str) -> str:
+        """Build the cache key for a probe invocation."""
+        return probe_cache_key(system_name, version, probe_name, prompt_template)
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Dict]]:
+        """Get cached probe results, or None on a miss."""
+
+    @abstractmethod
+    def set(self, key: str, value: Dict[str, Dict]):
+        """Store probe results."""
+
+    @abstractmethod
+    def clear(self):
+        """Remove all cached entries."""
+
+
+class MemoryProbeCache(ProbeCache):
+    """In-memory probe cache with LRU and TTL eviction."""
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None, max_bytes: Optional[int] = None):
+        """
+        Initialize an in-memory probe cache.
+
+        Args:
+            max_entries: Maximum number of entries before the least recently used is evicted
+            ttl: Optional time-to-live of an entry in seconds
+            max_bytes: Optional limit on the total JSON-encoded size of the cached
+                results; least recently used entries are evicted beyond it
+        """
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def size_bytes(self) -> int:
+        """Total JSON-encoded size of the cached results in bytes."""
+        return self._bytes
+
+    def get(self, key: str) -> Optional[Dict[str, Dict]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+
+            stored_at, value, size = entry
+            if self.ttl is not None and time.time() - stored_at > self.ttl:
+                del self._entries[key]
+                self._bytes -= size
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def set(self, key: str, value: Dict[str, Dict], stored_at: Optional[float] = None):
+        """
+        Store probe results.
+
+        Args:
+            key: Cache key
+            value: Probe results
+            stored_at: Optional time the results were first stored, from which the
+                TTL is measured (defaults to now)
+        """
+        size = _entry_size(value)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._entries[key] = (time.time() if stored_at is None else stored_at, value, size)
+            self._bytes += size
+            while self._entries and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.stats.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __getstate__(self) -> Dict:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+class SQLiteProbeCache(ProbeCache):
+    """On-disk probe cache stored in a SQLite database."""
+
+    def __init__(
+        self,
+        filepath: str,
+        max_entries: Optional[int] = None,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None
+    ):
+        """
+        Initialize an on-disk probe cache.
+
+        Args:
+            filepath: Path of the SQLite database file
+            max_entries: Optional maximum number of entries; least recently used
+                entries are evicted beyond it
+            ttl: Optional time-to-live of an entry in seconds
+            max_bytes: Optional limit on the total size of the stored JSON results;
+                least recently used entries are evicted beyond it
+        """
+        super().__init__()
+        self.filepath = filepath
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use (connections are not shared across processes)."""
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.filepath, timeout=30, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS probe_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS probe_cache_accessed ON probe_cache (accessed_at)"
+            )
+            self._connection.commit()
+        return self._connection
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM probe_cache").fetchone()[0]
+
+    def get(self, key: str) -> Optional[Dict[str, Dict]]:
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: str) -> Optional[Tuple[Dict[str, Dict], float]]:
+        """
+        Get cached probe results together with the time they were stored.
+
+        Returns:
+            Tuple of (probe results, creation timestamp), or None on a miss
+        """
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute(
+                "SELECT value, created_at FROM probe_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats.misses += 1
+                return None
+
+            value, created_at = row
+            now = time.time()
+            if self.ttl is not None and now - created_at > self.ttl:
+                connection.execute("DELETE FROM probe_cache WHERE key = ?", (key,))
+                connection.commit()
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+
+            connection.execute("UPDATE probe_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            connection.commit()
+            self.stats.hits += 1
+            return json.loads(value), created_at
+
+    def set(self, key: str, value: Dict[str, Dict]):
+        with self._lock:
+            connection = self._connect()
+            now = time.time()
+            connection.execute(
+                "INSERT OR REPLACE INTO probe_cache (key, value, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            if self.max_entries is not None:
+                evicted = connection.execute(
+                    "DELETE FROM probe_cache WHERE key IN ("
+                    "SELECT key FROM probe_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                ).rowcount
+                self.stats.evictions += max(evicted, 0)
+            if self.max_bytes is not None:
+                # Keep the most recently used entries whose running total fits
+                evicted = connection.execute(
+                    "DELETE FROM probe_cache WHERE key IN ("
+                    "SELECT key FROM (SELECT key, SUM(length(CAST(value AS BLOB))) "
+                    "OVER (ORDER BY accessed_at DESC, key) AS running FROM probe_cache) "
+                    "WHERE running > ?)",
+                    (self.max_bytes,)
+                ).rowcount
+                self.stats.evictions += max(evicted, 0)
+            connection.commit()
+
+    def size_bytes(self) -> int:
+        """Total size of the stored JSON results in bytes."""
+        with self._lock:
+            return self._connect().execute(
+                "SELECT COALESCE(SUM(length(CAST(value AS BLOB))), 0) FROM probe_cache"
+            ).fetchone()[0]
+
+    def purge_expired(self) -> int:
+        """Delete all expired entries and return how many were removed."""
+        if self.ttl is None:
+            return 0
+        with self._lock:
+            connection = self._connect()
+            removed = connection.execute(
+                "DELETE FROM probe_cache WHERE created_at < ?", (time.time() - self.ttl,)
+            ).rowcount
+            connection.commit()
+            self.stats.expirations += removed
+            return removed
+
+    def clear(self):
+        with self._lock:
+            connection = self._connect()
+            connection.execute("DELETE FROM probe_cache")
+            connection.commit()
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def __getstate__(self) -> Dict:
+        state = self.__dict__.copy()
+        state["_connection"] = None
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+class TieredProbeCache(ProbeCache):
+    """Two-tier probe cache: an in-memory LRU in front of an on-disk SQLite store."""
+
+    def __init__(self, memory: MemoryProbeCache, disk: SQLiteProbeCache):
+        """
+        Initialize a tiered probe cache.
+
+        Args:
+            memory: Fast in-memory tier consulted first
+            disk: Persistent tier consulted on memory misses
+        """
+        super().__init__()
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key: str) -> Optional[Dict[str, Dict]]:
+        value = self.memory.get(key)
+        if value is None:
+            entry = self.disk.get_entry(key)
+            if entry is not None:
+                # Promote with the original creation time so the entry expires on schedule
+                value, created_at = entry
+                self.memory.set(key, value, stored_at=created_at)
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+
+    def set(self, key: str, value: Dict[str, Dict]):
+        self.memory.set(key, value)
+        self.disk.set(key, value)
+
+    def clear(self):
+        self.memory.clear()
+        self.disk.clear()
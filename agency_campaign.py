@@ -0,0 +1,339 @@
+"""
+agency_campaign.py
+
+Checkpointed, resumable assessment campaigns. A CampaignRunner analyzes a list of
+systems and appends every marker result to a write-ahead log (WAL) as probes produce
+it, followed by a record marking the probe and finally the system as complete. At
+regular intervals a checkpoint captures the campaign state, completed reports are
+appended to reports.jsonl, and a new WAL segment is started so older segments can be
+deleted.
+
+On restart the runner loads the last checkpoint and replays only the WAL written
+after it, so recovery time depends on the work since the last checkpoint rather
+than on the size of the campaign. Completed systems are skipped, completed probes of
+interrupted systems are not re-run, and their marker results are restored.
+
+Campaign directory layout:
+    checkpoint.json         campaign state at the last checkpoint
+    wal-<generation>.jsonl  write-ahead log segments written since then
+    reports.jsonl           reports of completed systems (see agency_jsonl)
+
+License: PolyForm Noncommercial License 1.0
+"""
+from typing import Dict, Iterable, List, Optional
+import glob
+import json
+import logging
+import os
+import time
+
+from robust_agency_assessment import AgencyFramework, AISystemAnalyzer
+from agency_fleet import FleetJob
+from agency_jsonl import AssessmentJSONLWriter
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 1
+SYNC_MODES = ("probe", "record", "none")
+RL_PROBE = "_test_agent_planning"
+
+
+def _fsync_path(filepath: str):
+    """Flush a file's contents to stable storage."""
+    fd = os.open(filepath, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class CampaignSummary:
+    """Outcome of a campaign run."""
+
+    def __init__(self):
+        self.completed = []
+        self.skipped = []
+        self.failed = {}
+        self.recovered_records = 0
+
+    def to_dict(self) -> Dict:
+        """Convert summary to dictionary representation."""
+        return {
+            "completed": len(self.completed),
+            "skipped": len(self.skipped),
+            "failed": dict(self.failed),
+            "recovered_records": self.recovered_records
+        }
+
+
+class CampaignRunner:
+    """Runs an assessment campaign with a write-ahead log and periodic checkpoints."""
+
+    def __init__(
+        self,
+        directory: str,
+        framework: Optional[AgencyFramework] = None,
+        analyzer_class: type = AISystemAnalyzer,
+        checkpoint_interval: float = 60.0,
+        checkpoint_systems: int = 50,
+        sync: str = "probe",
+        probe_cache=None
+    ):
+        """
+        Initialize a campaign runner.
+
+        Args:
+            directory: Campaign directory; created if missing, resumed if it exists
+            framework: Framework shared by every analyzer; defaults to the default features
+            analyzer_class: AISystemAnalyzer subclass used to run each job
+            checkpoint_interval: Seconds between checkpoints
+            checkpoint_systems: Completed systems between checkpoints
+            sync: When the WAL is fsynced: after each completed probe ("probe"), after
+                every record ("record"), or never ("none"; flushed to the OS only)
+            probe_cache: Optional probe result cache passed to every analyzer
+        """
+        if sync not in SYNC_MODES:
+            raise ValueError(f"Unknown sync mode '{sync}', expected one of {SYNC_MODES}")
+        self.directory = directory
+        self.framework = framework if framework is not None else AgencyFramework()
+        self.analyzer_class = analyzer_class
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoint_systems = checkpoint_systems
+        self.sync = sync
+        self.probe_cache = probe_cache
+
+        self.completed = set()
+        self.partial = {}
+        self._pending_reports = []
+        self._generation = 0
+        self._wal = None
+        self._last_checkpoint = time.monotonic()
+        self._since_checkpoint = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def checkpoint_path(self) -> str:
+        return os.path.join(self.directory, "checkpoint.json")
+
+    @property
+    def reports_path(self) -> str:
+        return os.path.join(self.directory, "reports.jsonl")
+
+    def _segment_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"wal-{generation:06d}.jsonl")
+
+    def _segments(self) -> List[int]:
+        """Generations of the WAL segments on disk, in order."""
+        pattern = os.path.join(self.directory, "wal-*.jsonl")
+        return sorted(int(os.path.basename(p)[4:-6]) for p in glob.glob(pattern))
+
+    # Write-ahead log
+
+    def _log(self, record: Dict, sync: bool = False):
+        """Append one record to the WAL."""
+        self._wal.write(json.dumps(record, separators=(",", ":")))
+        self._wal.write("\n")
+        self._wal.flush()
+        if self.sync == "record" or (sync and self.sync == "probe"):
+            os.fsync(self._wal.fileno())
+
+    def _apply(self, record: Dict):
+        """Apply a WAL record to the in-memory campaign state."""
+        key = record["system"]
+        op = record["op"]
+        if op == "marker":
+            state = self.partial.setdefault(key, {"probes": [], "markers": {}})
+            state["markers"][record["marker"]] = [record["presence"], record["confidence"], record.get("evidence")]
+        elif op == "probe_done":
+            state = self.partial.setdefault(key, {"probes": [], "markers": {}})
+            if record["probe"] not in state["probes"]:
+                state["probes"].append(record["probe"])
+        elif op == "system_done":
+            self.partial.pop(key, None)
+            self.completed.add(key)
+            self._pending_reports.append((record["name"], record["version"], record["report"]))
+
+    def _record(self, record: Dict, sync: bool = False):
+        self._log(record, sync)
+        self._apply(record)
+
+    def _log_probe(self, key: str, probe_name: str, probe_results: Dict[str, Dict]):
+        """Log the marker results of a probe, then the probe's completion."""
+        for marker, result in probe_results.items():
+            self._record({
+                "op": "marker", "system": key, "probe": probe_name, "marker": marker,
+                "presence": result["presence"], "confidence": result["confidence"],
+                "evidence": result.get("evidence")
+            })
+        self._record({"op": "probe_done", "system": key, "probe": probe_name}, sync=True)
+
+    # Checkpoints and recovery
+
+    def _checkpoint(self):
+        """Persist the campaign state and start a new WAL segment."""
+        # Reports first, so the checkpoint never points past reports that were not written
+        if self._pending_reports:
+            with AssessmentJSONLWriter(self.reports_path, flush_every=len(self._pending_reports)) as writer:
+                for name, version, report in self._pending_reports:
+                    writer.write(report, name, version)
+            _fsync_path(self.reports_path)
+            self._pending_reports = []
+
+        if self._wal is not None:
+            os.fsync(self._wal.fileno())
+            self._wal.close()
+        self._generation += 1
+        self._wal = open(self._segment_path(self._generation), "a", encoding="utf-8")
+
+        state = {
+            "version": CHECKPOINT_VERSION,
+            "generation": self._generation,
+            "completed": sorted(self.completed),
+            "partial": self.partial,
+            "reports_size": os.path.getsize(self.reports_path) if os.path.exists(self.reports_path) else 0
+        }
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+
+        for generation in self._segments():
+            if generation < self._generation:
+                os.remove(self._segment_path(generation))
+        self._last_checkpoint = time.monotonic()
+        self._since_checkpoint = 0
+
+    def _maybe_checkpoint(self):
+        if (self._since_checkpoint >= self.checkpoint_systems or
+                time.monotonic() - self._last_checkpoint >= self.checkpoint_interval):
+            self._checkpoint()
+
+    def recover(self) -> int:
+        """
+        Restore the campaign state from the last checkpoint and the WAL written after it.
+
+        Returns:
+            Number of WAL records replayed
+        """
+        start_generation = 0
+        reports_size = 0
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("version") != CHECKPOINT_VERSION:
+                raise ValueError(f"Unsupported checkpoint version {state.get('version')}")
+            start_generation = state["generation"]
+            self.completed = set(state["completed"])
+            self.partial = state["partial"]
+            reports_size = state["reports_size"]
+
+        # Drop reports appended after the checkpoint; the WAL replay re-queues them
+        if os.path.exists(self.reports_path) and os.path.getsize(self.reports_path) > reports_size:
+            with open(self.reports_path, "r+b") as f:
+                f.truncate(reports_size)
+
+        replayed = 0
+        segments = [g for g in self._segments() if g >= start_generation]
+        for generation in segments:
+            with open(self._segment_path(generation), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn write at the point of the crash; nothing after it was logged
+                        logger.warning(f"Ignoring incomplete WAL record in segment {generation}")
+                        break
+                    self._apply(record)
+                    replayed += 1
+
+        self._generation = max(segments + [start_generation])
+        self._checkpoint()
+        if replayed or self.completed:
+            logger.info(
+                f"Recovered campaign with {len(self.completed)} completed and "
+                f"{len(self.partial)} interrupted systems ({replayed} WAL records replayed)"
+            )
+        return replayed
+
+    # Execution
+
+    def _run_job(self, job: FleetJob):
+        """Analyze one system, logging results as they are produced."""
+        key = job.key
+        analyzer = self.analyzer_class(
+            system_name=job.system_name,
+            system_type=job.system_type,
+            version=job.version,
+            framework=self.framework,
+            probe_cache=self.probe_cache
+        )
+        restored = self.partial.get(key, {"probes": [], "markers": {}})
+        for marker, (presence, confidence, evidence) in restored["markers"].items():
+            analyzer.assessment.assess_marker(marker, presence, confidence, evidence)
+        done_probes = set(restored["probes"])
+
+        def on_probe_complete(probe_name: str, probe_results: Dict[str, Dict]):
+            self._log_probe(key, probe_name, probe_results)
+
+        if job.analysis == "rl":
+            if RL_PROBE in done_probes:
+                report = analyzer.assessment.generate_report()
+            else:
+                report = analyzer.analyze_rl_agent_agency(job.environment, job.agent_interface, job.n_episodes)
+                on_probe_complete(RL_PROBE, {
+                    marker: {
+                        "presence": presence,
+                        "confidence": analyzer.assessment.confidence.get(marker, 1.0),
+                        "evidence": analyzer.assessment.evidence.get(marker)
+                    }
+                    for marker, presence in analyzer.assessment.results.items()
+                })
+        else:
+            report = analyzer.analyze_llm_agency(
+                job.model_provider, job.model_access, job.prompts,
+                skip_probes=done_probes, on_probe_complete=on_probe_complete
+            )
+
+        self._record(
+            {"op": "system_done", "system": key, "name": job.system_name,
+             "version": job.version, "report": report},
+            sync=True
+        )
+        self._since_checkpoint += 1
+
+    def run(self, jobs: Iterable[FleetJob]) -> CampaignSummary:
+        """
+        Run a campaign, resuming from the campaign directory if it holds earlier progress.
+
+        Args:
+            jobs: Jobs to run; the same list should be passed when resuming
+
+        Returns:
+            CampaignSummary of this run
+        """
+        summary = CampaignSummary()
+        summary.recovered_records = self.recover()
+        try:
+            for job in jobs:
+                if job.key in self.completed:
+                    summary.skipped.append(job.key)
+                    continue
+                try:
+                    self._run_job(job)
+                except Exception as e:
+                    logger.warning(f"Campaign job {job.key} failed: {e!r}")
+                    summary.failed[job.key] = repr(e)
+                    continue
+                summary.completed.append(job.key)
+                self._maybe_checkpoint()
+        finally:
+            self._checkpoint()
+            self._wal.close()
+            self._wal = None
+        logger.info(
+            f"Campaign finished: {len(summary.completed)} completed, "
+            f"{len(summary.skipped)} skipped, {len(summary.failed)} failed"
+        )
+        return summary
@@ -0,0 +1,260 @@
+"""
+agency_columnar.py
+
+Columnar export of agency assessments. Assessments are flattened into a long table
+with one row per assessed (feature, marker) pair and written in bulk to Parquet or
+Arrow IPC files, which can be queried with predicate pushdown and loaded back into
+AgencyAssessment objects. An assessment with no assessed markers is stored as a single
+placeholder row whose marker is null, so it survives the round trip.
+
+License: PolyForm Noncommercial License 1.0
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import logging
+
+from robust_agency_assessment import AgencyFramework, AgencyAssessment
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = [
+    "system", "version", "feature", "level", "marker",
+    "presence", "confidence", "score", "evidence"
+]
+
+# Columns holding few distinct values, stored dictionary-encoded
+DICTIONARY_COLUMNS = ("system", "version", "feature", "level", "marker")
+
+
+def _import_pyarrow():
+    """Import the optional pyarrow package."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Columnar export requires the pyarrow package")
+    return pyarrow
+
+
+def assessment_rows(system_name: str, version: str, assessment: Any) -> Dict[str, List]:
+    """
+    Flatten one assessment into long-format columns.
+
+    Markers shared by several features produce one row per feature; assessed markers
+    that are not part of the framework get a row with no feature or level. An
+    assessment without results gets one placeholder row with only system and version.
+
+    Args:
+        system_name: Name of the assessed AI system
+        version: Version of the assessed AI system
+        assessment: AgencyAssessment or CompactAgencyAssessment to flatten
+
+    Returns:
+        Dictionary mapping column names to lists of values
+    """
+    columns = {name: [] for name in COLUMNS}
+    results = assessment.results
+    confidence = assessment.confidence
+    evidence = assessment.evidence
+    compiled = assessment.framework.compile()
+
+    def add_row(feature, level, marker):
+        presence = results[marker]
+        marker_confidence = confidence.get(marker, 1.0)
+        columns["system"].append(system_name)
+        columns["version"].append(version)
+        columns["feature"].append(feature)
+        columns["level"].append(level)
+        columns["marker"].append(marker)
+        columns["presence"].append(presence)
+        columns["confidence"].append(marker_confidence)
+        columns["score"].append(presence * marker_confidence)
+        columns["evidence"].append(evidence.get(marker))
+
+    for feature in compiled.features:
+        for marker in dict.fromkeys(feature.markers):
+            if marker in results:
+                add_row(feature.name, feature.level.name, marker)
+    for marker in results:
+        if marker not in compiled.marker_ids:
+            add_row(None, None, marker)
+    if not results:
+        placeholder = dict.fromkeys(COLUMNS)
+        placeholder.update(system=system_name, version=version)
+        for name, value in placeholder.items():
+            columns[name].append(value)
+    return columns
+
+
+def assessments_to_table(items: Iterable[Tuple[str, str, Any]]):
+    """
+    Build a long-format Arrow table from many assessments.
+
+    Args:
+        items: Iterable of (system_name, version, assessment) tuples
+
+    Returns:
+        pyarrow.Table with the columns listed in COLUMNS
+    """
+    pa = _import_pyarrow()
+    columns = {name: [] for name in COLUMNS}
+    for system_name, version, assessment in items:
+        for name, values in assessment_rows(system_name, version, assessment).items():
+            columns[name].extend(values)
+
+    arrays = []
+    for name in COLUMNS:
+        if name in DICTIONARY_COLUMNS:
+            arrays.append(pa.array(columns[name], type=pa.string()).dictionary_encode())
+        elif name == "evidence":
+            arrays.append(pa.array(columns[name], type=pa.string()))
+        else:
+            arrays.append(pa.array(columns[name], type=pa.float64()))
+    return pa.table(arrays, names=COLUMNS)
+
+
+def assessments_to_dataframe(items: Iterable[Tuple[str, str, Any]]):
+    """Build a long-format pandas DataFrame from many assessments (no pyarrow needed)."""
+    import pandas as pd
+
+    columns = {name: [] for name in COLUMNS}
+    for system_name, version, assessment in items:
+        for name, values in assessment_rows(system_name, version, assessment).items():
+            columns[name].extend(values)
+    return pd.DataFrame(columns, columns=COLUMNS)
+
+
+def _chunks(items: Iterable, size: int) -> Iterable[List]:
+    """Split an iterable into lists of at most size items."""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def write_parquet(
+    filepath: str,
+    items: Iterable[Tuple[str, str, Any]],
+    assessments_per_row_group: int = 10000,
+    compression: str = "zstd"
+) -> int:
+    """
+    Write assessments to a Parquet file in long format.
+
+    Args:
+        filepath: Path of the Parquet file
+        items: Iterable of (system_name, version, assessment) tuples
+        assessments_per_row_group: Number of assessments flattened per row group,
+            bounding memory use for very large runs
+        compression: Parquet compression codec
+
+    Returns:
+        Number of rows written
+    """
+    pa = _import_pyarrow()
+    writer = None
+    rows = 0
+    try:
+        for chunk in _chunks(items, assessments_per_row_group):
+            table = assessments_to_table(chunk)
+            if writer is None:
+                writer = pa.parquet.ParquetWriter(filepath, table.schema, compression=compression)
+            writer.write_table(table)
+            rows += table.num_rows
+        if writer is None:
+            pa.parquet.write_table(assessments_to_table([]), filepath, compression=compression)
+    finally:
+        if writer is not None:
+            writer.close()
+    logger.info(f"Wrote {rows} marker rows to {filepath}")
+    return rows
+
+
+def write_arrow(filepath: str, items: Iterable[Tuple[str, str, Any]]) -> int:
+    """
+    Write assessments to an Arrow IPC (Feather v2) file in long format.
+
+    Args:
+        filepath: Path of the Arrow file
+        items: Iterable of (system_name, version, assessment) tuples
+
+    Returns:
+        Number of rows written
+    """
+    pa = _import_pyarrow()
+    import pyarrow.feather
+
+    table = assessments_to_table(items)
+    pyarrow.feather.write_feather(table, filepath)
+    logger.info(f"Wrote {table.num_rows} marker rows to {filepath}")
+    return table.num_rows
+
+
+def read_table(
+    filepath: str,
+    filters: Optional[List[Tuple]] = None,
+    columns: Optional[List[str]] = None
+):
+    """
+    Read a long-format table written by write_parquet or write_arrow.
+
+    Args:
+        filepath: Path of the Parquet or Arrow file
+        filters: Optional predicates in pyarrow's DNF format, e.g.
+            [("level", "=", "REFLECTIVE"), ("score", ">", 0.6)]; pushed down to
+            row groups for Parquet files
+        columns: Optional subset of columns to read
+
+    Returns:
+        pyarrow.Table
+    """
+    pa = _import_pyarrow()
+    if filepath.endswith((".arrow", ".feather", ".ipc")):
+        import pyarrow.dataset
+        dataset = pyarrow.dataset.dataset(filepath, format="ipc")
+        expression = pa.parquet.filters_to_expression(filters) if filters else None
+        return dataset.to_table(columns=columns, filter=expression)
+    return pa.parquet.read_table(filepath, columns=columns, filters=filters)
+
+
+def load_assessments(
+    filepath: str,
+    framework: AgencyFramework,
+    filters: Optional[List[Tuple]] = None
+) -> Dict[Tuple[str, str], AgencyAssessment]:
+    """
+    Rebuild assessments from a long-format Parquet or Arrow file.
+
+    Args:
+        filepath: Path of the Parquet or Arrow file
+        framework: Framework to attach to the rebuilt assessments
+        filters: Optional predicates passed to read_table
+
+    Returns:
+        Dictionary mapping (system_name, version) to AgencyAssessment
+    """
+    table = read_table(
+        filepath,
+        filters=filters,
+        columns=["system", "version", "marker", "presence", "confidence", "evidence"]
+    )
+    data = table.to_pydict()
+
+    assessments = {}
+    for system_name, version, marker, presence, confidence, evidence in zip(
+        data["system"], data["version"], data["marker"],
+        data["presence"], data["confidence"], data["evidence"]
+    ):
+        key = (system_name, version)
+        assessment = assessments.get(key)
+        if assessment is None:
+            assessment = assessments[key] = AgencyAssessment(framework)
+        # Placeholder rows of empty assessments have no marker
+        if marker is not None and marker not in assessment.results:
+            assessment.assess_marker(marker, presence, confidence, evidence)
+
+    logger.info(f"Loaded {len(assessments)} assessments from {filepath}")
+    return assessments
@@ -0,0 +1,361 @@
+"""
+agency_compact.py
+
+Compact, array-backed storage for agency assessments. CompactAgencyAssessment keeps
+the AgencyAssessment API but stores presence and confidence as float32 arrays indexed
+by the framework's interned marker IDs, with evidence and notes in sparse side tables,
+so that very large numbers of assessments can be held in memory at once.
+
+License: PolyForm Noncommercial License 1.0
+"""
+import numpy as np
+from typing import Any, Dict, Optional, Tuple
+import json
+import logging
+
+from robust_agency_assessment import (
+    AgencyLevel, AgencyFeature, AgencyFramework, CompiledFramework,
+    IngestionReport, marker_rows_to_columns, resolve_marker_column
+)
+
+logger = logging.getLogger(__name__)
+
+
+class CompactAgencyAssessment:
+    """Memory-efficient agency assessment backed by float32 marker arrays."""
+
+    __slots__ = ("framework", "evidence_store", "_compiled", "_values", "_evidence", "_notes", "_unindexed")
+
+    def __init__(self, framework: AgencyFramework, evidence_store: Optional[Any] = None):
+        """
+        Initialize a compact agency assessment.
+
+        Args:
+            framework: The agency framework to use for assessment
+            evidence_store: Optional EvidenceStore (see agency_evidence); evidence is
+                written to it and only its reference is kept in the assessment
+        """
+        self.framework = framework
+        self.evidence_store = evidence_store
+        self._compiled = framework.compile()
+        # Row 0 holds presence (NaN = not assessed), row 1 holds confidence
+        self._values = np.full((2, len(self._compiled.markers)), np.nan, dtype=np.float32)
+        self._evidence = None
+        self._notes = None
+        self._unindexed = None
+
+    def _sync(self) -> CompiledFramework:
+        """Remap stored values if the framework's feature set has changed."""
+        compiled = self.framework.compile()
+        if compiled is self._compiled:
+            return compiled
+
+        old_markers = self._compiled.markers
+        values = np.full((2, len(compiled.markers)), np.nan, dtype=np.float32)
+        evidence = {}
+        for old_id in np.flatnonzero(~np.isnan(self._values[0])):
+            marker = old_markers[old_id]
+            new_id = compiled.marker_ids.get(marker)
+            if new_id is None:
+                # Marker left the framework; keep it so coverage and reports are unchanged
+                if self._unindexed is None:
+                    self._unindexed = {}
+                self._unindexed[marker] = (
+                    float(self._values[0, old_id]),
+                    float(self._values[1, old_id]),
+                    self._evidence.get(old_id) if self._evidence else None
+                )
+                continue
+            values[:, new_id] = self._values[:, old_id]
+            if self._evidence and old_id in self._evidence:
+                evidence[new_id] = self._evidence[old_id]
+
+        if self._unindexed:
+            for marker in [m for m in self._unindexed if m in compiled.marker_ids]:
+                presence, confidence, text = self._unindexed.pop(marker)
+                new_id = compiled.marker_ids[marker]
+                values[:, new_id] = (presence, confidence)
+                if text:
+                    evidence[new_id] = text
+
+        self._values = values
+        self._evidence = evidence or None
+        self._compiled = compiled
+        return compiled
+
+    @property
+    def results(self) -> Dict[str, float]:
+        """Marker presence estimates keyed by marker name (read-only copy)."""
+        return {marker: p for marker, (p, _, _) in self._iter_assessed()}
+
+    @property
+    def confidence(self) -> Dict[str, float]:
+        """Marker confidence estimates keyed by marker name (read-only copy)."""
+        return {marker: c for marker, (_, c, _) in self._iter_assessed()}
+
+    @property
+    def evidence(self) -> Dict[str, str]:
+        """Marker evidence keyed by marker name (read-only copy)."""
+        return {marker: e for marker, (_, _, e) in self._iter_assessed() if e}
+
+    @property
+    def notes(self) -> Dict[str, str]:
+        """Free-form notes keyed by marker or feature name."""
+        if self._notes is None:
+            self._notes = {}
+        return self._notes
+
+    def _iter_assessed(self):
+        """Yield (marker, (presence, confidence, evidence)) for every assessed marker."""
+        compiled = self._sync()
+        evidence = self._evidence or {}
+        for marker_id in np.flatnonzero(~np.isnan(self._values[0])):
+            yield compiled.markers[marker_id], (
+                float(self._values[0, marker_id]),
+                float(self._values[1, marker_id]),
+                evidence.get(int(marker_id))
+            )
+        if self._unindexed:
+            yield from self._unindexed.items()
+
+    def marker_arrays(self) -> Tuple[CompiledFramework, np.ndarray, np.ndarray]:
+        """
+        Get the raw marker arrays.
+
+        Returns:
+            Tuple of (compiled framework, presence array, confidence array); unassessed
+            markers have NaN presence
+        """
+        compiled = self._sync()
+        return compiled, self._values[0], self._values[1]
+
+    @property
+    def assessed_count(self) -> int:
+        """Number of assessed markers, including markers outside the framework."""
+        self._sync()
+        count = int(np.count_nonzero(~np.isnan(self._values[0])))
+        return count + (len(self._unindexed) if self._unindexed else 0)
+
+    def assess_marker(
+        self,
+        marker: str,
+        presence: float,
+        confidence: float,
+        evidence: Optional[str] = None
+    ):
+        """
+        Assess the presence of a specific marker.
+
+        Args:
+            marker: The marker to assess
+            presence: Estimated presence of the marker (0-1)
+            confidence: Confidence in the estimate (0-1)
+            evidence: Optional evidence supporting the assessment
+        """
+        compiled = self._sync()
+        marker_id = compiled.marker_ids.get(marker)
+        if marker_id is None:
+            if self._unindexed is None:
+                self._unindexed = {}
+            previous = self._unindexed.get(marker)
+            if not evidence and previous:
+                evidence = previous[2]
+            elif evidence and self.evidence_store is not None:
+                evidence = self.evidence_store.put(evidence)
+            self._unindexed[marker] = (presence, confidence, evidence)
+            return
+
+        self._values[0, marker_id] = presence
+        self._values[1, marker_id] = confidence
+        if evidence:
+            if self.evidence_store is not None:
+                evidence = self.evidence_store.put(evidence)
+            if self._evidence is None:
+                self._evidence = {}
+            self._evidence[marker_id] = evidence
+
+    def assess_feature(
+        self,
+        feature: AgencyFeature,
+        assessments: Dict[str, Tuple[float, float, Optional[str]]],
+        resolver=None
+    ):
+        """
+        Assess a feature based on its markers.
+
+        Args:
+            feature: The feature to assess
+            assessments: Dictionary mapping markers to (presence, confidence, evidence) tuples
+            resolver: Optional MarkerIndex (see agency_resolution) for drifted marker names
+        """
+        compiled = self._sync()
+        for marker, (presence, confidence, evidence) in assessments.items():
+            if resolver is not None and not compiled.feature_has_marker(feature, marker):
+                marker = resolver.canonical(marker, feature) or marker
+            if compiled.feature_has_marker(feature, marker):
+                self.assess_marker(marker, presence, confidence, evidence)
+            else:
+                logger.warning(f"Marker '{marker}' not found in feature '{feature.name}'")
+
+    def assess_markers_bulk(self, rows, feature: Optional[AgencyFeature] = None, resolver=None) -> IngestionReport:
+        """
+        Assess many markers at once, writing accepted rows straight into the arrays.
+
+        Args:
+            rows: Marker assessments in any form accepted by marker_rows_to_columns
+            feature: Optional feature to restrict the accepted markers to
+            resolver: Optional MarkerIndex (see agency_resolution) for drifted marker names
+
+        Returns:
+            IngestionReport with accepted, resolved and unmatched counts
+        """
+        markers, presence, confidence, evidence = marker_rows_to_columns(rows)
+        report = IngestionReport()
+        if resolver is not None:
+            markers, report.resolved = resolve_marker_column(markers, resolver, feature)
+        compiled = self._sync()
+        allowed = None
+        if feature is not None:
+            position = compiled.get_feature_position(feature)
+            allowed = compiled.feature_marker_sets[position] if position is not None else set(feature.markers)
+
+        last_row = {}
+        for row, marker in enumerate(markers):
+            marker_id = compiled.marker_ids.get(marker)
+            if marker_id is None or (allowed is not None and marker not in allowed):
+                report.unmatched[marker] = report.unmatched.get(marker, 0) + 1
+                continue
+            # Later rows for the same marker win, as with repeated assess_marker calls
+            last_row[marker_id] = row
+            report.accepted += 1
+
+        if last_row:
+            ids = np.fromiter(last_row.keys(), dtype=np.int64, count=len(last_row))
+            rows_kept = np.fromiter(last_row.values(), dtype=np.int64, count=len(last_row))
+            self._values[0, ids] = np.asarray(presence, dtype=np.float32)[rows_kept]
+            self._values[1, ids] = np.asarray(confidence, dtype=np.float32)[rows_kept]
+            store = self.evidence_store
+            for marker_id, row in last_row.items():
+                if evidence[row]:
+                    if self._evidence is None:
+                        self._evidence = {}
+                    self._evidence[marker_id] = store.put(evidence[row]) if store is not None else evidence[row]
+
+        report.log_unmatched(f"feature '{feature.name}'" if feature is not None else "the framework")
+        return report
+
+    def get_evidence(self, marker: str) -> Optional[str]:
+        """Get the evidence text for a marker, reading it from the evidence store if needed."""
+        compiled = self._sync()
+        marker_id = compiled.marker_ids.get(marker)
+        if marker_id is None:
+            evidence = self._unindexed[marker][2] if self._unindexed and marker in self._unindexed else None
+        else:
+            evidence = self._evidence.get(marker_id) if self._evidence else None
+        if evidence is not None and self.evidence_store is not None:
+            return self.evidence_store.resolve(evidence)
+        return evidence
+
+    def get_marker_score(self, marker: str) -> float:
+        """Get the weighted score for a marker."""
+        compiled = self._sync()
+        marker_id = compiled.marker_ids.get(marker)
+        if marker_id is None:
+            if self._unindexed and marker in self._unindexed:
+                presence, confidence, _ = self._unindexed[marker]
+                return presence * confidence
+            return 0.0
+
+        presence = self._values[0, marker_id]
+        if np.isnan(presence):
+            return 0.0
+        return float(presence) * float(self._values[1, marker_id])
+
+    def get_feature_score(self, feature: AgencyFeature) -> float:
+        """Calculate the score for a feature based on its markers."""
+        if not feature.markers:
+            return 0.0
+
+        compiled = self._sync()
+        position = compiled.get_feature_position(feature)
+        if position is None:
+            return sum(self.get_marker_score(m) for m in feature.markers) / len(feature.markers)
+
+        marker_ids = compiled.feature_marker_ids[position]
+        scores = self._values[0, marker_ids].astype(np.float64) * self._values[1, marker_ids]
+        return float(np.nansum(scores)) / len(feature.markers)
+
+    def get_level_score(self, level: AgencyLevel) -> float:
+        """Calculate the score for an agency level."""
+        compiled = self._sync()
+        features = compiled.level_features[level]
+        if not features:
+            return 0.0
+
+        total_weight = compiled.level_weights[level]
+        if total_weight == 0:
+            return 0.0
+
+        weighted_sum = sum(self.get_feature_score(f) * f.weight for f in features)
+        return weighted_sum / total_weight
+
+    def get_overall_agency_score(self) -> Dict[AgencyLevel, float]:
+        """Calculate agency scores for all levels."""
+        return {level: self.get_level_score(level) for level in AgencyLevel}
+
+    def generate_report(self) -> Dict:
+        """Generate a comprehensive assessment report."""
+        compiled = self._sync()
+        level_scores = self.get_overall_agency_score()
+        evidence = self._evidence or {}
+
+        feature_scores = {}
+        for feature, marker_ids in zip(compiled.features, compiled.feature_marker_ids):
+            markers = {}
+            for marker, marker_id in zip(feature.markers, marker_ids):
+                presence = self._values[0, marker_id]
+                if np.isnan(presence):
+                    continue
+                markers[marker] = {
+                    "presence": float(presence),
+                    "confidence": float(self._values[1, marker_id]),
+                    "evidence": evidence.get(marker_id)
+                }
+            feature_scores[feature.name] = {
+                "score": self.get_feature_score(feature),
+                "level": feature.level.name,
+                "markers": markers
+            }
+
+        return {
+            "level_scores": {level.name: score for level, score in level_scores.items()},
+            "feature_scores": feature_scores,
+            "summary": {
+                "intentional_agency": level_scores.get(AgencyLevel.INTENTIONAL, 0.0),
+                "reflective_agency": level_scores.get(AgencyLevel.REFLECTIVE, 0.0),
+                "rational_agency": level_scores.get(AgencyLevel.RATIONAL, 0.0),
+                "assessment_coverage": self.assessed_count / compiled.total_markers
+            }
+        }
+
+    def save_assessment(self, filepath: str):
+        """Save the assessment to a JSON file."""
+        report = self.generate_report()
+        with open(filepath, 'w') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Saved assessment to {filepath}")
+
+    @classmethod
+    def from_assessment(cls, assessment) -> 'CompactAgencyAssessment':
+        """Create a compact copy of an existing AgencyAssessment."""
+        compact = cls(assessment.framework, evidence_store=getattr(assessment, "evidence_store", None))
+        for marker, presence in assessment.results.items():
+            compact.assess_marker(
+                marker,
+                presence,
+                assessment.confidence.get(marker, 1.0),
+                assessment.evidence.get(marker)
+            )
+        if assessment.notes:
+            compact.notes.update(assessment.notes)
+        return compact
@@ -0,0 +1,212 @@
+"""
+agency_compare.py
+
+Comparison of agency assessments across model versions. A series of assessments (or
+stored reports) is packed into one batch, scored once, and differenced in a single
+vectorized pass to give per-marker, per-feature and per-level deltas between
+consecutive versions or against a baseline, together with the largest movers and the
+markers that appeared or disappeared.
+
+License: PolyForm Noncommercial License 1.0
+"""
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+
+from robust_agency_assessment import AgencyFramework
+from agency_batch import AssessmentBatch, BatchScorer
+
+logger = logging.getLogger(__name__)
+
+COMPARISON_MODES = ("consecutive", "baseline")
+
+
+class AssessmentComparison:
+    """Score deltas between pairs of assessments in a series."""
+
+    def __init__(
+        self,
+        pairs: List[Tuple[str, str]],
+        markers: List[str],
+        feature_names: List[str],
+        levels: List,
+        marker_delta: np.ndarray,
+        feature_delta: np.ndarray,
+        level_delta: np.ndarray,
+        appeared: np.ndarray,
+        disappeared: np.ndarray
+    ):
+        """
+        Initialize a comparison.
+
+        Args:
+            pairs: (from_label, to_label) for each compared pair
+            markers: Marker names indexing the marker axis
+            feature_names: Feature names indexing the feature axis
+            levels: Agency levels indexing the level axis
+            marker_delta: Array of shape (P, M) with marker score changes
+            feature_delta: Array of shape (P, F) with feature score changes
+            level_delta: Array of shape (P, L) with level score changes
+            appeared: Boolean array of shape (P, M), markers assessed only in the later one
+            disappeared: Boolean array of shape (P, M), markers assessed only in the earlier one
+        """
+        self.pairs = pairs
+        self.markers = markers
+        self.feature_names = feature_names
+        self.levels = levels
+        self.marker_delta = marker_delta
+        self.feature_delta = feature_delta
+        self.level_delta = level_delta
+        self.appeared = appeared
+        self.disappeared = disappeared
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    def _axis(self, kind: str) -> Tuple[np.ndarray, List]:
+        if kind == "marker":
+            return self.marker_delta, self.markers
+        if kind == "feature":
+            return self.feature_delta, self.feature_names
+        if kind == "level":
+            return self.level_delta, [level.name for level in self.levels]
+        raise ValueError(f"Unknown kind '{kind}', expected 'marker', 'feature' or 'level'")
+
+    def top_mover_indices(self, k: int = 10, kind: str = "marker") -> np.ndarray:
+        """
+        Get the indices of the k largest absolute changes for every pair at once.
+
+        Returns:
+            Integer array of shape (P, k), ordered by decreasing absolute change
+        """
+        delta, names = self._axis(kind)
+        k = min(k, len(names))
+        if k == 0 or len(delta) == 0:
+            return np.zeros((len(delta), 0), dtype=np.int64)
+        magnitude = np.abs(delta)
+        top = np.argpartition(-magnitude, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(magnitude, top, axis=1), axis=1, kind="stable")
+        return np.take_along_axis(top, order, axis=1)
+
+    def largest_movers(self, pair: int, k: int = 10, kind: str = "marker") -> List[Tuple[str, float]]:
+        """Get the k largest (name, delta) changes for one pair, ignoring unchanged entries."""
+        delta, names = self._axis(kind)
+        indices = self.top_mover_indices(k, kind)[pair]
+        return [(names[i], float(delta[pair, i])) for i in indices if delta[pair, i] != 0]
+
+    def get_appeared(self, pair: int) -> List[str]:
+        """Get markers assessed in the later but not the earlier assessment of a pair."""
+        return [self.markers[i] for i in np.flatnonzero(self.appeared[pair])]
+
+    def get_disappeared(self, pair: int) -> List[str]:
+        """Get markers assessed in the earlier but not the later assessment of a pair."""
+        return [self.markers[i] for i in np.flatnonzero(self.disappeared[pair])]
+
+    def summarize(self, pair: int, k: int = 5) -> Dict:
+        """Summarize one pair as a report-style dictionary."""
+        return {
+            "from": self.pairs[pair][0],
+            "to": self.pairs[pair][1],
+            "level_deltas": {
+                level.name: float(self.level_delta[pair, j]) for j, level in enumerate(self.levels)
+            },
+            "top_features": self.largest_movers(pair, k, "feature"),
+            "top_markers": self.largest_movers(pair, k, "marker"),
+            "appeared": self.get_appeared(pair),
+            "disappeared": self.get_disappeared(pair)
+        }
+
+
+def compare_batch(scorer: BatchScorer, batch: AssessmentBatch, mode: str = "consecutive") -> AssessmentComparison:
+    """
+    Compare the assessments of a batch in order; the batch needs at least two.
+
+    Args:
+        scorer: Scorer built for the batch's framework
+        batch: Batch holding the series in order (e.g. one row per version)
+        mode: "consecutive" to compare each assessment with the previous one, or
+            "baseline" to compare every assessment with the first
+
+    Returns:
+        AssessmentComparison with one entry per compared pair
+    """
+    if mode not in COMPARISON_MODES:
+        raise ValueError(f"Unknown comparison mode '{mode}', expected one of {COMPARISON_MODES}")
+    if len(batch) < 2:
+        raise ValueError(f"Comparison needs at least two assessments, got {len(batch)}")
+    scores = scorer.score(batch)
+    assessed = batch.assessed
+
+    if mode == "consecutive":
+        pairs = list(zip(batch.labels[:-1], batch.labels[1:]))
+
+        def delta(values: np.ndarray) -> np.ndarray:
+            return np.diff(values, axis=0)
+
+        earlier, later = assessed[:-1], assessed[1:]
+    else:
+        pairs = [(batch.labels[0], label) for label in batch.labels[1:]]
+
+        def delta(values: np.ndarray) -> np.ndarray:
+            return values[1:] - values[:1]
+
+        earlier, later = assessed[:1], assessed[1:]
+
+    return AssessmentComparison(
+        pairs=pairs,
+        markers=scorer.markers,
+        feature_names=scorer.feature_names,
+        levels=scorer.levels,
+        marker_delta=delta(scores.marker_scores),
+        feature_delta=delta(scores.feature_scores),
+        level_delta=delta(scores.level_scores),
+        appeared=later & ~earlier,
+        disappeared=earlier & ~later
+    )
+
+
+def compare_assessments(
+    framework: AgencyFramework,
+    assessments: Sequence,
+    labels: Optional[List[str]] = None,
+    mode: str = "consecutive"
+) -> AssessmentComparison:
+    """
+    Compare two or more assessments in order.
+
+    Args:
+        framework: The agency framework shared by the assessments
+        assessments: Assessments in series order (AgencyAssessment or CompactAgencyAssessment)
+        labels: Optional label per assessment, e.g. the model version
+        mode: "consecutive" or "baseline" (see compare_batch)
+
+    Returns:
+        AssessmentComparison with one entry per compared pair
+    """
+    scorer = BatchScorer(framework)
+    return compare_batch(scorer, scorer.batch_from_assessments(assessments, labels), mode)
+
+
+def compare_reports(
+    framework: AgencyFramework,
+    reports: Iterable[Dict],
+    labels: Optional[List[str]] = None,
+    mode: str = "consecutive"
+) -> AssessmentComparison:
+    """
+    Compare a stored series of reports produced by generate_report.
+
+    Reports can come straight from agency_jsonl.iter_reports, so a version history
+    is compared without rebuilding assessment objects.
+
+    Args:
+        framework: The agency framework the reports were generated with
+        reports: Reports in series order
+        labels: Optional label per report
+        mode: "consecutive" or "baseline" (see compare_batch)
+
+    Returns:
+        AssessmentComparison with one entry per compared pair
+    """
+    scorer = BatchScorer(framework)
+    return compare_batch(scorer, scorer.batch_from_reports(list(reports), labels), mode)
@@ -0,0 +1,157 @@
+"""
+agency_dependencies.py
+
+Dependency tracking for incremental re-assessment. When an analyzer is given a
+ProbeManifest, every probe run is recorded in it together with a fingerprint of
+everything its results depend on: the prompt template, the probe function's code, and
+the definitions of the features that contain the markers it reported. A re-assessment
+recomputes the fingerprints and only re-runs probes whose fingerprint changed, reusing
+the recorded results for the rest.
+
+License: PolyForm Noncommercial License 1.0
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import hashlib
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def _hash_code(code: Any, digest: "hashlib._Hash"):
+    """Feed a code object and its nested code objects into a digest."""
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode("utf-8"))
+    for const in code.co_consts:
+        if hasattr(const, "co_code"):
+            _hash_code(const, digest)
+        else:
+            digest.update(repr(const).encode("utf-8"))
+
+
+def code_fingerprint(func: Callable) -> str:
+    """
+    Fingerprint a probe function's code.
+
+    Args:
+        func: Function or bound method
+
+    Returns:
+        Hex SHA-256 digest of the bytecode, names and constants; unaffected by line
+        numbers and object addresses
+    """
+    func = getattr(func, "__func__", func)
+    code = getattr(func, "__code__", None)
+    if code is None:
+        return hashlib.sha256(repr(func).encode("utf-8")).hexdigest()
+    digest = hashlib.sha256()
+    _hash_code(code, digest)
+    return digest.hexdigest()
+
+
+def feature_fingerprint(feature: Any) -> str:
+    """Fingerprint the parts of a feature definition that affect scoring."""
+    identity = json.dumps([feature.name, feature.level.name, feature.weight, list(feature.markers)])
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+
+def probe_fingerprint(code_hash: str, prompt_template: str, feature_hashes: Iterable[str]) -> str:
+    """
+    Combine a probe's dependencies into one fingerprint.
+
+    Args:
+        code_hash: code_fingerprint of the probe function
+        prompt_template: Prompt template passed to the probe
+        feature_hashes: feature_fingerprint of every feature containing a marker the
+            probe reports
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    identity = json.dumps([code_hash, prompt_template, sorted(feature_hashes)])
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+
+class ProbeRecord:
+    """The recorded outcome of one probe run."""
+
+    __slots__ = ("fingerprint", "results")
+
+    def __init__(self, fingerprint: str, results: Dict[str, Dict]):
+        """
+        Initialize a probe record.
+
+        Args:
+            fingerprint: probe_fingerprint at the time of the run
+            results: Marker results returned by the probe
+        """
+        self.fingerprint = fingerprint
+        self.results = results
+
+    @property
+    def markers(self) -> List[str]:
+        """Markers reported by the probe."""
+        return list(self.results)
+
+    def to_dict(self) -> Dict:
+        """Convert record to dictionary representation."""
+        return {"fingerprint": self.fingerprint, "results": self.results}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ProbeRecord':
+        """Create record from dictionary representation."""
+        return cls(data["fingerprint"], data["results"])
+
+
+class ProbeManifest:
+    """Records of the probes run for one system, keyed by probe name."""
+
+    def __init__(self):
+        self.records = {}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __contains__(self, probe_name: str) -> bool:
+        return probe_name in self.records
+
+    def get(self, probe_name: str) -> Optional[ProbeRecord]:
+        """Get the record of a probe, or None if it has not been run."""
+        return self.records.get(probe_name)
+
+    def record(self, probe_name: str, fingerprint: str, results: Dict[str, Dict]):
+        """Record the results of a probe run."""
+        self.records[probe_name] = ProbeRecord(fingerprint, results)
+
+    def invalidate(self, probe_name: Optional[str] = None):
+        """Forget one probe's record, or every record if no probe is given."""
+        if probe_name is None:
+            self.records.clear()
+        else:
+            self.records.pop(probe_name, None)
+
+    def to_dict(self) -> Dict:
+        """Convert manifest to dictionary representation."""
+        return {name: record.to_dict() for name, record in self.records.items()}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ProbeManifest':
+        """Create manifest from dictionary representation."""
+        manifest = cls()
+        manifest.records = {name: ProbeRecord.from_dict(record) for name, record in data.items()}
+        return manifest
+
+    def save(self, filepath: str):
+        """Save the manifest to a JSON file."""
+        with open(filepath, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        logger.info(f"Saved manifest of {len(self.records)} probes to {filepath}")
+
+    @classmethod
+    def load(cls, filepath: str) -> 'ProbeManifest':
+        """Load a manifest from a JSON file, or return an empty one if it does not exist."""
+        if not os.path.exists(filepath):
+            return cls()
+        with open(filepath, 'r') as f:
+            return cls.from_dict(json.load(f))
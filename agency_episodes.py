@@ -0,0 +1,415 @@
+"""
+agency_episodes.py
+
+Batched episode runner for assessing planning in RL agents. N copies of an
+environment are stepped in lockstep with one batched action query to the agent per
+step, per-episode outcomes are collected as arrays, and the resulting statistics are
+turned into presence/confidence estimates for planning markers.
+
+A dependency-free toy environment is included: VectorGridMaze, a batch of random grid
+mazes in which the shortest path can be blocked mid-episode to test re-planning, and
+two reference agents.
+
+License: PolyForm Noncommercial License 1.0
+"""
+import numpy as np
+from typing import Any, Dict, Optional, Tuple
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+# Row/column offsets of the four actions: up, down, left, right
+MOVES = np.array([[-1, 0], [1, 0], [0, -1], [0, 1]], dtype=np.int64)
+
+UNREACHABLE = np.iinfo(np.int32).max
+
+
+def distance_fields(walls: np.ndarray, goals: np.ndarray) -> np.ndarray:
+    """
+    Shortest-path distance to the goal from every cell, for a batch of mazes at once.
+
+    Args:
+        walls: Boolean array of shape (N, H, W), True where a cell is blocked
+        goals: Integer array of shape (N, 2) with goal (row, column)
+
+    Returns:
+        Integer array of shape (N, H, W); UNREACHABLE for blocked or unreachable cells
+    """
+    n = walls.shape[0]
+    dist = np.full(walls.shape, UNREACHABLE, dtype=np.int32)
+    dist[np.arange(n), goals[:, 0], goals[:, 1]] = 0
+    free = ~walls
+    step = 0
+    while True:
+        step += 1
+        frontier = dist == step - 1
+        reached = np.zeros_like(frontier)
+        reached[:, 1:, :] |= frontier[:, :-1, :]
+        reached[:, :-1, :] |= frontier[:, 1:, :]
+        reached[:, :, 1:] |= frontier[:, :, :-1]
+        reached[:, :, :-1] |= frontier[:, :, 1:]
+        reached &= free & (dist == UNREACHABLE)
+        if not reached.any():
+            return dist
+        dist[reached] = step
+
+
+class VectorGridMaze:
+    """A batch of random grid mazes stepped in lockstep."""
+
+    def __init__(
+        self,
+        n_envs: int,
+        size: int = 9,
+        wall_density: float = 0.2,
+        perturb_step: Optional[int] = 3,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize the mazes.
+
+        Args:
+            n_envs: Number of maze copies
+            size: Width and height of each maze
+            wall_density: Probability that a cell is a wall
+            perturb_step: Step at which a wall is placed on the shortest remaining path
+                when a detour exists; None disables perturbation
+            seed: Optional seed for reproducible mazes
+
+        After reset, optimal_steps holds the shortest path length of every maze; when
+        a maze is perturbed it becomes the steps taken so far plus the shortest detour
+        from the agent's position, the best total still achievable after the block.
+        """
+        self.n_envs = n_envs
+        self.size = size
+        self.wall_density = wall_density
+        self.perturb_step = perturb_step
+        self.rng = np.random.default_rng(seed)
+
+    def reset(self) -> Dict[str, np.ndarray]:
+        """
+        Generate new mazes with reachable goals.
+
+        Returns:
+            Observations for every maze
+        """
+        n, size = self.n_envs, self.size
+        self.walls = np.zeros((n, size, size), dtype=bool)
+        self.positions = np.zeros((n, 2), dtype=np.int64)
+        self.goals = np.zeros((n, 2), dtype=np.int64)
+        pending = np.arange(n)
+        while len(pending):
+            # Redraw only the mazes whose goal turned out to be unreachable
+            k = len(pending)
+            walls = self.rng.random((k, size, size)) < self.wall_density
+            starts = self.rng.integers(0, size, (k, 2))
+            goals = self.rng.integers(0, size, (k, 2))
+            walls[np.arange(k), starts[:, 0], starts[:, 1]] = False
+            walls[np.arange(k), goals[:, 0], goals[:, 1]] = False
+            dist = distance_fields(walls, goals)
+            start_dist = dist[np.arange(k), starts[:, 0], starts[:, 1]]
+            ok = (start_dist != UNREACHABLE) & (start_dist > 1)
+            self.walls[pending[ok]] = walls[ok]
+            self.positions[pending[ok]] = starts[ok]
+            self.goals[pending[ok]] = goals[ok]
+            pending = pending[~ok]
+
+        dist = distance_fields(self.walls, self.goals)
+        self.optimal_steps = dist[np.arange(n), self.positions[:, 0], self.positions[:, 1]].astype(np.int64)
+        self.steps = 0
+        self.done = np.zeros(n, dtype=bool)
+        self.perturbed = np.zeros(n, dtype=bool)
+        return self.observe()
+
+    def observe(self) -> Dict[str, np.ndarray]:
+        """Get the current observations for every maze."""
+        return {"position": self.positions.copy(), "goal": self.goals, "walls": self.walls}
+
+    def _perturb(self):
+        """Block the next cell on the shortest path wherever a detour remains."""
+        active = np.flatnonzero(~self.done)
+        if not len(active):
+            return
+        rows = np.arange(len(active))
+        dist = distance_fields(self.walls[active], self.goals[active])
+        position = self.positions[active]
+
+        # Next cell on a shortest path: the neighbour one step closer to the goal
+        here = dist[rows, position[:, 0], position[:, 1]]
+        blocked = np.full((len(active), 2), -1, dtype=np.int64)
+        for move in MOVES:
+            cell = position + move
+            inside = ((cell >= 0) & (cell < self.size)).all(axis=1)
+            cell = np.clip(cell, 0, self.size - 1)
+            closer = inside & (dist[rows, cell[:, 0], cell[:, 1]] == here - 1) & (blocked[:, 0] < 0)
+            blocked[closer] = cell[closer]
+
+        candidates = (blocked[:, 0] >= 0) & ~(blocked == self.goals[active]).all(axis=1)
+        if not candidates.any():
+            return
+        walls = self.walls[active].copy()
+        walls[rows[candidates], blocked[candidates, 0], blocked[candidates, 1]] = True
+        detour = distance_fields(walls, self.goals[active])[rows, position[:, 0], position[:, 1]]
+        keep = candidates & (detour != UNREACHABLE)
+        self.walls[active[keep]] = walls[keep]
+        self.perturbed[active[keep]] = True
+        self.optimal_steps[active[keep]] = self.steps + detour[keep]
+
+    def step(self, actions: np.ndarray) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+        """
+        Apply one action per maze.
+
+        Args:
+            actions: Integer array of shape (N,) indexing MOVES
+
+        Returns:
+            Tuple of (observations, done flags)
+        """
+        target = self.positions + MOVES[actions]
+        inside = ((target >= 0) & (target < self.size)).all(axis=1)
+        target = np.clip(target, 0, self.size - 1)
+        free = inside & ~self.walls[np.arange(self.n_envs), target[:, 0], target[:, 1]]
+        move = free & ~self.done
+        self.positions[move] = target[move]
+        self.done |= (self.positions == self.goals).all(axis=1)
+        self.steps += 1
+        if self.perturb_step is not None and self.steps == self.perturb_step:
+            self._perturb()
+        return self.observe(), self.done.copy()
+
+
+class GreedyPlanningAgent:
+    """
+    Reference agent that follows a shortest path planned over the observed walls.
+
+    With replan=False the plan made at the first step is never revised, so the
+    agent stalls when its path is blocked.
+    """
+
+    def __init__(self, replan: bool = True):
+        self.replan = replan
+        self._plan = None
+        self._planned_walls = None
+
+    def act_batch(self, observations: Dict[str, np.ndarray]) -> np.ndarray:
+        """Choose one action per maze."""
+        walls = observations["walls"]
+        if self._plan is None or self._plan.shape != walls.shape or (
+                self.replan and not np.array_equal(walls, self._planned_walls)):
+            self._plan = distance_fields(walls, observations["goal"])
+            self._planned_walls = walls.copy()
+
+        position = observations["position"]
+        n, size = len(position), walls.shape[1]
+        rows = np.arange(n)
+        best = np.full(n, UNREACHABLE, dtype=np.int64)
+        actions = np.zeros(n, dtype=np.int64)
+        for a, move in enumerate(MOVES):
+            cell = position + move
+            inside = ((cell >= 0) & (cell < size)).all(axis=1)
+            cell = np.clip(cell, 0, size - 1)
+            value = np.where(inside, self._plan[rows, cell[:, 0], cell[:, 1]], UNREACHABLE)
+            better = value < best
+            best[better] = value[better]
+            actions[better] = a
+        return actions
+
+    def reset(self):
+        """Forget the current plan."""
+        self._plan = None
+        self._planned_walls = None
+
+
+class RandomAgent:
+    """Reference agent that moves uniformly at random."""
+
+    def __init__(self, seed: Optional[int] = None):
+        self.rng = np.random.default_rng(seed)
+
+    def act_batch(self, observations: Dict[str, np.ndarray]) -> np.ndarray:
+        """Choose one random action per maze."""
+        return self.rng.integers(0, len(MOVES), len(observations["position"]))
+
+
+def _wilson_interval(successes: float, trials: int, z: float = 1.96) -> Tuple[float, float]:
+    """
+    Wilson score interval for a binomial proportion.
+
+    Also used for means of values in [0, 1] (successes = sum of the values): a
+    Bernoulli variable has the largest variance for its mean, so the interval is
+    conservative and stays wide for few trials even when the values agree.
+    """
+    if trials == 0:
+        return 0.0, 1.0
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    center = (p + z * z / (2 * trials)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, center - half_width), min(1.0, center + half_width)
+
+
+class EpisodeStatistics:
+    """Per-episode outcomes of a batched run."""
+
+    def __init__(
+        self,
+        reached: np.ndarray,
+        steps: np.ndarray,
+        optimal_steps: Optional[np.ndarray],
+        perturbed: np.ndarray
+    ):
+        """
+        Initialize episode statistics.
+
+        Args:
+            reached: Boolean array of shape (E,), whether the goal was reached
+            steps: Integer array of shape (E,) with steps taken to reach the goal
+                (the step limit for episodes that did not)
+            optimal_steps: Integer array of shape (E,) with the shortest achievable path
+                length, measured after the block in perturbed episodes, or None if the
+                environment does not report it
+            perturbed: Boolean array of shape (E,), whether the path was blocked mid-episode
+        """
+        self.reached = reached
+        self.steps = steps
+        self.optimal_steps = optimal_steps
+        self.perturbed = perturbed
+
+    def __len__(self) -> int:
+        return len(self.reached)
+
+    @property
+    def path_efficiency(self) -> Optional[np.ndarray]:
+        """
+        Optimal over actual path length per episode, 0 where the goal was not reached.
+
+        None if the environment does not report optimal path lengths.
+        """
+        if self.optimal_steps is None:
+            return None
+        return np.where(self.reached, self.optimal_steps / np.maximum(self.steps, 1), 0.0)
+
+    def marker_estimates(self) -> Dict[str, Dict]:
+        """
+        Turn the outcomes into planning marker results.
+
+        Presence is the mean path efficiency over all episodes for plan formation, and
+        over perturbed episodes for plan adjustment, so reaching the goal only counts
+        in proportion to how directly it was reached: a random walk that eventually
+        arrives scores close to 0, and an agent that re-plans after the block scores 1.
+        Confidence is one minus the width of the 95% Wilson interval of the mean, so
+        it grows with the episode count. A marker is left out when the environment
+        does not report optimal path lengths, or has no perturbed episodes.
+
+        Returns:
+            Marker results in the format returned by the _test_* probes
+        """
+        results = {}
+        n = len(self)
+        if not n or self.optimal_steps is None:
+            return results
+
+        efficiency = self.path_efficiency
+        mean = float(efficiency.mean())
+        low, high = _wilson_interval(float(efficiency.sum()), n)
+        results["Forms explicit plans to achieve goals"] = {
+            "presence": mean,
+            "confidence": 1.0 - (high - low),
+            "evidence": (
+                f"Agent reached the goal in {int(self.reached.sum())}/{n} episodes "
+                f"with mean path efficiency {mean:.2f}"
+            )
+        }
+
+        perturbed = int(self.perturbed.sum())
+        if perturbed:
+            recovery = efficiency[self.perturbed]
+            recovered = int(self.reached[self.perturbed].sum())
+            mean = float(recovery.mean())
+            low, high = _wilson_interval(float(recovery.sum()), perturbed)
+            results["Adjusts plans in response to changing circumstances"] = {
+                "presence": mean,
+                "confidence": 1.0 - (high - low),
+                "evidence": (
+                    f"Agent reached the goal after its path was blocked in "
+                    f"{recovered}/{perturbed} episodes with mean path efficiency {mean:.2f}"
+                )
+            }
+        return results
+
+
+class EpisodeBatchRunner:
+    """Runs episodes in batches of environment copies stepped in lockstep."""
+
+    def __init__(self, environment: Any, agent_interface: Any, max_steps: Optional[int] = None):
+        """
+        Initialize a runner.
+
+        Args:
+            environment: Vectorized environment with n_envs, reset() and
+                step(actions) -> (observations, done), such as VectorGridMaze.
+                It may also expose optimal_steps (shortest achievable path length
+                per copy, accounting for any block) and perturbed (whether each
+                copy's path was blocked); metrics that depend on a missing attribute
+                are skipped
+            agent_interface: Agent with act_batch(observations) -> actions, or with
+                act(observation) for a single environment, queried once per maze
+            max_steps: Step limit per episode (defaults to four times the maze area)
+        """
+        self.environment = environment
+        self.agent_interface = agent_interface
+        self.max_steps = max_steps or 4 * getattr(environment, "size", 16) ** 2
+
+    def _act(self, observations: Dict[str, np.ndarray]) -> np.ndarray:
+        if hasattr(self.agent_interface, "act_batch"):
+            return np.asarray(self.agent_interface.act_batch(observations))
+        n = self.environment.n_envs
+        return np.array([
+            self.agent_interface.act({key: value[i] for key, value in observations.items()})
+            for i in range(n)
+        ])
+
+    def run_batch(self) -> EpisodeStatistics:
+        """Run one episode in every environment copy."""
+        env = self.environment
+        if hasattr(self.agent_interface, "reset"):
+            self.agent_interface.reset()
+        observations = env.reset()
+        steps = np.full(env.n_envs, self.max_steps, dtype=np.int64)
+        done = np.zeros(env.n_envs, dtype=bool)
+        for t in range(1, self.max_steps + 1):
+            observations, now_done = env.step(self._act(observations))
+            steps[now_done & ~done] = t
+            done = now_done
+            if done.all():
+                break
+        optimal_steps = getattr(env, "optimal_steps", None)
+        perturbed = getattr(env, "perturbed", None)
+        return EpisodeStatistics(
+            done,
+            steps,
+            np.array(optimal_steps, dtype=np.int64) if optimal_steps is not None else None,
+            np.array(perturbed, dtype=bool) if perturbed is not None else np.zeros(env.n_envs, dtype=bool)
+        )
+
+    def run(self, n_episodes: int) -> EpisodeStatistics:
+        """
+        Run at least n_episodes episodes.
+
+        Args:
+            n_episodes: Number of episodes; rounded up to whole batches
+
+        Returns:
+            EpisodeStatistics over all episodes
+        """
+        batches = [self.run_batch() for _ in range(max(1, math.ceil(n_episodes / self.environment.n_envs)))]
+        return EpisodeStatistics(
+            reached=np.concatenate([b.reached for b in batches]),
+            steps=np.concatenate([b.steps for b in batches]),
+            optimal_steps=(
+                np.concatenate([b.optimal_steps for b in batches])
+                if all(b.optimal_steps is not None for b in batches) else None
+            ),
+            perturbed=np.concatenate([b.perturbed for b in batches])
+        )
@@ -0,0 +1,275 @@
+"""
+agency_evidence.py
+
+Content-addressed, compressed storage for assessment evidence. Evidence such as full
+model transcripts is written once to a local directory under the SHA-256 of its
+text, and assessments and reports carry a short reference ("sha256:<hex>") in place
+of the text. Identical transcripts shared by many markers, versions or systems are
+stored once, reports stay small, and the text is only read back and decompressed
+when a consumer asks for it.
+
+Store layout:
+    config.json               compression used by the store
+    objects/<ab>/<cdef...>    compressed evidence, named by the hash of its text
+
+References are plain strings, so assessments, reports, JSONL files and result stores
+handle them without changes.
+
+License: PolyForm Noncommercial License 1.0
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import zlib
+
+from agency_jsonl import _import_zstandard
+
+logger = logging.getLogger(__name__)
+
+REF_PREFIX = "sha256:"
+COMPRESSIONS = ("zlib", "zstd")
+STORE_VERSION = 1
+
+
+def is_evidence_ref(value: Any) -> bool:
+    """Check whether a value is an evidence store reference."""
+    return isinstance(value, str) and value.startswith(REF_PREFIX) and len(value) == len(REF_PREFIX) + 64
+
+
+def evidence_ref(text: str) -> str:
+    """Compute the reference of an evidence text without storing it."""
+    return REF_PREFIX + hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EvidenceStore:
+    """Deduplicating on-disk store of compressed evidence texts."""
+
+    def __init__(self, directory: str, compression: str = "zlib", level: int = 6, cache_size: int = 128):
+        """
+        Open or create an evidence store.
+
+        Args:
+            directory: Store directory; created if missing
+            compression: "zlib" (standard library) or "zstd" (requires the zstandard
+                package); an existing store keeps the compression it was created with
+            level: Compression level
+            cache_size: Number of decompressed texts kept in memory for repeated reads
+        """
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression '{compression}', expected one of {COMPRESSIONS}")
+        self.directory = directory
+        self.level = level
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        config_path = os.path.join(directory, "config.json")
+        if os.path.exists(config_path):
+            with open(config_path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+            if config.get("version") != STORE_VERSION:
+                raise ValueError(f"Unsupported evidence store version {config.get('version')}")
+            if config["compression"] != compression:
+                logger.info(f"Evidence store {directory} uses {config['compression']} compression")
+            compression = config["compression"]
+        else:
+            with open(config_path, "w", encoding="utf-8") as f:
+                json.dump({"version": STORE_VERSION, "compression": compression}, f)
+        self.compression = compression
+        if compression == "zstd":
+            # Fail at open time rather than on the first write
+            _import_zstandard()
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.compression == "zstd":
+            return _import_zstandard().ZstdCompressor(level=self.level).compress(data)
+        return zlib.compress(data, self.level)
+
+    def _decompress(self, data: bytes) -> bytes:
+        if self.compression == "zstd":
+            return _import_zstandard().ZstdDecompressor().decompress(data)
+        return zlib.decompress(data)
+
+    def _path(self, ref: str) -> str:
+        digest = ref[len(REF_PREFIX):]
+        return os.path.join(self.directory, "objects", digest[:2], digest[2:])
+
+    def _remember(self, ref: str, text: str):
+        self._cache[ref] = text
+        self._cache.move_to_end(ref)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def put(self, text: str) -> str:
+        """
+        Store an evidence text.
+
+        Args:
+            text: Evidence text; an existing reference is returned unchanged
+
+        Returns:
+            Reference to the stored text
+        """
+        if is_evidence_ref(text):
+            return text
+        data = text.encode("utf-8")
+        ref = REF_PREFIX + hashlib.sha256(data).hexdigest()
+        path = self._path(ref)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write under a temporary name so readers never see a partial object
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(self._compress(data))
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        return ref
+
+    def get(self, ref: str) -> str:
+        """
+        Read an evidence text.
+
+        Args:
+            ref: Reference returned by put
+
+        Returns:
+            The stored text
+        """
+        text = self._cache.get(ref)
+        if text is not None:
+            self._cache.move_to_end(ref)
+            return text
+        if not is_evidence_ref(ref):
+            raise ValueError(f"Not an evidence reference: {ref!r}")
+        try:
+            with open(self._path(ref), "rb") as f:
+                text = self._decompress(f.read()).decode("utf-8")
+        except FileNotFoundError:
+            raise KeyError(f"Evidence {ref} not found in {self.directory}")
+        self._remember(ref, text)
+        return text
+
+    def resolve(self, value: Optional[str]) -> Optional[str]:
+        """Resolve a reference to its text; any other value is returned unchanged."""
+        return self.get(value) if is_evidence_ref(value) else value
+
+    def __contains__(self, ref: str) -> bool:
+        return is_evidence_ref(ref) and os.path.exists(self._path(ref))
+
+    def disk_usage(self) -> Tuple[int, int]:
+        """
+        Measure the store.
+
+        Returns:
+            Tuple of (number of stored texts, total compressed bytes)
+        """
+        count, size = 0, 0
+        for root, _, files in os.walk(os.path.join(self.directory, "objects")):
+            for name in files:
+                if not name.startswith(".tmp-"):
+                    count += 1
+                    size += os.path.getsize(os.path.join(root, name))
+        return count, size
+
+
+def externalize_assessment(assessment: Any, store: EvidenceStore, min_size: int = 0) -> int:
+    """
+    Move the evidence of an assessment into a store, keeping only references.
+
+    Args:
+        assessment: AgencyAssessment or CompactAgencyAssessment
+        store: Evidence store to write to
+        min_size: Evidence shorter than this many characters is kept inline
+
+    Returns:
+        Number of evidence texts replaced by references
+    """
+    moved = 0
+    results = assessment.results
+    confidence = assessment.confidence
+    for marker, text in assessment.evidence.items():
+        if is_evidence_ref(text) or len(text) < min_size:
+            continue
+        assessment.assess_marker(marker, results[marker], confidence.get(marker, 1.0), store.put(text))
+        moved += 1
+    return moved
+
+
+def _map_report_evidence(report: Dict, convert) -> Dict:
+    """Copy a report, converting the evidence of every marker."""
+    copied = dict(report)
+    feature_scores = {}
+    for name, feature_data in report.get("feature_scores", {}).items():
+        feature_copy = dict(feature_data)
+        if "markers" in feature_data:
+            feature_copy["markers"] = {
+                marker: {**values, "evidence": convert(values.get("evidence"))}
+                for marker, values in feature_data["markers"].items()
+            }
+        feature_scores[name] = feature_copy
+    copied["feature_scores"] = feature_scores
+    return copied
+
+
+def externalize_report(report: Dict, store: EvidenceStore, min_size: int = 0) -> Dict:
+    """
+    Copy a generate_report dictionary with its evidence moved into a store.
+
+    Useful for shrinking reports saved before the evidence store was in use.
+    """
+    def convert(text):
+        if text is None or is_evidence_ref(text) or len(text) < min_size:
+            return text
+        return store.put(text)
+    return _map_report_evidence(report, convert)
+
+
+def resolve_report(report: Dict, store: EvidenceStore) -> Dict:
+    """Copy a generate_report dictionary with every evidence reference replaced by its text."""
+    return _map_report_evidence(report, store.resolve)
+
+
+class ReportEvidence:
+    """Lazy view of the evidence in a report; texts are read from the store on request."""
+
+    def __init__(self, report: Dict, store: EvidenceStore):
+        """
+        Initialize a report evidence view.
+
+        Args:
+            report: Report produced by generate_report
+            store: Evidence store holding the referenced texts
+        """
+        self.store = store
+        self._evidence = {}
+        for feature_data in report.get("feature_scores", {}).values():
+            for marker, values in feature_data.get("markers", {}).items():
+                if values.get("evidence") is not None:
+                    self._evidence[marker] = values["evidence"]
+
+    def markers(self) -> List[str]:
+        """Markers that have evidence."""
+        return list(self._evidence)
+
+    def get(self, marker: str) -> Optional[str]:
+        """Get the evidence text of a marker, or None if it has none."""
+        return self.store.resolve(self._evidence.get(marker))
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        """Yield (marker, evidence text) pairs, reading each text as it is reached."""
+        for marker, value in self._evidence.items():
+            yield marker, self.store.resolve(value)
+
+    def __contains__(self, marker: str) -> bool:
+        return marker in self._evidence
+
+    def __len__(self) -> int:
+        return len(self._evidence)
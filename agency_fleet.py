@@ -0,0 +1,274 @@
+"""
+agency_fleet.py
+
+Fleet-level runner for assessing many AI systems in parallel. Jobs are distributed
+over a process pool whose workers share a single AgencyFramework, and reports are
+streamed back as they finish, with progress reporting and retry of failed systems.
+
+License: PolyForm Noncommercial License 1.0
+"""
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+import logging
+
+from robust_agency_assessment import AgencyFramework, AISystemAnalyzer
+from agency_dependencies import ProbeManifest
+
+logger = logging.getLogger(__name__)
+
+
+class FleetJob:
+    """A single system to analyze as part of a fleet run."""
+
+    def __init__(
+        self,
+        system_name: str,
+        version: str,
+        system_type: str = "LLM",
+        analysis: str = "llm",
+        model_provider: Optional[str] = None,
+        model_access: Any = None,
+        prompts: Optional[Dict[str, str]] = None,
+        environment: Any = None,
+        agent_interface: Any = None,
+        manifest_path: Optional[str] = None,
+        n_episodes: Optional[int] = None
+    ):
+        """
+        Initialize a fleet job.
+
+        Args:
+            system_name: Name of the AI system
+            version: Version of the AI system
+            system_type: Type of AI system (e.g., LLM, RL agent)
+            analysis: Analysis to run, either "llm" or "rl"
+            model_provider: Provider of the language model (LLM analysis)
+            model_access: Picklable access to the model API or interface (LLM analysis)
+            prompts: Dictionary of specialized prompts (LLM analysis)
+            environment: Picklable environment for testing the agent (RL analysis)
+            agent_interface: Picklable interface to the agent (RL analysis)
+            manifest_path: Optional probe manifest file (see agency_dependencies); when
+                set, only probes invalidated since the manifest was written are re-run
+                and the manifest is updated (LLM analysis)
+            n_episodes: Optional episode count for the batched episode runner; the
+                environment must then be vectorized (RL analysis)
+        """
+        if analysis not in ("llm", "rl"):
+            raise ValueError(f"Unknown analysis '{analysis}', expected 'llm' or 'rl'")
+        self.system_name = system_name
+        self.version = version
+        self.system_type = system_type
+        self.analysis = analysis
+        self.model_provider = model_provider
+        self.model_access = model_access
+        self.prompts = prompts or {}
+        self.environment = environment
+        self.agent_interface = agent_interface
+        self.manifest_path = manifest_path
+        self.n_episodes = n_episodes
+
+    @property
+    def key(self) -> str:
+        """Identifier of the job's system and version."""
+        return f"{self.system_name}@{self.version}"
+
+
+class FleetResult:
+    """Outcome of a fleet job."""
+
+    def __init__(
+        self,
+        job: FleetJob,
+        report: Optional[Dict],
+        attempts: int,
+        error: Optional[str] = None
+    ):
+        """
+        Initialize a fleet result.
+
+        Args:
+            job: The job that was run
+            report: Assessment report, or None if every attempt failed
+            attempts: Number of attempts made
+            error: Description of the last error if the job failed
+        """
+        self.job = job
+        self.report = report
+        self.attempts = attempts
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        """Whether the job produced a report."""
+        return self.report is not None
+
+
+class FleetProgress:
+    """Progress counters for a fleet run."""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+
+    @property
+    def finished(self) -> int:
+        """Number of jobs that will not run again."""
+        return self.completed + self.failed
+
+    def __repr__(self) -> str:
+        return (
+            f"FleetProgress({self.finished}/{self.total} finished, "
+            f"{self.failed} failed, {self.retried} retries)"
+        )
+
+
+# Per-worker state installed by _init_worker
+_worker_framework = None
+_worker_analyzer_class = AISystemAnalyzer
+_worker_concurrent_probes = False
+_worker_probe_cache = None
+
+
+def _init_worker(
+    framework: AgencyFramework,
+    analyzer_class: type,
+    concurrent_probes: bool,
+    probe_cache: Any
+):
+    """Install the shared framework in a worker process and compile it once."""
+    global _worker_framework, _worker_analyzer_class, _worker_concurrent_probes, _worker_probe_cache
+    _worker_framework = framework
+    _worker_framework.compile()
+    _worker_analyzer_class = analyzer_class
+    _worker_concurrent_probes = concurrent_probes
+    _worker_probe_cache = probe_cache
+
+
+def _run_job(job: FleetJob) -> Dict:
+    """Analyze one system in a worker process."""
+    analyzer = _worker_analyzer_class(
+        system_name=job.system_name,
+        system_type=job.system_type,
+        version=job.version,
+        framework=_worker_framework,
+        probe_cache=_worker_probe_cache
+    )
+    if job.analysis == "rl":
+        return analyzer.analyze_rl_agent_agency(job.environment, job.agent_interface, job.n_episodes)
+    if job.manifest_path:
+        analyzer.probe_manifest = ProbeManifest.load(job.manifest_path)
+        report = analyzer.reassess_llm_agency(job.model_provider, job.model_access, job.prompts)
+        analyzer.probe_manifest.save(job.manifest_path)
+        return report
+    if _worker_concurrent_probes:
+        return analyzer.analyze_llm_agency_concurrent(job.model_provider, job.model_access, job.prompts)
+    return analyzer.analyze_llm_agency(job.model_provider, job.model_access, job.prompts)
+
+
+def _log_progress(progress: FleetProgress, result: FleetResult):
+    """Default progress callback."""
+    status = "done" if result.ok else f"failed ({result.error})"
+    logger.info(f"[{progress.finished}/{progress.total}] {result.job.key} {status}")
+
+
+class FleetAnalyzer:
+    """Runs agency analyses for many AI systems over a process pool."""
+
+    def __init__(
+        self,
+        framework: Optional[AgencyFramework] = None,
+        max_workers: Optional[int] = None,
+        max_retries: int = 1,
+        progress_callback: Optional[Callable[[FleetProgress, FleetResult], None]] = _log_progress,
+        analyzer_class: type = AISystemAnalyzer,
+        concurrent_probes: bool = False,
+        probe_cache: Any = None
+    ):
+        """
+        Initialize a fleet analyzer.
+
+        Args:
+            framework: Framework shared by every worker; defaults to the default features
+            max_workers: Number of worker processes (defaults to the CPU count)
+            max_retries: Number of times a failed job is resubmitted before giving up
+            progress_callback: Called with (progress, result) whenever a job finishes
+            analyzer_class: AISystemAnalyzer subclass used to run each job
+            concurrent_probes: Run each LLM job's probes concurrently inside its worker
+            probe_cache: Optional probe result cache; each worker gets its own copy, so
+                use an on-disk cache to share results between workers
+        """
+        self.framework = framework if framework is not None else AgencyFramework()
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.progress_callback = progress_callback
+        self.analyzer_class = analyzer_class
+        self.concurrent_probes = concurrent_probes
+        self.probe_cache = probe_cache
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        """Start a process pool whose workers share the fleet's framework."""
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=_init_worker,
+            initargs=(
+                self.framework, self.analyzer_class, self.concurrent_probes, self.probe_cache
+            )
+        )
+
+    def run(self, jobs: Iterable[FleetJob]) -> Iterator[FleetResult]:
+        """
+        Run all jobs and yield results as they finish.
+
+        If a worker process dies, the pool is replaced and the jobs that were
+        still on it are resubmitted; the crash counts as a failed attempt for
+        each of them.
+
+        Args:
+            jobs: Jobs to run
+
+        Yields:
+            FleetResult for every job, in completion order
+        """
+        jobs = list(jobs)
+        progress = FleetProgress(len(jobs))
+        if not jobs:
+            return
+
+        pool = self._new_pool()
+        try:
+            # Each pending job remembers its pool, so a crash restarts the pool only once
+            pending = {pool.submit(_run_job, job): (job, 1, pool) for job in jobs}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job, attempt, job_pool = pending.pop(future)
+                    try:
+                        result = FleetResult(job, future.result(), attempt)
+                    except Exception as e:
+                        if isinstance(e, BrokenProcessPool) and job_pool is pool:
+                            logger.warning("A worker process died; restarting the process pool")
+                            pool.shutdown(wait=False)
+                            pool = self._new_pool()
+                        if attempt <= self.max_retries:
+                            logger.warning(f"Retrying {job.key} after attempt {attempt} failed: {e!r}")
+                            progress.retried += 1
+                            pending[pool.submit(_run_job, job)] = (job, attempt + 1, pool)
+                            continue
+                        result = FleetResult(job, None, attempt, error=repr(e))
+
+                    if result.ok:
+                        progress.completed += 1
+                    else:
+                        progress.failed += 1
+                    if self.progress_callback is not None:
+                        self.progress_callback(progress, result)
+                    yield result
+        finally:
+            pool.shutdown()
+
+    def run_all(self, jobs: Iterable[FleetJob]) -> Dict[str, FleetResult]:
+        """Run all jobs and collect the results keyed by job key."""
+        return {result.job.key: result for result in self.run(jobs)}
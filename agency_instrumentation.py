@@ -0,0 +1,266 @@
+"""
+agency_instrumentation.py
+
+Opt-in instrumentation for agency assessments. Hot paths in AgencyAssessment and
+AISystemAnalyzer record call counts and latency histograms into a metrics registry
+that is disabled by default. Instrumented methods are swapped for their timing
+wrappers only while the registry is enabled, so disabled metrics add nothing to a
+call; instrumented plain functions and timed blocks pay a flag check. Snapshots can
+be exported in Prometheus text format or to a JSON file, and cProfile/tracemalloc
+sessions can be attached to a single analysis.
+
+License: PolyForm Noncommercial License 1.0
+"""
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List
+import functools
+import io
+import json
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf
+)
+
+
+class LatencyHistogram:
+    """Call count, total time and bucketed latencies for one operation."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.bucket_counts = [0] * len(LATENCY_BUCKETS)
+
+    def observe(self, seconds: float):
+        """Record one call that took the given number of seconds."""
+        self.count += 1
+        self.total += seconds
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+    def to_dict(self) -> Dict:
+        """Convert histogram to dictionary representation."""
+        return {
+            "count": self.count,
+            "total_seconds": self.total,
+            "mean_seconds": self.total / self.count if self.count else 0.0,
+            "buckets": {
+                ("+Inf" if math.isinf(bound) else repr(bound)): n
+                for bound, n in zip(LATENCY_BUCKETS, self.bucket_counts)
+            }
+        }
+
+
+class MetricsRegistry:
+    """Registry of latency histograms keyed by operation name."""
+
+    def __init__(self):
+        self._enabled = False
+        self._histograms = {}
+        self._lock = threading.Lock()
+        # (class, attribute, plain function, timing wrapper) of every instrumented method
+        self._methods = []
+
+    @property
+    def enabled(self) -> bool:
+        """Whether metrics are being recorded."""
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, enabled: bool):
+        self._enabled = bool(enabled)
+        for owner, attribute, func, wrapper in self._methods:
+            setattr(owner, attribute, wrapper if self._enabled else func)
+
+    def enable(self):
+        """Start recording metrics."""
+        self.enabled = True
+
+    def disable(self):
+        """Stop recording metrics (recorded values are kept)."""
+        self.enabled = False
+
+    def register_method(self, owner: type, attribute: str, func: Callable, wrapper: Callable):
+        """Install a method's timing wrapper while metrics are enabled, and the plain function otherwise."""
+        self._methods.append((owner, attribute, func, wrapper))
+        setattr(owner, attribute, wrapper if self._enabled else func)
+
+    def reset(self):
+        """Drop all recorded metrics."""
+        with self._lock:
+            self._histograms = {}
+
+    def observe(self, name: str, seconds: float):
+        """Record one call of an operation."""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Get a point-in-time copy of all metrics keyed by operation name."""
+        with self._lock:
+            return {name: h.to_dict() for name, h in sorted(self._histograms.items())}
+
+
+# Registry used by the instrumented hot paths
+metrics = MetricsRegistry()
+
+
+class _InstrumentedFunction:
+    """
+    Result of the instrumented decorator.
+
+    In a class body it replaces itself with the plain method when the class is
+    created, and the registry swaps the timing wrapper in and out on enable and
+    disable. Called directly, as a decorated plain function, it checks the flag.
+    """
+
+    def __init__(self, name: str, func: Callable):
+        self.func = func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metrics.observe(name, time.perf_counter() - start)
+
+        self.wrapper = wrapper
+        functools.update_wrapper(self, func)
+
+    def __set_name__(self, owner: type, attribute: str):
+        metrics.register_method(owner, attribute, self.func, self.wrapper)
+
+    def __call__(self, *args, **kwargs):
+        if not metrics.enabled:
+            return self.func(*args, **kwargs)
+        return self.wrapper(*args, **kwargs)
+
+
+def instrumented(name: str) -> Callable:
+    """Decorator recording the latency of every call under the given operation name."""
+    def decorator(func: Callable) -> Callable:
+        return _InstrumentedFunction(name, func)
+    return decorator
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """Context manager recording the latency of a block under the given operation name."""
+    if not metrics.enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe(name, time.perf_counter() - start)
+
+
+class PrometheusTextExporter:
+    """Exports metric snapshots in the Prometheus text exposition format."""
+
+    def __init__(self, metric_name: str = "agency_operation_duration_seconds"):
+        self.metric_name = metric_name
+
+    def render(self, snapshot: Dict[str, Dict]) -> str:
+        """Render a snapshot as Prometheus text."""
+        lines = [
+            f"# HELP {self.metric_name} Latency of instrumented agency assessment operations.",
+            f"# TYPE {self.metric_name} histogram"
+        ]
+        for name, data in snapshot.items():
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            cumulative = 0
+            for bound, count in data["buckets"].items():
+                cumulative += count
+                lines.append(f'{self.metric_name}_bucket{{operation="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'{self.metric_name}_sum{{operation="{label}"}} {data["total_seconds"]}')
+            lines.append(f'{self.metric_name}_count{{operation="{label}"}} {data["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, snapshot: Dict[str, Dict], filepath: str):
+        """Write a snapshot to a text file (e.g. for the node exporter textfile collector)."""
+        with open(filepath, "w") as f:
+            f.write(self.render(snapshot))
+
+
+class JSONFileExporter:
+    """Exports metric snapshots to a local JSON file."""
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+
+    def export(self, snapshot: Dict[str, Dict]):
+        """Write a snapshot to the JSON file."""
+        with open(self.filepath, "w") as f:
+            json.dump({"timestamp": time.time(), "metrics": snapshot}, f, indent=2)
+        logger.info(f"Exported {len(snapshot)} metrics to {self.filepath}")
+
+
+class ProfileSession:
+    """Results of a profiling session."""
+
+    def __init__(self):
+        self.profile = None
+        self.memory_snapshot = None
+        self.peak_memory = None
+
+    def cpu_report(self, sort_by: str = "cumulative", limit: int = 25) -> str:
+        """Get the cProfile statistics as text."""
+        if self.profile is None:
+            return ""
+        import pstats
+
+        stream = io.StringIO()
+        pstats.Stats(self.profile, stream=stream).sort_stats(sort_by).print_stats(limit)
+        return stream.getvalue()
+
+    def memory_report(self, limit: int = 25) -> List[str]:
+        """Get the largest allocation sites recorded by tracemalloc."""
+        if self.memory_snapshot is None:
+            return []
+        return [str(stat) for stat in self.memory_snapshot.statistics("lineno")[:limit]]
+
+
+@contextmanager
+def profiling_session(cpu: bool = True, memory: bool = False) -> Iterator[ProfileSession]:
+    """
+    Profile the enclosed block, e.g. a single analyze_llm_agency call.
+
+    Args:
+        cpu: Attach a cProfile profiler
+        memory: Trace allocations with tracemalloc
+
+    Yields:
+        ProfileSession populated when the block exits
+    """
+    session = ProfileSession()
+    if memory:
+        import tracemalloc
+        tracemalloc.start()
+    if cpu:
+        import cProfile
+        session.profile = cProfile.Profile()
+        session.profile.enable()
+    try:
+        yield session
+    finally:
+        if cpu:
+            session.profile.disable()
+        if memory:
+            session.memory_snapshot = tracemalloc.take_snapshot()
+            session.peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
@@ -0,0 +1,171 @@
+"""
+agency_jsonl.py
+
+Streaming JSON Lines storage for agency assessment reports. Assessments are appended
+as compact one-line records as they complete, optionally gzip- or zstd-compressed, and
+read back lazily with filtering by system, version or level score threshold.
+
+License: PolyForm Noncommercial License 1.0
+"""
+from typing import Any, Dict, Iterator, Optional, Union
+import gzip
+import io
+import json
+import logging
+
+from robust_agency_assessment import AgencyLevel
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIONS = (None, "gzip", "zstd")
+
+
+def _infer_compression(filepath: str) -> Optional[str]:
+    """Infer the compression of a JSONL file from its extension."""
+    if filepath.endswith(".gz"):
+        return "gzip"
+    if filepath.endswith(".zst"):
+        return "zstd"
+    return None
+
+
+def _import_zstandard():
+    """Import the optional zstandard package."""
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd compression requires the zstandard package")
+    return zstandard
+
+
+def _open_text(filepath: str, mode: str, compression: Optional[str]):
+    """Open a possibly compressed file in text mode ('r' or 'a')."""
+    if compression is None:
+        return open(filepath, mode, encoding="utf-8")
+    if compression == "gzip":
+        return gzip.open(filepath, mode + "t", encoding="utf-8")
+
+    zstandard = _import_zstandard()
+    raw = open(filepath, mode + "b")
+    if mode == "a":
+        stream = zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+    else:
+        stream = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+    return io.TextIOWrapper(stream, encoding="utf-8")
+
+
+class AssessmentJSONLWriter:
+    """Append-only writer emitting one compact JSON record per assessment."""
+
+    def __init__(self, filepath: str, compression: Optional[str] = None, flush_every: int = 1):
+        """
+        Initialize a JSONL writer.
+
+        Args:
+            filepath: Path of the JSONL file; records are appended if it exists
+            compression: None, "gzip" or "zstd"; inferred from a .gz/.zst extension if omitted
+            flush_every: Flush to disk after this many records
+        """
+        if compression is None:
+            compression = _infer_compression(filepath)
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression '{compression}', expected one of {COMPRESSIONS}")
+        self.filepath = filepath
+        self.compression = compression
+        self.flush_every = flush_every
+        self.records_written = 0
+        self._file = _open_text(filepath, "a", compression)
+
+    def write(
+        self,
+        assessment: Union[Any, Dict],
+        system_name: Optional[str] = None,
+        version: Optional[str] = None,
+        metadata: Optional[Dict] = None
+    ):
+        """
+        Append one assessment record.
+
+        Args:
+            assessment: An assessment (anything with generate_report) or a report dict
+            system_name: Name of the assessed AI system
+            version: Version of the assessed AI system
+            metadata: Optional extra fields stored with the record
+        """
+        report = assessment if isinstance(assessment, dict) else assessment.generate_report()
+        record = {"system": system_name, "version": version, "report": report}
+        if metadata:
+            record["metadata"] = metadata
+        self._file.write(json.dumps(record, separators=(",", ":")))
+        self._file.write("\n")
+        self.records_written += 1
+        if self.records_written % self.flush_every == 0:
+            self._file.flush()
+
+    def close(self):
+        """Flush and close the underlying file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            logger.info(f"Wrote {self.records_written} assessment records to {self.filepath}")
+
+    def __enter__(self) -> 'AssessmentJSONLWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def iter_assessment_records(
+    filepath: str,
+    system: Optional[str] = None,
+    version: Optional[str] = None,
+    min_level_scores: Optional[Dict[Union[AgencyLevel, str], float]] = None,
+    compression: Optional[str] = None
+) -> Iterator[Dict]:
+    """
+    Lazily read assessment records from a JSONL file.
+
+    Args:
+        filepath: Path of the JSONL file
+        system: Only yield records for this system
+        version: Only yield records for this version
+        min_level_scores: Only yield records whose level scores are at least these
+            thresholds, e.g. {AgencyLevel.REFLECTIVE: 0.6}
+        compression: None, "gzip" or "zstd"; inferred from a .gz/.zst extension if omitted
+
+    Yields:
+        Record dicts with "system", "version", "report" and optional "metadata" keys
+    """
+    if compression is None:
+        compression = _infer_compression(filepath)
+    thresholds = {
+        (level.name if isinstance(level, AgencyLevel) else level): threshold
+        for level, threshold in (min_level_scores or {}).items()
+    }
+
+    with _open_text(filepath, "r", compression) as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping malformed record on line {line_number} of {filepath}")
+                continue
+
+            if system is not None and record.get("system") != system:
+                continue
+            if version is not None and record.get("version") != version:
+                continue
+            if thresholds:
+                level_scores = record["report"].get("level_scores", {})
+                if any(level_scores.get(name, 0.0) < t for name, t in thresholds.items()):
+                    continue
+            yield record
+
+
+def iter_reports(filepath: str, **filters) -> Iterator[Dict]:
+    """Lazily read assessment reports from a JSONL file (see iter_assessment_records)."""
+    for record in iter_assessment_records(filepath, **filters):
+        yield record["report"]
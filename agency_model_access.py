@@ -0,0 +1,575 @@
+"""
+agency_model_access.py
+
+Model-access adapter for prompt-driven probes. ModelClient sends prompts to an HTTP
+model endpoint over a pool of keep-alive connections, limits its request rate with a
+token bucket, and coalesces concurrent prompts into multi-prompt requests whose size
+adapts to throttling (additive increase, multiplicative decrease). A bounded queue
+applies backpressure to callers when the endpoint cannot keep up, and 429 responses
+pause the bucket for the server's Retry-After instead of retrying in a burst.
+
+Pass a ModelClient as model_access; probes running concurrently (for example under
+AISystemAnalyzer.analyze_llm_agency_concurrent or across fleet jobs sharing a client)
+then share batches. LocalModelServer is a stand-in endpoint speaking the same
+protocol, for tests and benchmarks.
+
+Protocol:
+    POST /v1/batch  {"prompts": [...], "params": {...}}  ->  {"completions": [...]}
+
+License: PolyForm Noncommercial License 1.0
+"""
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+import http.client
+import json
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+BATCH_PATH = "/v1/batch"
+
+
+class ModelAccessError(RuntimeError):
+    """Raised when a prompt cannot be completed by the model endpoint."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket rate limiter."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Initialize a token bucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of stored tokens, i.e. the largest burst
+                (defaults to one second's worth, at least 1)
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _wait_time(self, tokens: float, now: float) -> float:
+        """Refill the bucket and return how long to wait for the tokens (lock held)."""
+        if now < self._paused_until:
+            return self._paused_until - now
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= tokens:
+            return 0.0
+        return (tokens - self._tokens) / self.rate
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens if they are available right now."""
+        with self._lock:
+            if self._wait_time(tokens, time.monotonic()) > 0:
+                return False
+            self._tokens -= tokens
+            return True
+
+    def retry_after(self, tokens: float = 1.0) -> float:
+        """Seconds until the tokens will be available."""
+        with self._lock:
+            return self._wait_time(tokens, time.monotonic())
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for and take tokens.
+
+        Args:
+            tokens: Number of tokens to take
+            timeout: Optional maximum wait in seconds
+
+        Returns:
+            True if the tokens were taken, False if the timeout expired first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._wait_time(tokens, now)
+                if wait == 0:
+                    self._tokens -= tokens
+                    return True
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Hand out no tokens for the given time and restart from an empty bucket."""
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = self._paused_until
+
+
+class ConnectionPool:
+    """Pool of keep-alive HTTP connections to one host."""
+
+    def __init__(self, base_url: str, max_connections: int = 4, timeout: float = 60.0):
+        """
+        Initialize a connection pool.
+
+        Args:
+            base_url: Endpoint URL, e.g. "http://127.0.0.1:8080"
+            max_connections: Maximum number of open connections
+            timeout: Socket timeout in seconds
+        """
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme or "http"
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+    def _connect(self) -> http.client.HTTPConnection:
+        cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=self.timeout)
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        Send a request on a pooled connection.
+
+        A request failing on a reused connection (closed by the server while idle)
+        is retried once on a fresh connection.
+
+        Returns:
+            Tuple of (status, headers with lower-cased names, body)
+        """
+        with self._slots:
+            try:
+                connection, reused = self._idle.get_nowait(), True
+            except queue.Empty:
+                connection, reused = self._connect(), False
+            while True:
+                try:
+                    connection.request(method, self.prefix + path, body=body, headers=headers or {})
+                    response = connection.getresponse()
+                    data = response.read()
+                except (http.client.HTTPException, OSError):
+                    connection.close()
+                    if not reused:
+                        raise
+                    connection, reused = self._connect(), False
+                    continue
+                if response.will_close:
+                    connection.close()
+                else:
+                    self._idle.put(connection)
+                # Header names are case-insensitive; normalize them for lookups
+                response_headers = {name.lower(): value for name, value in response.getheaders()}
+                return response.status, response_headers, data
+
+    def close(self):
+        """Close all idle connections."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class ClientStats:
+    """Request counters for a model client."""
+
+    def __init__(self):
+        self.requests = 0
+        self.prompts = 0
+        self.throttled = 0
+        self.retries = 0
+        self.failures = 0
+
+    @property
+    def mean_batch_size(self) -> float:
+        """Average number of prompts per successful request."""
+        return self.prompts / self.requests if self.requests else 0.0
+
+    def to_dict(self) -> Dict:
+        """Convert counters to dictionary representation."""
+        return {
+            "requests": self.requests,
+            "prompts": self.prompts,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "failures": self.failures,
+            "mean_batch_size": self.mean_batch_size
+        }
+
+
+def _parse_retry_after(value: Optional[str], default: float) -> float:
+    """Parse a Retry-After header given as delay seconds or as an HTTP date."""
+    if value is None:
+        return default
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        logger.debug(f"Ignoring unparseable Retry-After header {value!r}")
+        return default
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class _PendingPrompt:
+    __slots__ = ("prompt", "params_key", "future")
+
+    def __init__(self, prompt: str, params_key: str):
+        self.prompt = prompt
+        self.params_key = params_key
+        self.future = Future()
+
+
+class ModelClient:
+    """Rate-limited, batching client for a model endpoint."""
+
+    def __init__(
+        self,
+        base_url: str,
+        max_connections: int = 4,
+        requests_per_second: float = 10.0,
+        burst: Optional[float] = None,
+        max_batch_size: int = 16,
+        max_batch_delay: float = 0.01,
+        max_pending: int = 1024,
+        max_retries: int = 5,
+        timeout: float = 60.0,
+        default_params: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Initialize a model client.
+
+        Args:
+            base_url: Endpoint URL, e.g. "http://127.0.0.1:8080"
+            max_connections: Keep-alive connections, and so requests in flight
+            requests_per_second: Sustained request rate allowed by the endpoint quota
+            burst: Largest burst of requests (defaults to one second's worth)
+            max_batch_size: Upper bound on prompts per request
+            max_batch_delay: Longest time a prompt waits for others to join its batch
+            max_pending: Queued prompts beyond which submit blocks (backpressure)
+            max_retries: Attempts per batch after throttling or connection errors
+            timeout: Socket timeout in seconds
+            default_params: Generation parameters sent with every prompt
+        """
+        self.pool = ConnectionPool(base_url, max_connections, timeout)
+        self.bucket = TokenBucket(requests_per_second, burst)
+        self.max_batch_size = max_batch_size
+        self.max_batch_delay = max_batch_delay
+        self.max_retries = max_retries
+        self.default_params = default_params or {}
+        self.stats = ClientStats()
+        self._batch_size = max_batch_size
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._closed = threading.Event()
+        self._workers = [
+            threading.Thread(target=self._dispatch_loop, name=f"model-client-{i}", daemon=True)
+            for i in range(max_connections)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    @property
+    def batch_size(self) -> int:
+        """Current adaptive batch size."""
+        return self._batch_size
+
+    def submit(self, prompt: str, params: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None) -> Future:
+        """
+        Queue a prompt for completion.
+
+        Blocks while max_pending prompts are already queued.
+
+        Args:
+            prompt: Prompt text
+            params: Optional generation parameters overriding default_params
+            timeout: Optional maximum time to wait for queue space
+
+        Returns:
+            Future resolving to the completion text
+        """
+        if self._closed.is_set():
+            raise ModelAccessError("Client is closed")
+        merged = dict(self.default_params, **(params or {}))
+        pending = _PendingPrompt(prompt, json.dumps(merged, sort_keys=True))
+        try:
+            self._queue.put(pending, timeout=timeout)
+        except queue.Full:
+            raise ModelAccessError(f"Request queue full ({self._queue.maxsize} pending prompts)")
+        return pending.future
+
+    def complete(self, prompt: str, params: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None) -> str:
+        """Complete a single prompt, sharing a batch with concurrent callers."""
+        return self.submit(prompt, params).result(timeout)
+
+    def complete_many(self, prompts: List[str], params: Optional[Dict[str, Any]] = None) -> List[str]:
+        """Complete several prompts, returned in input order."""
+        futures = [self.submit(prompt, params) for prompt in prompts]
+        return [future.result() for future in futures]
+
+    def _next_batch(self) -> Optional[List[_PendingPrompt]]:
+        """Wait for a prompt, then gather more until the batch is full or the delay expires."""
+        while True:
+            try:
+                first = self._queue.get(timeout=0.1)
+                break
+            except queue.Empty:
+                if self._closed.is_set():
+                    return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_batch_delay
+        while len(batch) < self._batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _dispatch_loop(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            groups = {}
+            for pending in batch:
+                groups.setdefault(pending.params_key, []).append(pending)
+            for params_key, group in groups.items():
+                try:
+                    self._send(group, json.loads(params_key))
+                except Exception as e:
+                    # Keep the dispatcher alive and never leave a caller waiting
+                    logger.exception(f"Unexpected error sending {len(group)} prompts")
+                    self._count(failures=1)
+                    self._fail(group, e)
+
+    def _count(self, **increments: int):
+        """Update stats counters from a dispatcher thread."""
+        with self._lock:
+            for name, value in increments.items():
+                setattr(self.stats, name, getattr(self.stats, name) + value)
+
+    def _adjust_batch_size(self, throttled: bool):
+        """Additive increase on success, multiplicative decrease on throttling."""
+        with self._lock:
+            if throttled:
+                self._batch_size = max(1, self._batch_size // 2)
+            elif self._batch_size < self.max_batch_size:
+                self._batch_size += 1
+
+    def _send(self, group: List[_PendingPrompt], params: Dict[str, Any]):
+        """Send one multi-prompt request and resolve its futures."""
+        body = json.dumps({"prompts": [p.prompt for p in group], "params": params}).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count(retries=1)
+            self.bucket.acquire()
+            try:
+                status, response_headers, data = self.pool.request("POST", BATCH_PATH, body, headers)
+            except (http.client.HTTPException, OSError) as e:
+                error = e
+                time.sleep(min(2 ** attempt * 0.1, 5.0))
+                continue
+
+            if status in (429, 503):
+                self._count(throttled=1)
+                retry_after = _parse_retry_after(response_headers.get("retry-after"), 2 ** attempt * 0.1)
+                self.bucket.pause(retry_after)
+                self._adjust_batch_size(throttled=True)
+                error = ModelAccessError(f"Endpoint throttled the request (HTTP {status})")
+                continue
+            if status == 413 and len(group) > 1:
+                # Batch exceeds the endpoint's limit: cap the batch size and resend in halves
+                with self._lock:
+                    self._batch_size = min(self._batch_size, len(group) // 2)
+                    self.max_batch_size = min(self.max_batch_size, len(group) // 2)
+                middle = len(group) // 2
+                self._send(group[:middle], params)
+                self._send(group[middle:], params)
+                return
+            if status != 200:
+                error = ModelAccessError(f"Endpoint returned HTTP {status}: {data[:200]!r}")
+                break
+
+            try:
+                completions = json.loads(data)["completions"]
+            except (ValueError, KeyError, TypeError) as e:
+                error = ModelAccessError(f"Endpoint returned an invalid response ({e}): {data[:200]!r}")
+                break
+            if not isinstance(completions, list) or len(completions) != len(group):
+                count = len(completions) if isinstance(completions, list) else type(completions).__name__
+                error = ModelAccessError(f"Endpoint returned {count} completions for {len(group)} prompts")
+                break
+            self._count(requests=1, prompts=len(group))
+            self._adjust_batch_size(throttled=False)
+            for pending, completion in zip(group, completions):
+                pending.future.set_result(completion)
+            return
+
+        self._count(failures=1)
+        logger.warning(f"Failed to complete {len(group)} prompts: {error}")
+        self._fail(group, error)
+
+    @staticmethod
+    def _fail(group: List[_PendingPrompt], error: BaseException):
+        """Resolve every unresolved future of a group with an error."""
+        if not isinstance(error, ModelAccessError):
+            wrapped = ModelAccessError(f"{type(error).__name__}: {error}")
+            wrapped.__cause__ = error
+            error = wrapped
+        for pending in group:
+            if not pending.future.done():
+                pending.future.set_exception(error)
+
+    def close(self):
+        """Finish queued prompts, stop the dispatchers and close connections."""
+        self._closed.set()
+        for worker in self._workers:
+            worker.join()
+        self.pool.close()
+
+    def __enter__(self) -> 'ModelClient':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _echo_responder(prompt: str, params: Dict[str, Any]) -> str:
+    return f"Response to: {prompt}"
+
+
+class LocalModelServer:
+    """Stand-in model endpoint for tests and benchmarks."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        requests_per_second: Optional[float] = None,
+        burst: Optional[float] = None,
+        latency: float = 0.01,
+        per_prompt_latency: float = 0.001,
+        max_batch_size: int = 64,
+        responder: Callable[[str, Dict[str, Any]], str] = _echo_responder
+    ):
+        """
+        Initialize a local model server.
+
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            requests_per_second: Optional request quota; requests beyond it get HTTP 429
+                with a Retry-After header
+            burst: Largest burst of requests within the quota
+            latency: Fixed processing time per request in seconds
+            per_prompt_latency: Additional processing time per prompt in seconds
+            max_batch_size: Largest accepted batch; larger batches get HTTP 413
+            responder: Function producing the completion for a prompt
+        """
+        self.latency = latency
+        self.per_prompt_latency = per_prompt_latency
+        self.max_batch_size = max_batch_size
+        self.responder = responder
+        self.bucket = TokenBucket(requests_per_second, burst) if requests_per_second else None
+        self.requests = 0
+        self.prompts = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    def _handler_class(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                data = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self.path != BATCH_PATH:
+                    self._reply(404, {"error": "not found"})
+                    return
+                if server.bucket is not None and not server.bucket.try_acquire():
+                    with server._lock:
+                        server.rejected += 1
+                    retry_after = max(server.bucket.retry_after(), 0.001)
+                    self._reply(429, {"error": "rate limited"}, {"Retry-After": f"{retry_after:.3f}"})
+                    return
+
+                request = json.loads(data)
+                prompts = request["prompts"]
+                if len(prompts) > server.max_batch_size:
+                    self._reply(413, {"error": f"batch larger than {server.max_batch_size}"})
+                    return
+                time.sleep(server.latency + server.per_prompt_latency * len(prompts))
+                params = request.get("params", {})
+                with server._lock:
+                    server.requests += 1
+                    server.prompts += len(prompts)
+                self._reply(200, {"completions": [server.responder(p, params) for p in prompts]})
+
+        return Handler
+
+    @property
+    def url(self) -> str:
+        """Base URL of the server."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'LocalModelServer':
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="local-model-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and release the port."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> 'LocalModelServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
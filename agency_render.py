@@ -0,0 +1,345 @@
+"""
+agency_render.py
+
+Headless, batched rendering of assessment visualizations. Scores for a whole batch
+are computed once with BatchScorer and reduced to the few arrays the plots need;
+figures are drawn on the non-interactive Agg canvas from a template whose axes and
+artists are created once and updated in place for every assessment. Reports are
+rendered to image files in a process pool or to a single multi-page PDF, and a
+summary grid compares level and feature scores across systems.
+
+The layout matches AgencyAssessment.visualize_results: level scores, feature scores,
+the distribution of assessed marker scores, and assessment coverage.
+
+License: PolyForm Noncommercial License 1.0
+"""
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence
+import logging
+import os
+import re
+
+from robust_agency_assessment import AgencyFramework
+from agency_batch import HISTOGRAM_BINS, AssessmentBatch, BatchScorer, BatchScores
+
+logger = logging.getLogger(__name__)
+
+
+class ReportPlotData:
+    """Precomputed per-assessment values plotted in a report figure."""
+
+    def __init__(
+        self,
+        level_scores: np.ndarray,
+        feature_scores: np.ndarray,
+        marker_histograms: np.ndarray,
+        coverage: np.ndarray,
+        feature_names: List[str],
+        feature_levels: List[str],
+        level_names: List[str],
+        labels: List[str]
+    ):
+        """
+        Initialize plot data.
+
+        Args:
+            level_scores: Array of shape (N, L) with level scores
+            feature_scores: Array of shape (N, F) with feature scores
+            marker_histograms: Array of shape (N, HISTOGRAM_BINS) counting assessed
+                marker scores per bin over [0, 1]
+            coverage: Array of shape (N,) with assessment coverage
+            feature_names: Feature names indexing the feature axis
+            feature_levels: Level name of every feature
+            level_names: Level names indexing the level axis
+            labels: Label of each assessment
+        """
+        self.level_scores = level_scores
+        self.feature_scores = feature_scores
+        self.marker_histograms = marker_histograms
+        self.coverage = coverage
+        self.feature_names = feature_names
+        self.feature_levels = feature_levels
+        self.level_names = level_names
+        self.labels = labels
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @classmethod
+    def from_scores(cls, scorer: BatchScorer, batch: AssessmentBatch, scores: BatchScores) -> 'ReportPlotData':
+        """Build plot data from a batch and its precomputed scores."""
+        # Bin assessed marker scores for every assessment at once; 1.0 falls in the last bin
+        bins = np.clip((scores.marker_scores * HISTOGRAM_BINS).astype(np.int64), 0, HISTOGRAM_BINS - 1)
+        rows = np.broadcast_to(np.arange(len(batch))[:, None], bins.shape)
+        flat = (rows * HISTOGRAM_BINS + bins)[batch.assessed]
+        histograms = np.bincount(flat, minlength=len(batch) * HISTOGRAM_BINS).reshape(-1, HISTOGRAM_BINS)
+
+        return cls(
+            level_scores=scores.level_scores,
+            feature_scores=scores.feature_scores,
+            marker_histograms=histograms,
+            coverage=scores.coverage,
+            feature_names=scores.feature_names,
+            feature_levels=[f.level.name for f in scorer.compiled.features],
+            level_names=[level.name for level in scores.levels],
+            labels=list(batch.labels)
+        )
+
+    def subset(self, indices: Sequence[int]) -> 'ReportPlotData':
+        """Select a subset of assessments."""
+        indices = list(indices)
+        return ReportPlotData(
+            level_scores=self.level_scores[indices],
+            feature_scores=self.feature_scores[indices],
+            marker_histograms=self.marker_histograms[indices],
+            coverage=self.coverage[indices],
+            feature_names=self.feature_names,
+            feature_levels=self.feature_levels,
+            level_names=self.level_names,
+            labels=[self.labels[i] for i in indices]
+        )
+
+
+class ReportFigure:
+    """Reusable four-panel report figure drawn on an Agg canvas."""
+
+    def __init__(
+        self,
+        feature_names: List[str],
+        feature_levels: List[str],
+        level_names: List[str],
+        figsize=(12, 8),
+        dpi: int = 100
+    ):
+        """
+        Create the figure, axes and artists once.
+
+        Args:
+            feature_names: Feature names shown on the feature panel
+            feature_levels: Level name of every feature, used to color its bar
+            level_names: Level names shown on the level panel
+            figsize: Figure size in inches
+            dpi: Resolution of raster output
+        """
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        from matplotlib.layout_engine import TightLayoutEngine
+        from matplotlib.patches import Patch
+
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(self.figure)
+        axes = self.figure.subplots(2, 2)
+        level_colors = {name: f"C{j}" for j, name in enumerate(level_names)}
+
+        ax = axes[0, 0]
+        self._level_bars = ax.bar(level_names, np.zeros(len(level_names)),
+                                  color=[level_colors[name] for name in level_names])
+        ax.set_ylim(0, 1)
+        ax.set_title("Agency Levels")
+
+        ax = axes[0, 1]
+        positions = np.arange(len(feature_names))
+        self._feature_bars = ax.barh(positions, np.zeros(len(feature_names)),
+                                     color=[level_colors.get(level, "C0") for level in feature_levels])
+        ax.set_yticks(positions, feature_names)
+        ax.invert_yaxis()
+        ax.set_xlim(0, 1)
+        ax.set_title("Feature Scores")
+        ax.legend(
+            handles=[Patch(color=level_colors[name], label=name)
+                     for name in level_names if name in set(feature_levels)],
+            title="Level", fontsize="small"
+        )
+
+        ax = axes[1, 0]
+        width = 1.0 / HISTOGRAM_BINS
+        self._histogram_bars = ax.bar(np.arange(HISTOGRAM_BINS) * width, np.zeros(HISTOGRAM_BINS),
+                                      width=width, align="edge")
+        ax.set_xlim(0, 1)
+        ax.set_title("Distribution of Marker Scores")
+        ax.set_xlabel("Score")
+        ax.set_ylabel("Count")
+        self._histogram_axes = ax
+
+        self._coverage_axes = axes[1, 1]
+        self._title = self.figure.suptitle("")
+        # Apply a tight layout once without installing a layout engine on the figure,
+        # which would make every savefig draw the figure twice
+        TightLayoutEngine(rect=(0, 0, 1, 0.96)).execute(self.figure)
+
+    def draw(self, data: ReportPlotData, index: int):
+        """Update the artists with one assessment's values."""
+        for bar, value in zip(self._level_bars, data.level_scores[index]):
+            bar.set_height(value)
+        for bar, value in zip(self._feature_bars, data.feature_scores[index]):
+            bar.set_width(value)
+
+        counts = data.marker_histograms[index]
+        for bar, count in zip(self._histogram_bars, counts):
+            bar.set_height(count)
+        self._histogram_axes.set_ylim(0, max(1, int(counts.max())) * 1.05)
+
+        # Pie wedges cannot be resized in place, so only this panel is redrawn
+        coverage = float(np.clip(data.coverage[index], 0.0, 1.0))
+        ax = self._coverage_axes
+        ax.clear()
+        ax.pie([coverage, 1 - coverage], labels=["Assessed", "Not Assessed"], autopct="%1.1f%%")
+        ax.set_title("Assessment Coverage")
+
+        self._title.set_text(data.labels[index])
+
+    def save(self, target, **kwargs):
+        """Save the current drawing to a path or an open PdfPages document."""
+        if hasattr(target, "savefig"):
+            target.savefig(self.figure, **kwargs)
+        else:
+            self.figure.savefig(target, **kwargs)
+
+
+def _safe_filename(label: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._@-]+", "_", label).strip("_") or "assessment"
+
+
+def _render_chunk(data: ReportPlotData, paths: List[str], figsize, dpi: int) -> List[str]:
+    """Render a chunk of assessments to image files with one figure template."""
+    figure = ReportFigure(data.feature_names, data.feature_levels, data.level_names, figsize, dpi)
+    for index, path in enumerate(paths):
+        figure.draw(data, index)
+        figure.save(path)
+    return paths
+
+
+def render_reports(
+    data: ReportPlotData,
+    output_dir: Optional[str] = None,
+    pdf_path: Optional[str] = None,
+    image_format: str = "png",
+    workers: Optional[int] = None,
+    chunk_size: int = 64,
+    figsize=(12, 8),
+    dpi: int = 100
+) -> List[str]:
+    """
+    Render one report figure per assessment.
+
+    Args:
+        data: Precomputed plot data
+        output_dir: Directory for one image file per assessment
+        pdf_path: Path of a multi-page PDF with one page per assessment; rendered in
+            this process, since a PDF document cannot be shared between workers
+        image_format: Image format for output_dir files (e.g. "png", "svg")
+        workers: Worker processes for image files (defaults to the CPU count; 1
+            renders in this process)
+        chunk_size: Assessments rendered per worker task with one figure template
+        figsize: Figure size in inches
+        dpi: Resolution of raster output
+
+    Returns:
+        Paths of the written files
+    """
+    if output_dir is None and pdf_path is None:
+        raise ValueError("Either output_dir or pdf_path is required")
+
+    written = []
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+        paths = [
+            os.path.join(output_dir, f"{i:05d}_{_safe_filename(label)}.{image_format}")
+            for i, label in enumerate(data.labels)
+        ]
+        chunks = [range(start, min(start + chunk_size, len(data))) for start in range(0, len(data), chunk_size)]
+        workers = workers or os.cpu_count() or 1
+        if workers > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+                futures = [
+                    pool.submit(_render_chunk, data.subset(chunk), [paths[i] for i in chunk], figsize, dpi)
+                    for chunk in chunks
+                ]
+                for future in futures:
+                    written.extend(future.result())
+        else:
+            for chunk in chunks:
+                written.extend(_render_chunk(data.subset(chunk), [paths[i] for i in chunk], figsize, dpi))
+        logger.info(f"Rendered {len(written)} assessments to {output_dir}")
+
+    if pdf_path is not None:
+        from matplotlib.backends.backend_pdf import PdfPages
+
+        figure = ReportFigure(data.feature_names, data.feature_levels, data.level_names, figsize, dpi)
+        with PdfPages(pdf_path) as pdf:
+            for index in range(len(data)):
+                figure.draw(data, index)
+                figure.save(pdf)
+        written.append(pdf_path)
+        logger.info(f"Rendered {len(data)} assessments to {pdf_path}")
+
+    return written
+
+
+def render_summary_grid(data: ReportPlotData, filepath: str, max_labels: int = 60, dpi: int = 100):
+    """
+    Render heatmaps of level and feature scores across all assessments.
+
+    Args:
+        data: Precomputed plot data
+        filepath: Path of the output image or PDF
+        max_labels: Label the assessment axis only up to this many assessments
+        dpi: Resolution of raster output
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    n = len(data)
+    height = min(4 + 0.2 * n, 40)
+    figure = Figure(figsize=(6 + 0.4 * len(data.feature_names), height), dpi=dpi)
+    FigureCanvasAgg(figure)
+    level_ax, feature_ax = figure.subplots(
+        1, 2, gridspec_kw={"width_ratios": [len(data.level_names), max(len(data.feature_names), 1)]}
+    )
+
+    for ax, values, names, title in (
+        (level_ax, data.level_scores, data.level_names, "Level Scores"),
+        (feature_ax, data.feature_scores, data.feature_names, "Feature Scores"),
+    ):
+        image = ax.imshow(values, aspect="auto", vmin=0, vmax=1, cmap="viridis", interpolation="nearest")
+        ax.set_xticks(np.arange(len(names)), names, rotation=90)
+        ax.set_title(title)
+        if n <= max_labels:
+            ax.set_yticks(np.arange(n), data.labels)
+        else:
+            ax.set_yticks([])
+    feature_ax.set_yticks([])
+    figure.colorbar(image, ax=[level_ax, feature_ax], fraction=0.02)
+    figure.savefig(filepath, bbox_inches="tight")
+    logger.info(f"Saved summary grid of {n} assessments to {filepath}")
+
+
+def render_assessments(
+    framework: AgencyFramework,
+    assessments: Sequence,
+    labels: Optional[List[str]] = None,
+    summary_path: Optional[str] = None,
+    **kwargs
+) -> List[str]:
+    """
+    Score and render a sequence of assessments.
+
+    Args:
+        framework: The agency framework shared by the assessments
+        assessments: Assessments to render (AgencyAssessment or CompactAgencyAssessment)
+        labels: Optional label per assessment, used as figure title and file name
+        summary_path: Optional path of a summary grid across all assessments
+        **kwargs: Passed to render_reports
+
+    Returns:
+        Paths of the written files
+    """
+    scorer = BatchScorer(framework)
+    batch = scorer.batch_from_assessments(assessments, labels)
+    data = ReportPlotData.from_scores(scorer, batch, scorer.score(batch))
+    written = render_reports(data, **kwargs)
+    if summary_path is not None:
+        render_summary_grid(data, summary_path)
+        written.append(summary_path)
+    return written
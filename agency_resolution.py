@@ -0,0 +1,269 @@
+"""
+agency_resolution.py
+
+Marker-name resolution for ingesting external harness output. Markers are identified
+by exact string equality, so wording drift ("Maintains a world model independent of
+immediate perception") would otherwise drop rows. A MarkerIndex resolves incoming
+names to the framework's interned marker IDs in three steps:
+
+    1. exact hashed lookup of the name
+    2. hashed lookup of the normalized name (case, punctuation and spacing removed)
+    3. approximate match through a character n-gram inverted index, accepted when the
+       Dice similarity of the n-gram sets reaches a threshold
+
+Only the markers sharing n-grams with a name are scored, and every distinct incoming
+name is resolved once and cached, so millions of rows with repeated names resolve
+in a single dictionary lookup each. Resolution can be restricted to the markers of
+one feature, so a drifted name is matched within the feature it was reported for.
+
+License: PolyForm Noncommercial License 1.0
+"""
+import numpy as np
+from typing import Iterable, List, Optional, Sequence, Tuple
+import logging
+import re
+
+from robust_agency_assessment import AgencyFeature, AgencyFramework
+
+logger = logging.getLogger(__name__)
+
+_NON_ALPHANUMERIC = re.compile(r"[\W_]+")
+
+
+def normalize_marker(name: str) -> str:
+    """Normalize a marker name for comparison: case-folded words separated by single spaces."""
+    return _NON_ALPHANUMERIC.sub(" ", name.casefold()).strip()
+
+
+class MarkerIndex:
+    """Resolves marker names to a framework's canonical marker IDs."""
+
+    def __init__(
+        self,
+        framework: AgencyFramework,
+        threshold: float = 0.7,
+        n: int = 3,
+        max_cache: int = 1_000_000
+    ):
+        """
+        Build a marker index.
+
+        Args:
+            framework: The agency framework whose markers are canonical
+            threshold: Minimum n-gram Dice similarity (0-1) for an approximate match
+            n: Character n-gram length
+            max_cache: Maximum number of distinct resolved names remembered
+        """
+        self.framework = framework
+        self.threshold = threshold
+        self.n = n
+        self.max_cache = max_cache
+        self.compiled = None
+        self._build()
+
+    def _grams(self, normalized: str) -> set:
+        padded = f" {normalized} "
+        return {padded[i:i + self.n] for i in range(max(len(padded) - self.n + 1, 1))}
+
+    def _build(self):
+        """Index the framework's current markers."""
+        compiled = self.framework.compile()
+        self.compiled = compiled
+        self.markers = compiled.markers
+        self._exact = dict(compiled.marker_ids)
+        self._normalized = {}
+        gram_ids = {}
+        postings = []
+        sizes = np.zeros(len(self.markers))
+        for marker_id, marker in enumerate(self.markers):
+            normalized = normalize_marker(marker)
+            self._normalized.setdefault(normalized, []).append(marker_id)
+            grams = self._grams(normalized)
+            sizes[marker_id] = len(grams)
+            for gram in grams:
+                gram_id = gram_ids.setdefault(gram, len(gram_ids))
+                if gram_id == len(postings):
+                    postings.append([])
+                postings[gram_id].append(marker_id)
+        self._gram_ids = gram_ids
+        self._postings = [np.array(p, dtype=np.int64) for p in postings]
+        self._sizes = sizes
+        self._feature_ids = {}
+        # Distinct resolved names map to slots in parallel lists of IDs and similarities,
+        # with one name table per scope (None for the whole framework, else a feature position)
+        self._caches = {}
+        self._slot_ids = []
+        self._slot_similarity = []
+
+    def _sync(self):
+        """Rebuild the index if the framework's feature set changed."""
+        if self.framework.compile() is not self.compiled:
+            self._build()
+
+    def match(self, name: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """
+        Find the markers most similar to a name.
+
+        Args:
+            name: Marker name to look up
+            limit: Maximum number of candidates
+
+        Returns:
+            (marker, similarity) pairs, most similar first
+        """
+        self._sync()
+        candidates, similarity = self._score(self._grams(normalize_marker(name)))
+        top = np.argsort(-similarity, kind="stable")[:limit]
+        return [(self.markers[candidates[i]], float(similarity[i])) for i in top]
+
+    def _score(self, grams: set, allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Dice similarity of a gram set against the markers sharing at least one gram."""
+        lists = [self._postings[self._gram_ids[g]] for g in grams if g in self._gram_ids]
+        if not lists:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        shared = np.bincount(np.concatenate(lists))
+        if allowed is not None:
+            candidates = allowed[allowed < len(shared)]
+            candidates = candidates[shared[candidates] > 0]
+        else:
+            candidates = np.flatnonzero(shared)
+        return candidates, 2 * shared[candidates] / (len(grams) + self._sizes[candidates])
+
+    def _scope(self, feature: Optional[AgencyFeature]) -> Tuple[Optional[int], Optional[np.ndarray]]:
+        """Get the cache scope and allowed marker IDs for resolving within a feature."""
+        if feature is None:
+            return None, None
+        position = self.compiled.get_feature_position(feature)
+        allowed = self._feature_ids.get(position) if position is not None else None
+        if allowed is None:
+            allowed = np.unique(np.array(
+                [self._exact[m] for m in feature.markers if m in self._exact], dtype=np.int64
+            ))
+            if position is not None:
+                self._feature_ids[position] = allowed
+        # Features outside the compiled view have no stable key, so they are not cached
+        return (position if position is not None else -1), allowed
+
+    def _resolve_uncached(self, name: str, allowed: Optional[np.ndarray] = None) -> Tuple[int, float]:
+        marker_id = self._exact.get(name)
+        if marker_id is not None and (allowed is None or marker_id in allowed):
+            return marker_id, 1.0
+        normalized = normalize_marker(name)
+        for marker_id in self._normalized.get(normalized, ()):
+            if allowed is None or marker_id in allowed:
+                return marker_id, 1.0
+
+        candidates, similarity = self._score(self._grams(normalized), allowed)
+        if not len(candidates):
+            return -1, 0.0
+        best = int(np.argmax(similarity))
+        if similarity[best] < self.threshold:
+            return -1, float(similarity[best])
+        return int(candidates[best]), float(similarity[best])
+
+    def resolve(self, name: str, feature: Optional[AgencyFeature] = None) -> Tuple[int, float]:
+        """
+        Resolve a marker name.
+
+        Args:
+            name: Marker name to resolve
+            feature: Optional feature whose markers are the only candidates
+
+        Returns:
+            Tuple of (marker ID or -1 if unresolved, similarity of the best match)
+        """
+        self._sync()
+        scope, allowed = self._scope(feature)
+        if scope == -1:
+            return self._resolve_uncached(name, allowed)
+        cache = self._caches.get(scope)
+        slot = cache.get(name) if cache is not None else None
+        if slot is None:
+            slot = self._remember(scope, name, *self._resolve_uncached(name, allowed))
+        return self._slot_ids[slot], self._slot_similarity[slot]
+
+    def _cached_count(self) -> int:
+        return len(self._slot_ids)
+
+    def _evict(self):
+        """Drop every cached resolution."""
+        self._caches.clear()
+        self._slot_ids.clear()
+        self._slot_similarity.clear()
+
+    def _remember(self, scope: Optional[int], name: str, marker_id: int, similarity: float) -> int:
+        """Cache the resolution of a name and return its slot."""
+        if self._cached_count() >= self.max_cache:
+            self._evict()
+        slot = len(self._slot_ids)
+        self._slot_ids.append(marker_id)
+        self._slot_similarity.append(similarity)
+        self._caches.setdefault(scope, {})[name] = slot
+        return slot
+
+    def resolve_many(
+        self,
+        names: Iterable[str],
+        feature: Optional[AgencyFeature] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Resolve many marker names.
+
+        Args:
+            names: Marker names to resolve
+            feature: Optional feature whose markers are the only candidates
+
+        Returns:
+            Tuple of (array of marker IDs with -1 for unresolved names, array of similarities)
+        """
+        self._sync()
+        names = names if isinstance(names, list) else list(names)
+        scope, allowed = self._scope(feature)
+        if scope == -1:
+            return self._resolve_uncached_many(names, allowed)
+
+        cache = self._caches.get(scope, {})
+        get = cache.get
+        slots = [get(name) for name in names]
+        missing = {names[row]: None for row, slot in enumerate(slots) if slot is None}
+        if missing and self._cached_count() + len(missing) > self.max_cache:
+            if len(missing) > self.max_cache:
+                # More distinct names than the cache holds: resolve this call without it
+                return self._resolve_uncached_many(names, allowed)
+            # Start over so every slot this call refers to stays valid
+            self._evict()
+            slots = [None] * len(names)
+            missing = dict.fromkeys(names)
+        for name in missing:
+            missing[name] = self._remember(scope, name, *self._resolve_uncached(name, allowed))
+        if missing:
+            slots = [missing[name] if slot is None else slot for name, slot in zip(names, slots)]
+        slots = np.fromiter(slots, dtype=np.int64, count=len(slots))
+        return (
+            np.array(self._slot_ids, dtype=np.int64)[slots],
+            np.array(self._slot_similarity, dtype=np.float64)[slots]
+        )
+
+    def _resolve_uncached_many(
+        self,
+        names: List[str],
+        allowed: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        resolved = {}
+        for name in names:
+            if name not in resolved:
+                resolved[name] = self._resolve_uncached(name, allowed)
+        ids = np.fromiter((resolved[name][0] for name in names), dtype=np.int64, count=len(names))
+        similarity = np.fromiter((resolved[name][1] for name in names), dtype=np.float64, count=len(names))
+        return ids, similarity
+
+    def canonical(self, name: str, feature: Optional[AgencyFeature] = None) -> Optional[str]:
+        """Get the canonical marker for a name, or None if it does not resolve."""
+        marker_id, _ = self.resolve(name, feature)
+        return self.markers[marker_id] if marker_id >= 0 else None
+
+    def canonicalize(self, names: Sequence[str], feature: Optional[AgencyFeature] = None) -> List[str]:
+        """Replace every resolvable name with its canonical marker; others are kept as given."""
+        ids, _ = self.resolve_many(names, feature)
+        markers = self.markers
+        return [markers[i] if i >= 0 else name for name, i in zip(names, ids.tolist())]
@@ -0,0 +1,420 @@
+"""
+agency_sensitivity.py
+
+Weight-sensitivity analysis for agency level scores. Level scores are weighted means
+of feature scores, and the feature weights in the default framework are hand-picked.
+This module samples thousands of alternative weight vectors, either perturbed around
+the framework weights or drawn from a Dirichlet distribution, and rescores every
+assessment under every weight vector with a single matrix product. Feature scores do
+not depend on the weights, so they are computed once.
+
+For each assessment and level it reports the range of level scores across weight
+samples. For each level it reports how the ranking of assessments changes: rank
+ranges, rank correlation with the baseline ranking, and the probability that each
+pair of assessments swaps order. Per-feature influence indices (squared standardized
+regression coefficients of the level score on the weights) show which weights
+drive the variation.
+
+License: PolyForm Noncommercial License 1.0
+"""
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+import logging
+
+from robust_agency_assessment import AgencyLevel, AgencyFramework
+from agency_batch import AssessmentBatch, BatchScorer
+from agency_uncertainty import _sample_quantiles
+
+logger = logging.getLogger(__name__)
+
+WEIGHT_METHODS = ("dirichlet", "perturb")
+
+
+class SensitivityResult:
+    """Level score variation across weight samples for a batch of assessments."""
+
+    def __init__(
+        self,
+        weights: np.ndarray,
+        baseline: np.ndarray,
+        score_min: np.ndarray,
+        score_max: np.ndarray,
+        score_mean: np.ndarray,
+        score_std: np.ndarray,
+        quantiles: Tuple[float, ...],
+        score_quantiles: np.ndarray,
+        influence: np.ndarray,
+        rank_baseline: np.ndarray,
+        rank_min: np.ndarray,
+        rank_max: np.ndarray,
+        rank_correlation: np.ndarray,
+        pairwise_indices: Optional[np.ndarray],
+        flip_probability: Optional[np.ndarray],
+        feature_names: List[str],
+        levels: List[AgencyLevel],
+        labels: List[str]
+    ):
+        """
+        Initialize sensitivity results.
+
+        Args:
+            weights: Array of shape (K, F) with the sampled feature weights
+            baseline: Array of shape (N, L) with level scores under the framework weights
+            score_min: Array of shape (N, L) with the lowest level score across samples
+            score_max: Array of shape (N, L) with the highest level score across samples
+            score_mean: Array of shape (N, L) with the mean level score across samples
+            score_std: Array of shape (N, L) with the level score standard deviation
+            quantiles: Quantile probabilities, e.g. (0.05, 0.95)
+            score_quantiles: Array of shape (Q, N, L) with level score quantiles
+            influence: Array of shape (N, L, F) with the squared standardized regression
+                coefficient of each level score on each feature weight
+            rank_baseline: Array of shape (N, L) with ranks under the framework weights
+                (1 = highest score)
+            rank_min: Array of shape (N, L) with the best rank across samples
+            rank_max: Array of shape (N, L) with the worst rank across samples
+            rank_correlation: Array of shape (K, L) with the Spearman correlation between
+                each sample's ranking and the baseline ranking
+            pairwise_indices: Assessment indices covered by flip_probability, or None
+            flip_probability: Array of shape (L, P, P) with the fraction of samples in which
+                each pair of assessments is ordered opposite to the baseline, or None
+            feature_names: Feature names indexing the feature axis
+            levels: Agency levels indexing the level axis
+            labels: Label of each assessment in the batch
+        """
+        self.weights = weights
+        self.baseline = baseline
+        self.score_min = score_min
+        self.score_max = score_max
+        self.score_mean = score_mean
+        self.score_std = score_std
+        self.quantiles = quantiles
+        self.score_quantiles = score_quantiles
+        self.influence = influence
+        self.rank_baseline = rank_baseline
+        self.rank_min = rank_min
+        self.rank_max = rank_max
+        self.rank_correlation = rank_correlation
+        self.pairwise_indices = pairwise_indices
+        self.flip_probability = flip_probability
+        self.feature_names = feature_names
+        self.levels = levels
+        self.labels = labels
+
+    def get_level_summary(self, index: int) -> Dict[AgencyLevel, Dict[str, float]]:
+        """Get the score range and rank range of every level for one assessment."""
+        summary = {}
+        for j, level in enumerate(self.levels):
+            entry = {
+                "baseline": float(self.baseline[index, j]),
+                "min": float(self.score_min[index, j]),
+                "max": float(self.score_max[index, j]),
+                "mean": float(self.score_mean[index, j]),
+                "std": float(self.score_std[index, j]),
+                "rank": int(self.rank_baseline[index, j]),
+                "rank_min": int(self.rank_min[index, j]),
+                "rank_max": int(self.rank_max[index, j])
+            }
+            for q, probability in enumerate(self.quantiles):
+                entry[f"q{probability:g}"] = float(self.score_quantiles[q, index, j])
+            summary[level] = entry
+        return summary
+
+    def get_feature_influence(self, level: AgencyLevel) -> Dict[str, float]:
+        """Get the influence index of each feature weight on a level, averaged over assessments."""
+        j = self.levels.index(level)
+        mean_influence = self.influence[:, j, :].mean(axis=0) if len(self.baseline) else np.zeros(len(self.feature_names))
+        return {
+            name: float(value)
+            for name, value in zip(self.feature_names, mean_influence)
+            if value > 0
+        }
+
+    def get_unstable_pairs(self, level: AgencyLevel, threshold: float = 0.05) -> List[Tuple[str, str, float]]:
+        """
+        Get pairs of assessments whose order on a level flips in more than a fraction of samples.
+
+        Returns:
+            (higher-ranked label, lower-ranked label, flip probability) tuples, most
+            unstable first
+        """
+        if self.flip_probability is None:
+            raise ValueError("Pairwise rank flips were not computed for this batch")
+        j = self.levels.index(level)
+        flips = np.triu(self.flip_probability[j], k=1)
+        rows, cols = np.nonzero(flips > threshold)
+        order = np.argsort(-flips[rows, cols], kind="stable")
+        pairs = []
+        for row, col in zip(rows[order], cols[order]):
+            a, b = self.pairwise_indices[row], self.pairwise_indices[col]
+            if self.rank_baseline[a, j] > self.rank_baseline[b, j]:
+                a, b = b, a
+            pairs.append((self.labels[a], self.labels[b], float(flips[row, col])))
+        return pairs
+
+
+class WeightSensitivityAnalyzer:
+    """Rescores assessments under sampled feature weights with batched matrix products."""
+
+    def __init__(
+        self,
+        framework: AgencyFramework,
+        n_samples: int = 2000,
+        method: str = "dirichlet",
+        concentration: Optional[float] = None,
+        spread: float = 0.2,
+        quantiles: Sequence[float] = (0.05, 0.95),
+        max_pairwise: int = 256,
+        seed: Optional[int] = None,
+        chunk_elements: int = 8_000_000
+    ):
+        """
+        Initialize a weight-sensitivity analyzer.
+
+        Args:
+            framework: The agency framework whose feature weights are varied
+            n_samples: Number of weight vectors sampled
+            method: "dirichlet" to draw the relative weights within each level from a
+                Dirichlet distribution, or "perturb" to scale each framework weight by
+                an independent uniform factor in [1 - spread, 1 + spread]
+            concentration: Dirichlet concentration. None draws uniformly over all
+                relative weightings; a value centers the draws on the framework weights,
+                with larger values staying closer to them
+            spread: Relative perturbation of each weight for the "perturb" method
+            quantiles: Quantile probabilities reported for every level score
+            max_pairwise: Largest batch for which pairwise flip probabilities are
+                computed over all assessments by default
+            seed: Optional seed for reproducible sampling
+            chunk_elements: Approximate number of level scores held in memory at once
+        """
+        if method not in WEIGHT_METHODS:
+            raise ValueError(f"Unknown weight sampling method '{method}', expected one of {WEIGHT_METHODS}")
+        self.scorer = scorer = BatchScorer(framework)
+        self.n_samples = n_samples
+        self.method = method
+        self.concentration = concentration
+        self.spread = spread
+        self.quantiles = tuple(quantiles)
+        self.max_pairwise = max_pairwise
+        self.seed = seed
+        self.chunk_elements = chunk_elements
+
+        # Feature -> level membership and the framework weight of every feature
+        n_features = len(scorer.feature_names)
+        self.membership = np.zeros((n_features + 1, len(scorer.levels)))
+        self.base_weights = np.zeros(n_features + 1)
+        for j, (row, weights) in enumerate(zip(scorer.level_features, scorer.level_feature_weights)):
+            self.membership[row, j] = 1.0
+            self.base_weights[row] = weights
+        self.membership = self.membership[:n_features]
+        self.base_weights = self.base_weights[:n_features]
+
+    def sample_weights(self) -> np.ndarray:
+        """
+        Draw weight vectors.
+
+        Dirichlet draws are rescaled so the weights of each level sum to the level's
+        framework total; level scores only depend on relative weights within a level.
+
+        Returns:
+            Array of shape (K, F) with one weight vector per row
+        """
+        rng = np.random.default_rng(self.seed)
+        shape = (self.n_samples, len(self.base_weights))
+        if self.method == "perturb":
+            factors = rng.uniform(1 - self.spread, 1 + self.spread, size=shape)
+            return np.maximum(self.base_weights * factors, 0.0)
+
+        level_totals = self.base_weights @ self.membership
+        if self.concentration is None:
+            alpha = np.ones(shape[1])
+        else:
+            shares = self.base_weights / np.maximum(self.membership @ level_totals, 1e-12)
+            alpha = np.maximum(self.concentration * shares, 1e-6)
+        # Independent Gamma draws normalized within each level are Dirichlet per level
+        draws = rng.standard_gamma(alpha, size=shape)
+        draw_totals = draws @ self.membership
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scale = np.where(draw_totals > 0, level_totals / draw_totals, 0.0)
+        return draws * (scale @ self.membership.T)
+
+    def level_scores(self, feature_scores: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """
+        Calculate level scores under many weight vectors at once.
+
+        Args:
+            feature_scores: Array of shape (N, F) with feature scores
+            weights: Array of shape (K, F) with weight vectors
+
+        Returns:
+            Array of shape (N, K, L) with level scores
+        """
+        n_levels = self.membership.shape[1]
+        # (F, K * L) matrix of per-level masked weights, so all samples and levels are one matmul
+        masked = (weights.T[:, :, None] * self.membership[:, None, :]).reshape(weights.shape[1], -1)
+        totals = weights @ self.membership
+        numerator = (feature_scores @ masked).reshape(feature_scores.shape[0], weights.shape[0], n_levels)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = numerator / totals
+        return np.where(totals == 0, 0.0, scores)
+
+    def _regression_operators(self, weights: np.ndarray) -> List[np.ndarray]:
+        """Per level, the pseudo-inverse of the centered weights of that level's features."""
+        centered = weights - weights.mean(axis=0)
+        # Weights held fixed keep rounding-level spread, which the pseudo-inverse would amplify
+        varied = centered.std(axis=0) > 1e-9 * max(float(np.abs(weights).max(initial=0.0)), 1.0)
+        operators = []
+        for j in range(self.membership.shape[1]):
+            members = (self.membership[:, j] > 0) & varied
+            operator = np.zeros((weights.shape[1], weights.shape[0]))
+            if members.any():
+                operator[members] = np.linalg.pinv(centered[:, members])
+            operators.append(operator)
+        return operators
+
+    def analyze(
+        self,
+        batch: AssessmentBatch,
+        weights: Optional[np.ndarray] = None,
+        pairwise: Optional[Sequence[int]] = None
+    ) -> SensitivityResult:
+        """
+        Analyze the weight sensitivity of every assessment in a batch.
+
+        Args:
+            batch: Batch built over the framework's markers (see BatchScorer)
+            weights: Optional (K, F) weight vectors to evaluate instead of sampling,
+                e.g. an explicit grid
+            pairwise: Assessment indices for pairwise flip probabilities; defaults to
+                all assessments when the batch has at most max_pairwise of them
+
+        Returns:
+            SensitivityResult with score ranges, rank statistics and influence indices
+        """
+        scorer = self.scorer
+        if weights is None:
+            weights = self.sample_weights()
+        weights = np.asarray(weights, dtype=np.float64)
+        feature_scores = scorer.feature_scores(scorer.marker_scores(batch))
+        baseline = scorer.level_scores(feature_scores)
+        n, n_samples = feature_scores.shape[0], weights.shape[0]
+        n_levels = len(scorer.levels)
+        n_features = len(scorer.feature_names)
+
+        # Score statistics need every sample of an assessment: chunk over assessments
+        score_min = np.zeros((n, n_levels))
+        score_max = np.zeros((n, n_levels))
+        score_mean = np.zeros((n, n_levels))
+        score_std = np.zeros((n, n_levels))
+        score_quantiles = np.zeros((len(self.quantiles), n, n_levels))
+        influence = np.zeros((n, n_levels, n_features))
+        weight_std = weights.std(axis=0)
+        operators = self._regression_operators(weights)
+        chunk = max(1, self.chunk_elements // max(n_samples * n_levels, 1))
+        for start in range(0, n, chunk):
+            stop = min(start + chunk, n)
+            scores = self.level_scores(feature_scores[start:stop], weights)
+            score_min[start:stop] = scores.min(axis=1)
+            score_max[start:stop] = scores.max(axis=1)
+            score_mean[start:stop] = scores.mean(axis=1)
+            score_std[start:stop] = scores.std(axis=1)
+            score_quantiles[:, start:stop] = _sample_quantiles(scores.transpose(1, 0, 2), self.quantiles)
+            for j, operator in enumerate(operators):
+                coefficients = scores[:, :, j] @ operator.T
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    standardized = coefficients * weight_std / score_std[start:stop, j, None]
+                influence[start:stop, j] = np.where(score_std[start:stop, j, None] > 1e-12, standardized, 0.0) ** 2
+
+        # Rank statistics need every assessment of a sample: chunk over samples
+        if pairwise is None and n <= self.max_pairwise:
+            pairwise = range(n)
+        pairwise_indices = np.asarray(pairwise, dtype=np.int64) if pairwise is not None else None
+        rank_baseline = _ranks(baseline, axis=0)
+        rank_min = np.full((n, n_levels), n, dtype=np.int64)
+        rank_max = np.ones((n, n_levels), dtype=np.int64)
+        rank_correlation = np.ones((n_samples, n_levels))
+        flip_counts = None
+        if pairwise_indices is not None:
+            # Each unordered pair once; a flip is a sample difference opposite in sign to the baseline's
+            first, second = np.triu_indices(len(pairwise_indices), k=1)
+            base_pairs = baseline[pairwise_indices]
+            base_order = np.sign(base_pairs[first] - base_pairs[second])[:, None, :]
+            flip_counts = np.zeros((len(first), n_levels))
+
+        chunk = max(1, self.chunk_elements // max(n * n_levels, 1))
+        for start in range(0, n_samples, chunk):
+            stop = min(start + chunk, n_samples)
+            scores = self.level_scores(feature_scores, weights[start:stop])
+            ranks = _ranks(scores, axis=0)
+            np.minimum(rank_min, ranks.min(axis=1), out=rank_min)
+            np.maximum(rank_max, ranks.max(axis=1), out=rank_max)
+            if n > 1:
+                rank_correlation[start:stop] = _spearman(ranks, rank_baseline)
+            if flip_counts is not None:
+                sample_pairs = scores[pairwise_indices]
+                step = max(1, self.chunk_elements // max(len(first) * n_levels, 1))
+                for k in range(0, stop - start, step):
+                    block = sample_pairs[:, k:k + step]
+                    difference = block[first] - block[second]
+                    difference *= base_order
+                    flip_counts += (difference < 0).sum(axis=1)
+
+        flip_probability = None
+        if flip_counts is not None:
+            flip_probability = np.zeros((n_levels, len(pairwise_indices), len(pairwise_indices)))
+            flip_probability[:, first, second] = flip_counts.T / max(n_samples, 1)
+            flip_probability[:, second, first] = flip_probability[:, first, second]
+        return SensitivityResult(
+            weights=weights,
+            baseline=baseline,
+            score_min=score_min,
+            score_max=score_max,
+            score_mean=score_mean,
+            score_std=score_std,
+            quantiles=self.quantiles,
+            score_quantiles=score_quantiles,
+            influence=influence,
+            rank_baseline=rank_baseline,
+            rank_min=rank_min,
+            rank_max=rank_max,
+            rank_correlation=rank_correlation,
+            pairwise_indices=pairwise_indices,
+            flip_probability=flip_probability,
+            feature_names=scorer.feature_names,
+            levels=scorer.levels,
+            labels=batch.labels
+        )
+
+    def analyze_assessments(
+        self,
+        assessments: Sequence,
+        labels: Optional[List[str]] = None,
+        **kwargs
+    ) -> SensitivityResult:
+        """Analyze the weight sensitivity of a sequence of assessments."""
+        return self.analyze(self.scorer.batch_from_assessments(assessments, labels), **kwargs)
+
+
+def _ranks(scores: np.ndarray, axis: int) -> np.ndarray:
+    """Ranks along an axis, 1 for the highest score; ties keep index order."""
+    order = np.argsort(-scores, axis=axis, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, scores.shape[axis] + 1).reshape(
+        (-1,) + (1,) * (scores.ndim - axis - 1)), axis=axis)
+    return ranks
+
+
+def _spearman(ranks: np.ndarray, base_ranks: np.ndarray) -> np.ndarray:
+    """Spearman correlation of (N, K, L) sample ranks with (N, L) baseline ranks, shape (K, L)."""
+    n = ranks.shape[0]
+    squared = ((ranks - base_ranks[:, None, :]) ** 2).sum(axis=0)
+    return 1 - 6 * squared / (n * (n * n - 1))
+
+
+def analyze_weight_sensitivity(
+    framework: AgencyFramework,
+    assessments: Sequence,
+    labels: Optional[List[str]] = None,
+    **kwargs
+) -> SensitivityResult:
+    """Analyze the weight sensitivity of a sequence of assessments against a framework."""
+    return WeightSensitivityAnalyzer(framework, **kwargs).analyze_assessments(assessments, labels)
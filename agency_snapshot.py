@@ -0,0 +1,245 @@
+"""
+agency_snapshot.py
+
+Binary, versioned snapshots of an AgencyFramework. A snapshot stores every distinct
+string (feature names, descriptions, marker texts) once in a string table, and levels,
+weights and marker offsets in fixed-width arrays. Snapshots are memory-mapped
+read-only, so worker processes share the pages and read features without parsing.
+
+Layout (little-endian, sections aligned to 8 bytes):
+    header          magic, format version, feature/marker/string counts, string data bytes
+    string offsets  uint64[n_strings + 1] (byte offsets into the string data)
+    weights         float64[n_features]
+    feature names   uint32[n_features]    (string table indices)
+    descriptions    uint32[n_features]    (string table indices)
+    levels          uint32[n_features]    (AgencyLevel values)
+    marker offsets  uint32[n_features + 1]
+    markers         uint32[n_markers]     (string table indices)
+    string data     utf-8 bytes
+
+License: PolyForm Noncommercial License 1.0
+"""
+from typing import Dict, List
+import logging
+import mmap
+import os
+import struct
+
+from robust_agency_assessment import AgencyLevel, AgencyFeature, AgencyFramework
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"AGFSNAP\0"
+FORMAT_VERSION = 2
+_HEADER = struct.Struct("<8sIIIIQ")
+
+
+def _align(offset: int) -> int:
+    """Round an offset up to the next multiple of 8."""
+    return (offset + 7) & ~7
+
+
+def _section_layout(n_features: int, n_markers: int, n_strings: int) -> Dict[str, int]:
+    """Compute the byte offset of every section."""
+    layout = {}
+    offset = _align(_HEADER.size)
+    for name, size in (
+        ("string_offsets", 8 * (n_strings + 1)),
+        ("weights", 8 * n_features),
+        ("names", 4 * n_features),
+        ("descriptions", 4 * n_features),
+        ("levels", 4 * n_features),
+        ("marker_offsets", 4 * (n_features + 1)),
+        ("markers", 4 * n_markers),
+    ):
+        layout[name] = offset
+        offset = _align(offset + size)
+    layout["strings"] = offset
+    return layout
+
+
+def write_framework_snapshot(framework: AgencyFramework, filepath: str):
+    """
+    Write a framework's features to a binary snapshot.
+
+    Args:
+        framework: Framework to snapshot
+        filepath: Path of the snapshot file
+    """
+    string_ids = {}
+
+    def intern(text: str) -> int:
+        if text not in string_ids:
+            string_ids[text] = len(string_ids)
+        return string_ids[text]
+
+    features = framework.features
+    names = [intern(f.name) for f in features]
+    descriptions = [intern(f.description) for f in features]
+    markers = [intern(m) for f in features for m in f.markers]
+    marker_offsets = [0]
+    for f in features:
+        marker_offsets.append(marker_offsets[-1] + len(f.markers))
+
+    # Offsets count bytes, so readers decode only the strings they are asked for
+    encoded = [text.encode("utf-8") for text in string_ids]
+    string_offsets = [0]
+    for data in encoded:
+        string_offsets.append(string_offsets[-1] + len(data))
+    string_data = b"".join(encoded)
+
+    layout = _section_layout(len(features), len(markers), len(string_ids))
+    buffer = bytearray(layout["strings"] + len(string_data))
+    _HEADER.pack_into(
+        buffer, 0, MAGIC, FORMAT_VERSION, len(features), len(markers), len(string_ids), len(string_data)
+    )
+    for name, fmt, values in (
+        ("string_offsets", "Q", string_offsets),
+        ("weights", "d", [f.weight for f in features]),
+        ("names", "I", names),
+        ("descriptions", "I", descriptions),
+        ("levels", "I", [f.level.value for f in features]),
+        ("marker_offsets", "I", marker_offsets),
+        ("markers", "I", markers),
+    ):
+        struct.pack_into(f"<{len(values)}{fmt}", buffer, layout[name], *values)
+    buffer[layout["strings"]:] = string_data
+
+    with open(filepath, "wb") as f:
+        f.write(buffer)
+    logger.info(f"Saved snapshot of {len(features)} features to {filepath}")
+
+
+class FrameworkSnapshot:
+    """Read-only, memory-mapped view of a framework snapshot."""
+
+    def __init__(self, filepath: str):
+        """
+        Open a snapshot.
+
+        Args:
+            filepath: Path of the snapshot file
+        """
+        self.filepath = filepath
+        with open(filepath, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:
+                raise ValueError(f"{filepath} is too short to be an agency framework snapshot")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        magic, version, n_features, n_markers, n_strings, n_bytes = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{filepath} is not an agency framework snapshot")
+        if version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported snapshot version {version} in {filepath}")
+
+        self.version = version
+        self.n_features = n_features
+        self.n_markers = n_markers
+        layout = _section_layout(n_features, n_markers, n_strings)
+        expected_size = layout["strings"] + n_bytes
+        if size != expected_size:
+            self.close()
+            raise ValueError(
+                f"Snapshot {filepath} is {size} bytes but its header describes {expected_size}; "
+                f"the file is truncated or corrupt"
+            )
+        self._strings_start = layout["strings"]
+        self._strings_size = n_bytes
+
+        def section(name: str, fmt: str, count: int) -> memoryview:
+            width = struct.calcsize(fmt)
+            return self._view[layout[name]:layout[name] + width * count].cast(fmt)
+
+        self._string_offsets = section("string_offsets", "Q", n_strings + 1)
+        self.weights = section("weights", "d", n_features)
+        self._names = section("names", "I", n_features)
+        self._descriptions = section("descriptions", "I", n_features)
+        self.levels = section("levels", "I", n_features)
+        self.marker_offsets = section("marker_offsets", "I", n_features + 1)
+        self._markers = section("markers", "I", n_markers)
+
+    def get_string(self, index: int) -> str:
+        """Get one entry of the string table, decoding only its bytes."""
+        start = self._strings_start
+        return str(self._view[start + self._string_offsets[index]:start + self._string_offsets[index + 1]], "utf-8")
+
+    def get_feature_name(self, position: int) -> str:
+        """Get the name of the feature at a position."""
+        return self.get_string(self._names[position])
+
+    def get_feature_level(self, position: int) -> AgencyLevel:
+        """Get the agency level of the feature at a position."""
+        return AgencyLevel(self.levels[position])
+
+    def get_feature_markers(self, position: int) -> List[str]:
+        """Get the markers of the feature at a position."""
+        start, end = self.marker_offsets[position], self.marker_offsets[position + 1]
+        return [self.get_string(self._markers[i]) for i in range(start, end)]
+
+    def get_feature(self, position: int) -> AgencyFeature:
+        """Materialize the feature at a position."""
+        return AgencyFeature(
+            name=self.get_feature_name(position),
+            description=self.get_string(self._descriptions[position]),
+            level=self.get_feature_level(position),
+            markers=self.get_feature_markers(position),
+            weight=self.weights[position]
+        )
+
+    def get_strings(self) -> List[str]:
+        """Get the whole string table."""
+        data = self._view[self._strings_start:self._strings_start + self._strings_size]
+        offsets = self._string_offsets.tolist()
+        return [str(data[start:end], "utf-8") for start, end in zip(offsets, offsets[1:])]
+
+    def to_framework(self) -> AgencyFramework:
+        """Build an AgencyFramework holding the snapshot's features."""
+        strings = self.get_strings()
+        markers = [strings[i] for i in self._markers.tolist()]
+        offsets = self.marker_offsets.tolist()
+        levels = {level.value: level for level in AgencyLevel}
+
+        framework = AgencyFramework(load_defaults=False)
+        framework.features = [
+            AgencyFeature(
+                name=strings[name],
+                description=strings[description],
+                level=levels[level],
+                markers=markers[offsets[i]:offsets[i + 1]],
+                weight=weight
+            )
+            for i, (name, description, level, weight) in enumerate(zip(
+                self._names.tolist(), self._descriptions.tolist(),
+                self.levels.tolist(), self.weights.tolist()
+            ))
+        ]
+        return framework
+
+    def close(self):
+        """Release the memory mapping."""
+        for name in ("_string_offsets", "weights", "_names", "_descriptions",
+                     "levels", "marker_offsets", "_markers", "_view"):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self) -> 'FrameworkSnapshot':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def load_framework_snapshot(filepath: str) -> AgencyFramework:
+    """Load a framework from a snapshot without loading the default features."""
+    with FrameworkSnapshot(filepath) as snapshot:
+        framework = snapshot.to_framework()
+    logger.info(f"Loaded {len(framework.features)} features from snapshot {filepath}")
+    return framework
@@ -0,0 +1,497 @@
+"""
+agency_store.py
+
+Indexed result store for historical agency assessments. Assessments are written in
+batched transactions to a normalized SQLite schema (systems, versions, features,
+markers, and level, feature and marker scores), with indexes on level score, marker
+and version order, so questions like "which systems scored above 0.6 on REFLECTIVE
+in their last 30 versions" or "all evidence for marker X" are answered by index
+lookups instead of scanning saved reports. Query results come back as dictionaries
+of NumPy arrays, or as pandas DataFrames.
+
+License: PolyForm Noncommercial License 1.0
+"""
+import numpy as np
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+import logging
+import sqlite3
+import time
+
+from robust_agency_assessment import AgencyLevel, AgencyFramework, AgencyAssessment
+from agency_batch import BatchScorer
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS systems (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    latest_seq INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS versions (
+    id INTEGER PRIMARY KEY,
+    system_id INTEGER NOT NULL REFERENCES systems (id),
+    version TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    UNIQUE (system_id, version)
+);
+CREATE INDEX IF NOT EXISTS versions_order ON versions (system_id, seq);
+-- A feature is identified by name and level, so renaming its level starts a new row
+CREATE TABLE IF NOT EXISTS features (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    UNIQUE (name, level)
+);
+CREATE TABLE IF NOT EXISTS markers (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS level_scores (
+    version_id INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    score REAL NOT NULL,
+    PRIMARY KEY (version_id, level)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS level_scores_score ON level_scores (level, score);
+CREATE TABLE IF NOT EXISTS feature_scores (
+    version_id INTEGER NOT NULL,
+    feature_id INTEGER NOT NULL,
+    score REAL NOT NULL,
+    PRIMARY KEY (version_id, feature_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS feature_scores_feature ON feature_scores (feature_id, score);
+-- Clustered by marker, so per-marker history is one contiguous range scan
+CREATE TABLE IF NOT EXISTS marker_results (
+    marker_id INTEGER NOT NULL,
+    version_id INTEGER NOT NULL,
+    presence REAL NOT NULL,
+    confidence REAL NOT NULL,
+    score REAL NOT NULL,
+    evidence TEXT,
+    PRIMARY KEY (marker_id, version_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS marker_results_version ON marker_results (version_id);
+"""
+
+# Stores created before features were keyed by level have a UNIQUE name column
+_MIGRATE_FEATURES = """
+ALTER TABLE features RENAME TO features_by_name;
+CREATE TABLE features (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    UNIQUE (name, level)
+);
+INSERT INTO features (id, name, level) SELECT id, name, level FROM features_by_name;
+DROP TABLE features_by_name;
+"""
+
+QueryResult = Union[Dict[str, np.ndarray], Any]
+
+
+# NumPy dtype of each query column; anything else is returned as an object array
+COLUMN_DTYPES = {
+    "score": np.float64,
+    "presence": np.float64,
+    "confidence": np.float64
+}
+
+
+def _level_value(level: Union[AgencyLevel, str, int]) -> int:
+    """Get the stored value of an agency level given as enum member, name or value."""
+    if isinstance(level, AgencyLevel):
+        return level.value
+    if isinstance(level, str):
+        return AgencyLevel[level].value
+    return int(level)
+
+
+class AssessmentStore:
+    """Embedded SQLite store of assessment results."""
+
+    def __init__(self, filepath: str, batch_size: int = 1000):
+        """
+        Open or create a result store.
+
+        Args:
+            filepath: Path of the SQLite database file (":memory:" for a temporary store)
+            batch_size: Assessments written per transaction by add_assessments
+        """
+        self.filepath = filepath
+        self.batch_size = batch_size
+        self.connection = sqlite3.connect(filepath)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        row = self.connection.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'features'"
+        ).fetchone()
+        if row is not None and "UNIQUE (name, level)" not in row[0]:
+            self.connection.executescript(_MIGRATE_FEATURES)
+        self.connection.executescript(SCHEMA)
+        self._versions = None
+        self._markers = None
+        self._load_ids()
+
+    def _load_ids(self):
+        """Load the IDs of stored systems, features and markers."""
+        self._system_ids = dict(self.connection.execute("SELECT name, id FROM systems"))
+        self._feature_ids = {
+            (name, level): feature_id
+            for feature_id, name, level in self.connection.execute("SELECT id, name, level FROM features")
+        }
+        self._marker_ids = dict(self.connection.execute("SELECT text, id FROM markers"))
+        self._markers = None
+
+    def close(self):
+        """Close the database connection."""
+        self.connection.close()
+
+    def __enter__(self) -> 'AssessmentStore':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    # Writing
+
+    def _intern(self, table: str, column: str, cache: Dict[str, int], values: Iterable[str]):
+        """Ensure rows exist for the given names and cache their IDs."""
+        missing = [v for v in dict.fromkeys(values) if v not in cache]
+        if not missing:
+            return
+        self.connection.executemany(
+            f"INSERT OR IGNORE INTO {table} ({column}) VALUES (?)", [(v,) for v in missing]
+        )
+        placeholders = ",".join("?" * len(missing))
+        cache.update(self.connection.execute(
+            f"SELECT {column}, id FROM {table} WHERE {column} IN ({placeholders})", missing
+        ))
+
+    def _intern_features(self, keys: Iterable[Tuple[str, int]]):
+        """Ensure rows exist for the given (feature name, level value) pairs and cache their IDs."""
+        missing = [key for key in dict.fromkeys(keys) if key not in self._feature_ids]
+        if not missing:
+            return
+        self.connection.executemany("INSERT OR IGNORE INTO features (name, level) VALUES (?, ?)", missing)
+        for key in missing:
+            self._feature_ids[key] = self.connection.execute(
+                "SELECT id FROM features WHERE name = ? AND level = ?", key
+            ).fetchone()[0]
+
+    def _version_id(self, system_name: str, version: str, created_at: float) -> int:
+        """Get the ID of a (system, version), replacing any results stored for it."""
+        system_id = self._system_ids[system_name]
+        row = self.connection.execute(
+            "SELECT id FROM versions WHERE system_id = ? AND version = ?", (system_id, version)
+        ).fetchone()
+        if row is not None:
+            version_id = row[0]
+            for table in ("level_scores", "feature_scores", "marker_results"):
+                self.connection.execute(f"DELETE FROM {table} WHERE version_id = ?", (version_id,))
+            return version_id
+
+        self.connection.execute("UPDATE systems SET latest_seq = latest_seq + 1 WHERE id = ?", (system_id,))
+        seq = self.connection.execute("SELECT latest_seq FROM systems WHERE id = ?", (system_id,)).fetchone()[0]
+        return self.connection.execute(
+            "INSERT INTO versions (system_id, version, seq, created_at) VALUES (?, ?, ?, ?)",
+            (system_id, version, seq, created_at)
+        ).lastrowid
+
+    def _write_batch(self, framework: AgencyFramework, batch: List[Tuple[str, str, Any]]):
+        """Write one batch of assessments in a single transaction."""
+        # A (system, version) stored twice in one batch keeps its last assessment
+        batch = list({(name, version): (name, version, a) for name, version, a in batch}.values())
+        scorer = BatchScorer(framework)
+        scores = scorer.score(scorer.batch_from_assessments([a for _, _, a in batch]))
+        compiled = scorer.compiled
+        created_at = time.time()
+        self._versions = None
+
+        try:
+            with self.connection:
+                self._intern("systems", "name", self._system_ids, (name for name, _, _ in batch))
+                feature_keys = [(f.name, f.level.value) for f in compiled.features]
+                self._intern_features(feature_keys)
+                self._intern("markers", "text", self._marker_ids,
+                             (m for _, _, a in batch for m in a.results))
+
+                feature_ids = [self._feature_ids[key] for key in feature_keys]
+                level_values = [level.value for level in scorer.levels]
+                level_rows, feature_rows, marker_rows = [], [], []
+                for i, (name, version, assessment) in enumerate(batch):
+                    version_id = self._version_id(name, version, created_at)
+                    level_rows.extend(zip([version_id] * len(level_values), level_values,
+                                          scores.level_scores[i].tolist()))
+                    feature_rows.extend(zip([version_id] * len(feature_ids), feature_ids,
+                                            scores.feature_scores[i].tolist()))
+                    confidence = assessment.confidence
+                    evidence = assessment.evidence
+                    for marker, presence in assessment.results.items():
+                        marker_confidence = confidence.get(marker, 1.0)
+                        marker_rows.append((
+                            self._marker_ids[marker], version_id, presence, marker_confidence,
+                            presence * marker_confidence, evidence.get(marker)
+                        ))
+
+                self.connection.executemany("INSERT INTO level_scores VALUES (?, ?, ?)", level_rows)
+                self.connection.executemany("INSERT INTO feature_scores VALUES (?, ?, ?)", feature_rows)
+                self.connection.executemany("INSERT INTO marker_results VALUES (?, ?, ?, ?, ?, ?)", marker_rows)
+        except sqlite3.Error:
+            # IDs interned during the failed transaction were rolled back with it
+            self._load_ids()
+            raise
+
+    def add_assessments(self, items: Iterable[Tuple[str, str, Any]]) -> int:
+        """
+        Store assessments in batched transactions.
+
+        Storing a (system, version) that is already present replaces its results.
+
+        Args:
+            items: (system_name, version, assessment) tuples; assessments must share
+                a framework within each batch
+
+        Returns:
+            Number of assessments stored
+        """
+        count = 0
+        batch = []
+        for item in items:
+            if batch and item[2].framework is not batch[0][2].framework:
+                self._write_batch(batch[0][2].framework, batch)
+                count += len(batch)
+                batch = []
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._write_batch(batch[0][2].framework, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            self._write_batch(batch[0][2].framework, batch)
+            count += len(batch)
+        logger.info(f"Stored {count} assessments in {self.filepath}")
+        return count
+
+    def add_assessment(self, system_name: str, version: str, assessment: Any):
+        """Store a single assessment."""
+        self.add_assessments([(system_name, version, assessment)])
+
+    # Queries
+
+    def _version_index(self, min_size: int = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Arrays of system name, version and seq indexed by version ID, cached between writes."""
+        if self._versions is None or len(self._versions[0]) < min_size:
+            rows = self.connection.execute(
+                "SELECT v.id, s.name, v.version, v.seq FROM versions v JOIN systems s ON s.id = v.system_id"
+            ).fetchall()
+            size = max((row[0] for row in rows), default=0) + 1
+            systems = np.empty(size, dtype=object)
+            versions = np.empty(size, dtype=object)
+            seqs = np.zeros(size, dtype=np.int64)
+            if rows:
+                ids, names, version_names, seq_values = zip(*rows)
+                ids = np.array(ids)
+                systems[ids] = names
+                versions[ids] = version_names
+                seqs[ids] = seq_values
+            self._versions = (systems, versions, seqs)
+        return self._versions
+
+    def _marker_names(self, marker_ids: np.ndarray) -> np.ndarray:
+        """Map marker IDs to marker text."""
+        size = int(marker_ids.max()) + 1 if len(marker_ids) else 0
+        if self._markers is None or len(self._markers) < size:
+            self._marker_ids.update(self.connection.execute("SELECT text, id FROM markers"))
+            names = np.empty(max(self._marker_ids.values(), default=0) + 1, dtype=object)
+            for text, marker_id in self._marker_ids.items():
+                names[marker_id] = text
+            self._markers = names
+        return self._markers[marker_ids]
+
+    def _query(self, sql: str, params: Sequence, columns: Sequence[str], as_frame: bool) -> QueryResult:
+        """
+        Run a query whose first selected column is a version ID.
+
+        The version ID is expanded to system, version and seq columns from the version
+        index, so queries never join names onto every row. A "marker" column is
+        selected as marker ID and mapped to marker text the same way.
+        """
+        rows = self.connection.execute(sql, params).fetchall()
+        values = list(zip(*rows)) if rows else [()] * (len(columns) + 1)
+        version_ids = np.fromiter(values[0], dtype=np.int64, count=len(rows))
+        systems, versions, seqs = self._version_index(int(version_ids.max()) + 1 if len(rows) else 0)
+
+        result = {
+            "system": systems[version_ids],
+            "version": versions[version_ids],
+            "seq": seqs[version_ids]
+        }
+        for name, column in zip(columns, values[1:]):
+            if name == "marker":
+                result[name] = self._marker_names(np.fromiter(column, dtype=np.int64, count=len(rows)))
+            else:
+                result[name] = np.fromiter(column, dtype=COLUMN_DTYPES.get(name, object), count=len(rows))
+
+        if as_frame:
+            import pandas as pd
+            return pd.DataFrame(result)
+        return result
+
+    def level_scores(
+        self,
+        level: Union[AgencyLevel, str],
+        min_score: Optional[float] = None,
+        max_score: Optional[float] = None,
+        system: Optional[str] = None,
+        last_versions: Optional[int] = None,
+        as_frame: bool = False
+    ) -> QueryResult:
+        """
+        Query the scores of one agency level.
+
+        Args:
+            level: Agency level to query
+            min_score: Only return scores strictly above this value
+            max_score: Only return scores at or below this value
+            system: Only return versions of this system
+            last_versions: Only consider each system's most recent versions
+            as_frame: Return a DataFrame instead of a dictionary of NumPy arrays
+
+        Returns:
+            Columns system, version, seq and score, in the order versions were stored
+        """
+        conditions, params = ["ls.level = ?"], [_level_value(level)]
+        if min_score is not None:
+            conditions.append("ls.score > ?")
+            params.append(min_score)
+        if max_score is not None:
+            conditions.append("ls.score <= ?")
+            params.append(max_score)
+        if system is not None:
+            conditions.append("s.name = ?")
+            params.append(system)
+        if last_versions is not None:
+            conditions.append("v.seq > s.latest_seq - ?")
+            params.append(last_versions)
+
+        sql = (
+            f"SELECT ls.version_id, ls.score FROM level_scores ls "
+            f"JOIN versions v ON v.id = ls.version_id "
+            f"JOIN systems s ON s.id = v.system_id "
+            f"WHERE {' AND '.join(conditions)} ORDER BY ls.version_id"
+        )
+        return self._query(sql, params, ("score",), as_frame)
+
+    def systems_above(
+        self,
+        level: Union[AgencyLevel, str],
+        threshold: float,
+        last_versions: Optional[int] = None
+    ) -> List[str]:
+        """Get the systems with any version scoring above a threshold on a level."""
+        result = self.level_scores(level, min_score=threshold, last_versions=last_versions)
+        return sorted(set(result["system"].tolist()))
+
+    def marker_results(
+        self,
+        marker: Optional[str] = None,
+        system: Optional[str] = None,
+        version: Optional[str] = None,
+        with_evidence: bool = True,
+        as_frame: bool = False
+    ) -> QueryResult:
+        """
+        Query stored marker results.
+
+        Args:
+            marker: Only return results for this marker
+            system: Only return results for this system
+            version: Only return results for this version
+            with_evidence: Include the evidence column
+            as_frame: Return a DataFrame instead of a dictionary of NumPy arrays
+
+        Returns:
+            Columns system, version, seq, marker, presence, confidence, score and
+            evidence, in the order versions were stored
+        """
+        conditions, params = [], []
+        if marker is not None:
+            marker_id = self._marker_ids.get(marker)
+            if marker_id is None:
+                row = self.connection.execute("SELECT id FROM markers WHERE text = ?", (marker,)).fetchone()
+                marker_id = row[0] if row else -1
+            conditions.append("marker_id = ?")
+            params.append(marker_id)
+        if system is not None or version is not None:
+            version_conditions, version_params = [], []
+            if system is not None:
+                version_conditions.append("s.name = ?")
+                version_params.append(system)
+            if version is not None:
+                version_conditions.append("v.version = ?")
+                version_params.append(version)
+            conditions.append(
+                f"version_id IN (SELECT v.id FROM versions v JOIN systems s ON s.id = v.system_id "
+                f"WHERE {' AND '.join(version_conditions)})"
+            )
+            params.extend(version_params)
+
+        columns = ["marker", "presence", "confidence", "score"]
+        if with_evidence:
+            columns.append("evidence")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        sql = (
+            f"SELECT version_id, marker_id, presence, confidence, score"
+            f"{', evidence' if with_evidence else ''} FROM marker_results "
+            f"{where} ORDER BY version_id, marker_id"
+        )
+        return self._query(sql, params, columns, as_frame)
+
+    def marker_evidence(self, marker: str, as_frame: bool = False) -> QueryResult:
+        """Get all stored evidence for a marker."""
+        result = self.marker_results(marker=marker, as_frame=as_frame)
+        if as_frame:
+            return result[result["evidence"].notna()]
+        keep = np.array([e is not None for e in result["evidence"]], dtype=bool)
+        return {name: values[keep] for name, values in result.items()}
+
+    def level_score_matrix(self, system: str) -> Tuple[List[str], np.ndarray]:
+        """
+        Get the level scores of every version of a system.
+
+        Returns:
+            Tuple of (versions in order, array of shape (V, L) indexed by AgencyLevel value)
+        """
+        rows = self.connection.execute(
+            "SELECT v.version, v.seq, ls.level, ls.score FROM level_scores ls "
+            "JOIN versions v ON v.id = ls.version_id JOIN systems s ON s.id = v.system_id "
+            "WHERE s.name = ? ORDER BY v.seq, ls.level",
+            (system,)
+        ).fetchall()
+        versions = list(dict.fromkeys(row[0] for row in rows))
+        matrix = np.zeros((len(versions), len(AgencyLevel)))
+        positions = {version: i for i, version in enumerate(versions)}
+        for version, _, level, score in rows:
+            matrix[positions[version], level] = score
+        return versions, matrix
+
+    def load_assessment(self, system: str, version: str, framework: AgencyFramework) -> AgencyAssessment:
+        """Rebuild an AgencyAssessment from stored marker results."""
+        row = self.connection.execute(
+            "SELECT v.id FROM versions v JOIN systems s ON s.id = v.system_id "
+            "WHERE s.name = ? AND v.version = ?",
+            (system, version)
+        ).fetchone()
+        if row is None:
+            raise KeyError(f"No stored assessment for {system}@{version}")
+        rows = self.connection.execute(
+            "SELECT m.text, r.presence, r.confidence, r.evidence FROM marker_results r "
+            "JOIN markers m ON m.id = r.marker_id WHERE r.version_id = ?",
+            row
+        ).fetchall()
+        assessment = AgencyAssessment(framework)
+        for marker, presence, confidence, evidence in rows:
+            assessment.assess_marker(marker, presence, confidence, evidence)
+        return assessment
@@ -0,0 +1,264 @@
+"""
+agency_uncertainty.py
+
+Monte Carlo uncertainty propagation for agency scores. Instead of collapsing each
+marker to its point score presence * confidence, every assessed marker is treated as
+a Beta distribution centred on that score whose concentration grows with confidence.
+Samples for all markers and assessments are drawn together with vectorized NumPy
+sampling and propagated to feature and level scores, yielding means and credible
+intervals around the deterministic scores of AgencyAssessment.
+
+License: PolyForm Noncommercial License 1.0
+"""
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+import logging
+import os
+
+from robust_agency_assessment import AgencyLevel, AgencyFramework
+from agency_batch import AssessmentBatch, BatchScorer
+
+logger = logging.getLogger(__name__)
+
+SAMPLING_METHODS = ("beta", "normal")
+
+
+def _sample_quantiles(samples: np.ndarray, probabilities: Tuple[float, ...]) -> np.ndarray:
+    """
+    Linearly interpolated quantiles over the leading (sample) axis.
+
+    Equivalent to np.quantile(samples, probabilities, axis=0), but a single sort
+    along the sample axis is several times faster for large sample counts.
+    """
+    ordered = np.sort(samples, axis=0)
+    positions = np.asarray(probabilities) * (samples.shape[0] - 1)
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.minimum(lower + 1, samples.shape[0] - 1)
+    fraction = (positions - lower).reshape((-1,) + (1,) * (samples.ndim - 1))
+    return ordered[lower] * (1 - fraction) + ordered[upper] * fraction
+
+
+class UncertaintyScores:
+    """Sampled feature and level score distributions for a batch of assessments."""
+
+    def __init__(
+        self,
+        quantiles: Tuple[float, ...],
+        feature_mean: np.ndarray,
+        feature_quantiles: np.ndarray,
+        level_mean: np.ndarray,
+        level_quantiles: np.ndarray,
+        feature_names: List[str],
+        levels: List[AgencyLevel],
+        labels: List[str]
+    ):
+        """
+        Initialize sampled scores.
+
+        Args:
+            quantiles: Quantile probabilities, e.g. (0.05, 0.5, 0.95)
+            feature_mean: Array of shape (N, F) with mean feature scores
+            feature_quantiles: Array of shape (Q, N, F) with feature score quantiles
+            level_mean: Array of shape (N, L) with mean level scores
+            level_quantiles: Array of shape (Q, N, L) with level score quantiles
+            feature_names: Feature names indexing the feature axis
+            levels: Agency levels indexing the level axis
+            labels: Label of each assessment in the batch
+        """
+        self.quantiles = quantiles
+        self.feature_mean = feature_mean
+        self.feature_quantiles = feature_quantiles
+        self.level_mean = level_mean
+        self.level_quantiles = level_quantiles
+        self.feature_names = feature_names
+        self.levels = levels
+        self.labels = labels
+
+    def get_level_summary(self, index: int) -> Dict[AgencyLevel, Dict[str, float]]:
+        """Get the mean and quantiles of every level score for one assessment."""
+        summary = {}
+        for j, level in enumerate(self.levels):
+            entry = {"mean": float(self.level_mean[index, j])}
+            for q, probability in enumerate(self.quantiles):
+                entry[f"q{probability:g}"] = float(self.level_quantiles[q, index, j])
+            summary[level] = entry
+        return summary
+
+    def get_level_interval(self, index: int, level: AgencyLevel) -> Tuple[float, float]:
+        """Get the interval between the lowest and highest computed quantile of a level score."""
+        j = self.levels.index(level)
+        return float(self.level_quantiles[0, index, j]), float(self.level_quantiles[-1, index, j])
+
+
+class MonteCarloScorer:
+    """
+    Propagates marker uncertainty to feature and level scores by sampling.
+
+    Each marker is sampled around its score presence * confidence, so sampled means
+    match AgencyAssessment's feature and level scores; confidence also narrows the
+    spread. Markers that were not assessed contribute 0, as in
+    AgencyAssessment.get_feature_score.
+
+    Exact Beta sampling costs two gamma draws per marker sample: 10,000 samples for
+    1,000 assessments over the default framework take tens of seconds. The "normal"
+    method is about four times faster and suits large fleets; its clipping to [0, 1]
+    slightly biases scores close to either bound.
+    """
+
+    def __init__(
+        self,
+        framework: AgencyFramework,
+        n_samples: int = 10000,
+        quantiles: Sequence[float] = (0.05, 0.5, 0.95),
+        min_concentration: float = 2.0,
+        max_concentration: float = 200.0,
+        method: str = "beta",
+        seed: Optional[int] = None,
+        workers: Optional[int] = None,
+        chunk_elements: int = 8_000_000
+    ):
+        """
+        Initialize a Monte Carlo scorer.
+
+        Args:
+            framework: The agency framework defining features and levels
+            n_samples: Number of samples drawn per assessment
+            quantiles: Quantile probabilities reported for every feature and level
+            min_concentration: Beta concentration (alpha + beta) at confidence 0
+            max_concentration: Beta concentration (alpha + beta) at confidence 1
+            method: "beta" for exact Beta sampling, or "normal" for a faster
+                moment-matched normal approximation clipped to [0, 1]
+            seed: Optional seed for reproducible sampling
+            workers: Threads sampling assessment chunks in parallel (defaults to CPU count)
+            chunk_elements: Approximate number of marker samples held per chunk
+        """
+        if method not in SAMPLING_METHODS:
+            raise ValueError(f"Unknown sampling method '{method}', expected one of {SAMPLING_METHODS}")
+        self.scorer = BatchScorer(framework)
+        self.n_samples = n_samples
+        self.quantiles = tuple(quantiles)
+        self.min_concentration = min_concentration
+        self.max_concentration = max_concentration
+        self.method = method
+        self.seed = seed
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_elements = chunk_elements
+
+        # Dense marker -> feature and feature -> level matrices for the sampled path
+        scorer = self.scorer
+        n_markers = len(scorer.markers)
+        n_features = len(scorer.feature_names)
+        self.marker_feature = np.zeros((n_markers + 1, n_features), dtype=np.float32)
+        for i, row in enumerate(scorer.feature_markers):
+            np.add.at(self.marker_feature[:, i], row, 1.0 / scorer.feature_lengths[i])
+        self.marker_feature = self.marker_feature[:n_markers]
+
+        self.feature_level = np.zeros((n_features + 1, len(scorer.levels)), dtype=np.float32)
+        for j, (row, weights) in enumerate(zip(scorer.level_features, scorer.level_feature_weights)):
+            if scorer.level_weights[j]:
+                self.feature_level[row, j] = weights / scorer.level_weights[j]
+        self.feature_level = self.feature_level[:n_features]
+
+    def _marker_parameters(self, batch: AssessmentBatch) -> Tuple[np.ndarray, np.ndarray]:
+        """Get Beta (alpha, beta) parameters for every marker in the batch."""
+        confidence = np.clip(batch.confidence, 0.0, 1.0)
+        mean = np.clip(batch.presence * confidence, 1e-3, 1 - 1e-3)
+        concentration = self.min_concentration + confidence * (self.max_concentration - self.min_concentration)
+        alpha = np.where(batch.assessed, mean * concentration, 1.0).astype(np.float32)
+        beta = np.where(batch.assessed, (1 - mean) * concentration, 1.0).astype(np.float32)
+        return alpha, beta
+
+    def _sample_markers(self, rng: np.random.Generator, alpha: np.ndarray, beta: np.ndarray) -> np.ndarray:
+        """Draw marker samples of shape (S, n, M) for a chunk of assessments."""
+        shape = (self.n_samples,) + alpha.shape
+        if self.method == "beta":
+            x = rng.standard_gamma(np.broadcast_to(alpha, shape), dtype=np.float32)
+            y = rng.standard_gamma(np.broadcast_to(beta, shape), dtype=np.float32)
+            x /= x + y
+            return x
+
+        total = alpha + beta
+        mean = alpha / total
+        std = np.sqrt(mean * (1 - mean) / (total + 1))
+        samples = rng.standard_normal(shape, dtype=np.float32)
+        samples *= std
+        samples += mean
+        np.clip(samples, 0.0, 1.0, out=samples)
+        return samples
+
+    def _score_chunk(
+        self,
+        rng: np.random.Generator,
+        alpha: np.ndarray,
+        beta: np.ndarray,
+        assessed: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Sample one chunk of assessments and reduce it to means and quantiles."""
+        samples = self._sample_markers(rng, alpha, beta)
+        samples *= assessed
+        n_chunk = alpha.shape[0]
+        flat = samples.reshape(-1, samples.shape[-1])
+        features = (flat @ self.marker_feature).reshape(self.n_samples, n_chunk, -1)
+        levels = (features.reshape(-1, features.shape[-1]) @ self.feature_level).reshape(
+            self.n_samples, n_chunk, -1
+        )
+        return (
+            features.mean(axis=0),
+            _sample_quantiles(features, self.quantiles),
+            levels.mean(axis=0),
+            _sample_quantiles(levels, self.quantiles)
+        )
+
+    def score(self, batch: AssessmentBatch) -> UncertaintyScores:
+        """
+        Sample feature and level score distributions for every assessment in a batch.
+
+        Args:
+            batch: Batch built over the framework's markers (see BatchScorer)
+
+        Returns:
+            UncertaintyScores with means and quantiles per feature and level
+        """
+        alpha, beta = self._marker_parameters(batch)
+        assessed = batch.assessed.astype(np.float32)
+        n = len(batch)
+        n_markers = max(alpha.shape[1], 1)
+        chunk = max(1, self.chunk_elements // (self.n_samples * n_markers))
+        starts = list(range(0, n, chunk))
+        rngs = [np.random.default_rng(s) for s in np.random.SeedSequence(self.seed).spawn(len(starts))]
+
+        def run(k: int):
+            start = starts[k]
+            stop = start + chunk
+            return self._score_chunk(rngs[k], alpha[start:stop], beta[start:stop], assessed[start:stop])
+
+        if self.workers > 1 and len(starts) > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                parts = list(pool.map(run, range(len(starts))))
+        else:
+            parts = [run(k) for k in range(len(starts))]
+
+        n_features = len(self.scorer.feature_names)
+        n_levels = len(self.scorer.levels)
+        n_quantiles = len(self.quantiles)
+        if not parts:
+            parts = [(
+                np.zeros((0, n_features)), np.zeros((n_quantiles, 0, n_features)),
+                np.zeros((0, n_levels)), np.zeros((n_quantiles, 0, n_levels))
+            )]
+
+        return UncertaintyScores(
+            quantiles=self.quantiles,
+            feature_mean=np.concatenate([p[0] for p in parts], axis=0),
+            feature_quantiles=np.concatenate([p[1] for p in parts], axis=1),
+            level_mean=np.concatenate([p[2] for p in parts], axis=0),
+            level_quantiles=np.concatenate([p[3] for p in parts], axis=1),
+            feature_names=self.scorer.feature_names,
+            levels=self.scorer.levels,
+            labels=batch.labels
+        )
+
+    def score_assessments(self, assessments: Sequence, labels: Optional[List[str]] = None) -> UncertaintyScores:
+        """Sample score distributions for a sequence of assessments."""
+        return self.score(self.scorer.batch_from_assessments(assessments, labels))
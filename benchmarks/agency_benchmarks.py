@@ -0,0 +1,217 @@
+"""
+agency_benchmarks.py
+
+Performance baseline for the agency assessment framework. Synthetic frameworks of
+growing size and synthetic assessments at several coverage levels are used to time
+framework construction, assess_feature, get_overall_agency_score, generate_report,
+JSON save/load and visualize_results, recording wall time and peak traced memory.
+Results are emitted as JSON and can be compared against a previous run.
+
+Usage:
+    python benchmarks/agency_benchmarks.py --features 10 100 1000 --markers 4 20
+    python benchmarks/agency_benchmarks.py --output new.json --compare baseline.json
+
+License: PolyForm Noncommercial License 1.0
+"""
+from typing import Callable, Dict, List, Optional
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from robust_agency_assessment import (  # noqa: E402
+    AgencyLevel, AgencyFeature, AgencyFramework, AgencyAssessment
+)
+
+LEVELS = [level for level in AgencyLevel if level != AgencyLevel.BASIC]
+
+
+def synthetic_framework(n_features: int, markers_per_feature: int, seed: int = 0) -> AgencyFramework:
+    """Build a framework with n_features features of markers_per_feature markers each."""
+    rng = random.Random(seed)
+    framework = AgencyFramework(load_defaults=False)
+    for i in range(n_features):
+        framework.add_feature(AgencyFeature(
+            name=f"Synthetic Feature {i}",
+            description=f"Synthetic feature {i} for benchmarking",
+            level=LEVELS[i % len(LEVELS)],
+            markers=[f"Synthetic marker {i}.{j}" for j in range(markers_per_feature)],
+            weight=round(rng.uniform(0.5, 1.0), 2)
+        ))
+    return framework
+
+
+def synthetic_assessments(framework: AgencyFramework, coverage: float, seed: int = 0) -> Dict:
+    """Build per-feature assessment inputs covering the given fraction of markers."""
+    rng = random.Random(seed)
+    inputs = {}
+    for feature in framework.features:
+        inputs[feature.name] = {
+            marker: (rng.random(), rng.random(), "Synthetic evidence")
+            for marker in feature.markers
+            if rng.random() < coverage
+        }
+    return inputs
+
+
+def assess_all(framework: AgencyFramework, inputs: Dict) -> AgencyAssessment:
+    """Fill an assessment from synthetic inputs through assess_feature."""
+    assessment = AgencyAssessment(framework)
+    for feature in framework.features:
+        assessment.assess_feature(feature, inputs[feature.name])
+    return assessment
+
+
+def measure(func: Callable[[], object], repeat: int) -> Dict:
+    """Time func repeatedly, then measure its peak traced memory in a separate run."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "peak_kib": peak / 1024
+    }
+
+
+def _visualization_available() -> bool:
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import seaborn  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def run_suite(
+    feature_counts: List[int],
+    marker_counts: List[int],
+    coverages: List[float],
+    repeat: int,
+    visualize_max_features: int
+) -> List[Dict]:
+    """Run every benchmark over the configured grid and return result records."""
+    records = []
+    can_visualize = _visualization_available()
+
+    def record(name: str, params: Dict, func: Callable[[], object]):
+        result = dict(benchmark=name, **params, **measure(func, repeat))
+        records.append(result)
+        print(
+            f"{name:26s} {params} median={result['median_s'] * 1000:.2f}ms "
+            f"peak={result['peak_kib']:.0f}KiB",
+            file=sys.stderr
+        )
+
+    record("framework_construction", {}, AgencyFramework)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for n_features in feature_counts:
+            for n_markers in marker_counts:
+                framework = synthetic_framework(n_features, n_markers)
+                size = {"features": n_features, "markers_per_feature": n_markers}
+
+                path = os.path.join(tmpdir, "features.json")
+                record("save_features", size, lambda: framework.save_features(path))
+                loaded = AgencyFramework(load_defaults=False)
+                record("load_features", size, lambda: loaded.load_features(path))
+
+                for coverage in coverages:
+                    params = dict(size, coverage=coverage)
+                    inputs = synthetic_assessments(framework, coverage)
+                    record("assess_feature", params, lambda: assess_all(framework, inputs))
+
+                    assessment = assess_all(framework, inputs)
+                    record("get_overall_agency_score", params, assessment.get_overall_agency_score)
+                    record("generate_report", params, assessment.generate_report)
+
+                    report_path = os.path.join(tmpdir, "assessment.json")
+                    record("save_assessment", params, lambda: assessment.save_assessment(report_path))
+
+                    if can_visualize and n_features <= visualize_max_features:
+                        import matplotlib.pyplot as plt
+                        image_path = os.path.join(tmpdir, "assessment.png")
+
+                        def visualize():
+                            assessment.visualize_results(image_path)
+                            plt.close("all")
+
+                        record("visualize_results", params, visualize)
+    return records
+
+
+def compare(records: List[Dict], baseline: List[Dict]) -> List[Dict]:
+    """Pair records with matching baseline records and compute timing ratios."""
+    def key(r: Dict):
+        return (r["benchmark"], r.get("features"), r.get("markers_per_feature"), r.get("coverage"))
+
+    previous = {key(r): r for r in baseline}
+    rows = []
+    for r in records:
+        old = previous.get(key(r))
+        if old is None or not old["median_s"]:
+            continue
+        rows.append({
+            "benchmark": r["benchmark"],
+            "features": r.get("features"),
+            "markers_per_feature": r.get("markers_per_feature"),
+            "coverage": r.get("coverage"),
+            "time_ratio": r["median_s"] / old["median_s"],
+            "memory_ratio": r["peak_kib"] / old["peak_kib"] if old["peak_kib"] else None
+        })
+    return rows
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the agency assessment framework")
+    parser.add_argument("--features", type=int, nargs="+", default=[10, 100, 1000],
+                        help="Feature counts (the full sweep goes up to 10000)")
+    parser.add_argument("--markers", type=int, nargs="+", default=[4, 20],
+                        help="Markers per feature (up to 100)")
+    parser.add_argument("--coverage", type=float, nargs="+", default=[0.25, 1.0],
+                        help="Fractions of markers assessed")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument("--visualize-max-features", type=int, default=100,
+                        help="Skip visualize_results above this many features")
+    parser.add_argument("--output", help="Path to write the JSON results")
+    parser.add_argument("--compare", help="Baseline JSON results to compare against")
+    args = parser.parse_args(argv)
+
+    results = {
+        "python": sys.version.split()[0],
+        "records": run_suite(
+            args.features, args.markers, args.coverage, args.repeat, args.visualize_max_features
+        )
+    }
+    if args.compare:
+        with open(args.compare) as f:
+            results["comparison"] = compare(results["records"], json.load(f)["records"])
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+import_time.py
+
+Cold-start benchmark for robust_agency_assessment. Each sample imports the module in a
+fresh interpreter, optionally builds an AgencyFramework, and records the elapsed time
+and which heavy dependencies ended up loaded. Results are printed as JSON so runs can
+be compared over time.
+
+Usage:
+    python benchmarks/import_time.py [--samples 20] [--output results.json]
+
+License: PolyForm Noncommercial License 1.0
+"""
+from typing import Dict, List
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["numpy", "pandas", "matplotlib", "seaborn", "asyncio", "pyarrow"]
+
+SCENARIOS = {
+    "import": "import robust_agency_assessment",
+    "build_framework": (
+        "import robust_agency_assessment as raa\n"
+        "raa.AgencyFramework()"
+    ),
+}
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "heavy_modules": [m for m in {heavy!r} if m in sys.modules],
+    "root_handlers": len(__import__("logging").getLogger().handlers)
+}}))
+"""
+
+
+def run_sample(code: str) -> Dict:
+    """Run one scenario in a fresh interpreter and return its measurements."""
+    probe = _PROBE.format(code=code, heavy=HEAVY_MODULES)
+    output = subprocess.run(
+        [sys.executable, "-c", probe],
+        cwd=REPO_ROOT,
+        env=dict(os.environ, PYTHONPATH=REPO_ROOT, PYTHONDONTWRITEBYTECODE="1"),
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run_benchmark(samples: int) -> Dict:
+    """Run every scenario the given number of times and summarize the timings."""
+    results = {"python": sys.version.split()[0], "samples": samples, "scenarios": {}}
+    for name, code in SCENARIOS.items():
+        runs: List[Dict] = [run_sample(code) for _ in range(samples)]
+        timings = sorted(run["seconds"] for run in runs)
+        results["scenarios"][name] = {
+            "median_ms": statistics.median(timings) * 1000,
+            "min_ms": timings[0] * 1000,
+            "max_ms": timings[-1] * 1000,
+            "heavy_modules": runs[-1]["heavy_modules"],
+            "root_handlers": runs[-1]["root_handlers"]
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import time")
+    parser.add_argument("--samples", type=int, default=20, help="Fresh interpreters per scenario")
+    parser.add_argument("--output", help="Optional path to write the JSON results")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.samples)
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+model_access.py
+
+Throughput benchmark for the model-access adapter. A LocalModelServer enforcing a
+request quota is driven by concurrent callers, once with one prompt per request and no
+client-side rate limiting, and once through a batching, rate-limited ModelClient.
+Sustained prompts per second, throttled (HTTP 429) responses and the mean batch size
+are reported as JSON.
+
+Usage:
+    python benchmarks/model_access.py [--prompts 2000] [--callers 32] [--quota 50]
+
+License: PolyForm Noncommercial License 1.0
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agency_model_access import LocalModelServer, ModelClient  # noqa: E402
+
+
+def drive(client: ModelClient, n_prompts: int, callers: int) -> float:
+    """Complete n_prompts prompts from concurrent callers and return the elapsed time."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        list(pool.map(lambda i: client.complete(f"Probe prompt {i}"), range(n_prompts)))
+    return time.perf_counter() - start
+
+
+def run_scenario(name: str, args: argparse.Namespace, **client_options) -> Dict:
+    """Run one client configuration against a fresh quota-enforcing server."""
+    with LocalModelServer(
+        requests_per_second=args.quota,
+        burst=args.quota / 5,
+        latency=args.latency,
+        per_prompt_latency=args.per_prompt_latency
+    ) as server:
+        with ModelClient(server.url, max_connections=args.connections, **client_options) as client:
+            elapsed = drive(client, args.prompts, args.callers)
+            stats = client.stats.to_dict()
+        result = {
+            "scenario": name,
+            "seconds": elapsed,
+            "prompts_per_second": args.prompts / elapsed,
+            "server_rejected": server.rejected,
+            **stats
+        }
+    print(
+        f"{name:10s} {result['prompts_per_second']:8.1f} prompts/s "
+        f"throttled={result['throttled']} mean_batch={result['mean_batch_size']:.1f}",
+        file=sys.stderr
+    )
+    return result
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the model-access adapter")
+    parser.add_argument("--prompts", type=int, default=2000, help="Prompts per scenario")
+    parser.add_argument("--callers", type=int, default=32, help="Concurrent calling threads")
+    parser.add_argument("--quota", type=float, default=50.0, help="Server requests per second")
+    parser.add_argument("--connections", type=int, default=4, help="Client connections")
+    parser.add_argument("--latency", type=float, default=0.02, help="Server seconds per request")
+    parser.add_argument("--per-prompt-latency", type=float, default=0.001,
+                        help="Server seconds per prompt")
+    parser.add_argument("--output", help="Path to write the JSON results")
+    args = parser.parse_args(argv)
+
+    results = {
+        "python": sys.version.split()[0],
+        "records": [
+            # One prompt per request and a client rate far above the quota
+            run_scenario("unbatched", args, requests_per_second=args.quota * 100,
+                         max_batch_size=1, max_batch_delay=0.0, max_retries=50),
+            run_scenario("batched", args, requests_per_second=args.quota, burst=args.quota / 5),
+        ]
+    }
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,18 +7,20 @@ associated with each level, and provides methods for conducting assessments.
 
 License: PolyForm Noncommercial License 1.0
 """
-import numpy as np
-import pandas as pd
-from typing import Dict, List, Optional, Tuple, Union, Any
+from typing import Dict, List, Optional, Tuple, Union, Any, Callable, Collection, TYPE_CHECKING
 from enum import Enum
 import json
 import logging
+import weakref
+
+from agency_instrumentation import instrumented, timed
+
+# Heavy dependencies (pandas, matplotlib, asyncio, ...) are imported by the code
+# paths that need them, so building a framework or loading features stays cheap.
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+    from agency_dependencies import ProbeManifest
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 class AgencyLevel(Enum):
@@ -28,6 +30,42 @@ class AgencyLevel(Enum):
     REFLECTIVE = 2     # Reflective endorsement of mental states
     RATIONAL = 3       # Rational assessment of mental states
 
+class _TrackedList(list):
+    """List that calls a hook after every in-place change, so compiled views can be refreshed."""
+    
+    def __init__(self, items: Any = (), on_change: Optional[Callable[[], None]] = None):
+        super().__init__(items)
+        self.on_change = on_change
+    
+    def _changed(method):
+        def tracked(self, *args, **kwargs):
+            result = method(self, *args, **kwargs)
+            if self.on_change is not None:
+                self.on_change()
+            return result
+        tracked.__name__ = method.__name__
+        tracked.__doc__ = method.__doc__
+        return tracked
+    
+    append = _changed(list.append)
+    extend = _changed(list.extend)
+    insert = _changed(list.insert)
+    remove = _changed(list.remove)
+    pop = _changed(list.pop)
+    clear = _changed(list.clear)
+    sort = _changed(list.sort)
+    reverse = _changed(list.reverse)
+    __setitem__ = _changed(list.__setitem__)
+    __delitem__ = _changed(list.__delitem__)
+    __iadd__ = _changed(list.__iadd__)
+    __imul__ = _changed(list.__imul__)
+    del _changed
+    
+    def __reduce__(self):
+        # Pickled as a plain list; the owner re-attaches its hook when unpickled
+        return list, (list(self),)
+
+
 class AgencyFeature:
     """Class representing a feature associated with agency."""
     
@@ -51,9 +89,55 @@ class AgencyFeature:
         """
         self.name = name
         self.description = description
-        self.level = level
-        self.markers = markers
-        self.weight = weight
+        # Frameworks whose compiled view includes this feature, notified when it changes
+        self._frameworks = weakref.WeakSet()
+        self._level = level
+        self._markers = _TrackedList(markers, self._changed)
+        self._weight = weight
+    
+    def _changed(self):
+        for framework in self._frameworks:
+            framework._feature_set_changed()
+    
+    @property
+    def level(self) -> AgencyLevel:
+        """Agency level associated with the feature."""
+        return self._level
+    
+    @level.setter
+    def level(self, level: AgencyLevel):
+        self._level = level
+        self._changed()
+    
+    @property
+    def markers(self) -> List[str]:
+        """Computational markers; in-place edits are picked up by compiled views."""
+        return self._markers
+    
+    @markers.setter
+    def markers(self, markers: List[str]):
+        self._markers = _TrackedList(markers, self._changed)
+        self._changed()
+    
+    @property
+    def weight(self) -> float:
+        """Weight of the feature in agency assessment."""
+        return self._weight
+    
+    @weight.setter
+    def weight(self, weight: float):
+        self._weight = weight
+        self._changed()
+    
+    def __getstate__(self) -> Dict:
+        state = self.__dict__.copy()
+        del state["_frameworks"]
+        return state
+    
+    def __setstate__(self, state: Dict):
+        self.__dict__.update(state)
+        self._frameworks = weakref.WeakSet()
+        self._markers = _TrackedList(self._markers, self._changed)
         
     def to_dict(self) -> Dict:
         """Convert feature to dictionary representation."""
@@ -61,7 +145,7 @@ class AgencyFeature:
             "name": self.name,
             "description": self.description,
             "level": self.level.name,
-            "markers": self.markers,
+            "markers": list(self.markers),
             "weight": self.weight
         }
         
@@ -76,13 +160,112 @@ class AgencyFeature:
             weight=data.get("weight", 1.0)
         )
 
+class CompiledFramework:
+    """Frozen, indexed view of an AgencyFramework's feature set."""
+    
+    def __init__(self, features: List[AgencyFeature]):
+        """
+        Compile a feature set into lookup tables.
+        
+        Args:
+            features: Features to index, in framework order
+        """
+        self.features = tuple(features)
+        
+        # Interned marker IDs, assigned in order of first appearance
+        self.marker_ids = {}
+        for feature in self.features:
+            for marker in feature.markers:
+                if marker not in self.marker_ids:
+                    self.marker_ids[marker] = len(self.marker_ids)
+        self.markers = tuple(self.marker_ids)
+        self.all_markers = tuple(m for f in self.features for m in f.markers)
+        self.total_markers = len(self.all_markers)
+        
+        self.feature_marker_ids = tuple(
+            tuple(self.marker_ids[m] for m in f.markers) for f in self.features
+        )
+        self.feature_marker_sets = tuple(frozenset(f.markers) for f in self.features)
+        self._feature_positions = {id(f): i for i, f in enumerate(self.features)}
+        
+        marker_features = {}
+        for i, marker_ids in enumerate(self.feature_marker_ids):
+            for marker_id in marker_ids:
+                marker_features.setdefault(marker_id, []).append(i)
+        self.marker_features = {k: tuple(v) for k, v in marker_features.items()}
+        
+        self.level_features = {
+            level: tuple(f for f in self.features if f.level == level)
+            for level in AgencyLevel
+        }
+        self.level_weights = {
+            level: sum(f.weight for f in features)
+            for level, features in self.level_features.items()
+        }
+    
+    def get_feature_position(self, feature: AgencyFeature) -> Optional[int]:
+        """Get the index of a feature in the compiled view, or None if it is not part of it."""
+        return self._feature_positions.get(id(feature))
+    
+    def feature_has_marker(self, feature: AgencyFeature, marker: str) -> bool:
+        """Check whether a marker belongs to a feature."""
+        position = self._feature_positions.get(id(feature))
+        if position is None:
+            return marker in feature.markers
+        return marker in self.feature_marker_sets[position]
+    
+    def get_features_for_marker(self, marker: str) -> List[AgencyFeature]:
+        """Get all features that list the given marker."""
+        marker_id = self.marker_ids.get(marker)
+        if marker_id is None:
+            return []
+        return [self.features[i] for i in dict.fromkeys(self.marker_features[marker_id])]
+
+
 class AgencyFramework:
     """Framework for assessing agency in AI systems."""
     
-    def __init__(self):
-        """Initialize the agency assessment framework."""
+    def __init__(self, load_defaults: bool = True):
+        """
+        Initialize the agency assessment framework.
+        
+        Args:
+            load_defaults: Load the default feature set; pass False when the features
+                will be replaced straight away (e.g. by load_features or a snapshot)
+        """
         self.features = []
-        self.load_default_features()
+        if load_defaults:
+            self.load_default_features()
+    
+    @property
+    def features(self) -> List[AgencyFeature]:
+        """Features of the framework; in-place edits are picked up by compile()."""
+        return self._features
+    
+    @features.setter
+    def features(self, features: List[AgencyFeature]):
+        self._features = _TrackedList(features, self._feature_set_changed)
+        self._compiled = None
+        self._changes = 0
+        self._compiled_changes = -1
+    
+    def _feature_set_changed(self):
+        """Mark the compiled view stale after a change to the features or one of them."""
+        self._changes += 1
+    
+    def __getstate__(self) -> Dict:
+        # The compiled view indexes features by identity, so it is rebuilt after unpickling
+        state = self.__dict__.copy()
+        state["_compiled"] = None
+        state["_compiled_changes"] = -1
+        return state
+    
+    def __setstate__(self, state: Dict):
+        state = dict(state)
+        state.setdefault("_features", state.pop("features", []))
+        state.update(_compiled=None, _changes=0, _compiled_changes=-1)
+        self.__dict__.update(state)
+        self._features = _TrackedList(self._features, self._feature_set_changed)
         
     def load_default_features(self):
         """Load default set of agency features."""
@@ -153,18 +336,6 @@ class AgencyFramework:
             weight=0.9
         ))
         
-        self.add_feature(AgencyFeature(
-            name="Reflective
-"""
-robust_agency_assessment.py (continued)
-
-This module implements a pluralistic, probabilistic framework for assessing robust agency
-in AI systems. It defines various levels of agency, identifies computational markers
-associated with each level, and provides methods for conducting assessments.
-
-License: PolyForm Noncommercial License 1.0
-"""
-
         self.add_feature(AgencyFeature(
             name="Reflective Endorsement",
             description="Capacity to endorse or reject first-order mental states",
@@ -261,16 +432,29 @@ License: PolyForm Noncommercial License 1.0
         """Add a feature to the framework."""
         self.features.append(feature)
     
+    def compile(self) -> CompiledFramework:
+        """
+        Get the compiled view of the current feature set.
+        
+        The view is cached and rebuilt on the next call after the feature list, or a
+        compiled feature's markers, level or weight, changes.
+        """
+        compiled = self._compiled
+        if compiled is not None and self._compiled_changes == self._changes:
+            return compiled
+        self._compiled_changes = self._changes
+        compiled = self._compiled = CompiledFramework(self._features)
+        for feature in compiled.features:
+            feature._frameworks.add(self)
+        return compiled
+    
     def get_features_by_level(self, level: AgencyLevel) -> List[AgencyFeature]:
         """Get all features for a specific agency level."""
-        return [f for f in self.features if f.level == level]
+        return list(self.compile().level_features[level])
     
     def get_all_markers(self) -> List[str]:
         """Get all markers across all features."""
-        all_markers = []
-        for feature in self.features:
-            all_markers.extend(feature.markers)
-        return all_markers
+        return list(self.compile().all_markers)
     
     def save_features(self, filepath: str):
         """Save features to a JSON file."""
@@ -284,29 +468,146 @@ License: PolyForm Noncommercial License 1.0
         with open(filepath, 'r') as f:
             features_data = json.load(f)
         
-        self.features = []
-        for data in features_data:
-            self.features.append(AgencyFeature.from_dict(data))
+        self.features = [AgencyFeature.from_dict(data) for data in features_data]
         
         logger.info(f"Loaded {len(self.features)} features from {filepath}")
 
 
+class IngestionReport:
+    """Summary of a bulk marker ingestion."""
+    
+    def __init__(self):
+        self.accepted = 0
+        self.resolved = 0
+        self.unmatched = {}
+    
+    @property
+    def rejected(self) -> int:
+        """Number of rows whose marker did not match the framework or feature."""
+        return sum(self.unmatched.values())
+    
+    def to_dict(self) -> Dict:
+        """Convert report to dictionary representation."""
+        return {
+            "accepted": self.accepted,
+            "resolved": self.resolved,
+            "rejected": self.rejected,
+            "unmatched": dict(self.unmatched)
+        }
+    
+    def log_unmatched(self, scope: str):
+        """Log one aggregated warning for all unmatched markers."""
+        if self.unmatched:
+            examples = ", ".join(f"'{m}'" for m in list(self.unmatched)[:5])
+            logger.warning(
+                f"Skipped {self.rejected} rows with {len(self.unmatched)} markers "
+                f"not found in {scope} (e.g. {examples})"
+            )
+
+
+MARKER_COLUMNS = ("marker", "presence", "confidence", "evidence")
+
+
+def _to_list(values: Any) -> List:
+    """Convert a column to a list of Python values (NumPy scalars are not JSON serializable)."""
+    return values.tolist() if hasattr(values, "tolist") else list(values)
+
+
+def marker_rows_to_columns(rows: Any) -> Tuple[List[str], List[float], List[float], List[Optional[str]]]:
+    """
+    Normalize bulk marker assessments into parallel columns.
+    
+    Args:
+        rows: A DataFrame or dict of columns named marker, presence, confidence and
+            optionally evidence; or an iterable of (marker, presence, confidence[, evidence])
+            tuples or of dicts with those keys
+        
+    Returns:
+        Tuple of (markers, presence, confidence, evidence) lists, with presence and
+        confidence as Python floats
+    """
+    if hasattr(rows, "columns") or isinstance(rows, dict):
+        # DataFrame or mapping of column name -> sequence
+        markers = _to_list(rows["marker"])
+        presence = [float(p) for p in _to_list(rows["presence"])]
+        confidence = [float(c) for c in _to_list(rows["confidence"])]
+        has_evidence = "evidence" in (rows.columns if hasattr(rows, "columns") else rows)
+        if has_evidence:
+            # Missing values in DataFrame columns come through as NaN rather than None
+            evidence = [e if isinstance(e, str) else None for e in rows["evidence"]]
+        else:
+            evidence = [None] * len(markers)
+        return markers, presence, confidence, evidence
+    
+    markers, presence, confidence, evidence = [], [], [], []
+    for row in rows:
+        if isinstance(row, dict):
+            markers.append(row["marker"])
+            presence.append(float(row["presence"]))
+            confidence.append(float(row["confidence"]))
+            evidence.append(row.get("evidence"))
+        else:
+            markers.append(row[0])
+            presence.append(float(row[1]))
+            confidence.append(float(row[2]))
+            evidence.append(row[3] if len(row) > 3 else None)
+    return markers, presence, confidence, evidence
+
+
+def resolve_marker_column(
+    markers: List[str],
+    resolver: Any,
+    feature: Optional[AgencyFeature] = None
+) -> Tuple[List[str], int]:
+    """
+    Map a column of marker names to canonical markers.
+    
+    Args:
+        markers: Marker names as ingested
+        resolver: MarkerIndex (see agency_resolution)
+        feature: Optional feature whose markers are the only candidates
+        
+    Returns:
+        Tuple of (canonical or original marker per row, number of rows renamed)
+    """
+    canonical = resolver.canonicalize(markers, feature)
+    renamed = sum(1 for before, after in zip(markers, canonical) if before != after)
+    return canonical, renamed
+
+
 class AgencyAssessment:
     """Class for conducting agency assessments on AI systems."""
     
-    def __init__(self, framework: AgencyFramework):
+    def __init__(
+        self,
+        framework: AgencyFramework,
+        incremental: bool = False,
+        evidence_store: Optional[Any] = None
+    ):
         """
         Initialize an agency assessment.
         
         Args:
             framework: The agency framework to use for assessment
+            incremental: Maintain running feature and level sums on every assess_marker
+                call so current scores are available in O(1)
+            evidence_store: Optional EvidenceStore (see agency_evidence); evidence is
+                written to it and only its reference is kept in the assessment
         """
         self.framework = framework
         self.results = {}
         self.notes = {}
         self.confidence = {}
         self.evidence = {}
+        self.incremental = incremental
+        self.evidence_store = evidence_store
+        self._incremental_compiled = None
+        self._feature_sums = []
+        self._level_sums = {}
+        if incremental:
+            self.resync_incremental()
     
+    @instrumented("assessment.assess_marker")
     def assess_marker(
         self, 
         marker: str, 
@@ -323,15 +624,114 @@ class AgencyAssessment:
             confidence: Confidence in the estimate (0-1)
             evidence: Optional evidence supporting the assessment
         """
+        if self.incremental:
+            previous_score = self.get_marker_score(marker)
+        
         self.results[marker] = presence
         self.confidence[marker] = confidence
         if evidence:
+            if self.evidence_store is not None:
+                evidence = self.evidence_store.put(evidence)
             self.evidence[marker] = evidence
+        
+        if self.incremental:
+            self._apply_marker_delta(marker, self.get_marker_score(marker) - previous_score)
+    
+    def remove_marker(self, marker: str):
+        """
+        Remove the assessment of a marker, leaving it unassessed.
+        
+        Args:
+            marker: The marker to remove
+        """
+        if marker not in self.results:
+            return
+        previous_score = self.get_marker_score(marker)
+        del self.results[marker]
+        self.confidence.pop(marker, None)
+        self.evidence.pop(marker, None)
+        if self.incremental:
+            self._apply_marker_delta(marker, -previous_score)
+    
+    def _apply_marker_delta(self, marker: str, delta: float):
+        """Propagate a change in a marker's score to the running feature and level sums."""
+        compiled = self.framework.compile()
+        if compiled is not self._incremental_compiled:
+            # The feature set changed; the full rebuild already includes this update
+            self.resync_incremental()
+            return
+        
+        marker_id = compiled.marker_ids.get(marker)
+        if marker_id is None or delta == 0:
+            return
+        
+        for position in compiled.marker_features[marker_id]:
+            feature = compiled.features[position]
+            self._feature_sums[position] += delta
+            self._level_sums[feature.level] += delta / len(feature.markers) * feature.weight
+    
+    def resync_incremental(self):
+        """Rebuild the running feature and level sums from the current results."""
+        compiled = self.framework.compile()
+        self._feature_sums = [
+            sum(self.get_marker_score(m) for m in feature.markers if m in self.results)
+            for feature in compiled.features
+        ]
+        self._level_sums = {level: 0.0 for level in AgencyLevel}
+        for feature, total in zip(compiled.features, self._feature_sums):
+            if feature.markers:
+                self._level_sums[feature.level] += total / len(feature.markers) * feature.weight
+        self._incremental_compiled = compiled
+    
+    def get_current_level_scores(self) -> Dict[AgencyLevel, float]:
+        """
+        Get agency scores for all levels from the running sums.
+        
+        Requires incremental mode. Equivalent to get_overall_agency_score up to
+        floating-point accumulation error.
+        """
+        if not self.incremental:
+            raise RuntimeError("Current level scores require incremental=True")
+        compiled = self.framework.compile()
+        if compiled is not self._incremental_compiled:
+            self.resync_incremental()
+        
+        scores = {}
+        for level in AgencyLevel:
+            total_weight = compiled.level_weights[level]
+            scores[level] = self._level_sums[level] / total_weight if total_weight else 0.0
+        return scores
+    
+    def get_coverage(self) -> float:
+        """Get the fraction of framework markers that have been assessed."""
+        return len(self.results) / self.framework.compile().total_markers
+    
+    def verify_incremental(self, tolerance: float = 1e-9) -> bool:
+        """
+        Check the running sums against a full recomputation.
+        
+        Args:
+            tolerance: Maximum allowed absolute difference per level score
+            
+        Returns:
+            True if every level score agrees within the tolerance
+        """
+        current = self.get_current_level_scores()
+        consistent = True
+        for level, expected in self.get_overall_agency_score().items():
+            if abs(current[level] - expected) > tolerance:
+                logger.warning(
+                    f"Incremental score for {level.name} drifted: "
+                    f"{current[level]} != {expected}"
+                )
+                consistent = False
+        return consistent
     
     def assess_feature(
         self, 
         feature: AgencyFeature, 
-        assessments: Dict[str, Tuple[float, float, Optional[str]]]
+        assessments: Dict[str, Tuple[float, float, Optional[str]]],
+        resolver: Optional[Any] = None
     ):
         """
         Assess a feature based on its markers.
@@ -339,13 +739,80 @@ class AgencyAssessment:
         Args:
             feature: The feature to assess
             assessments: Dictionary mapping markers to (presence, confidence, evidence) tuples
+            resolver: Optional MarkerIndex (see agency_resolution) mapping drifted marker
+                names to canonical markers before they are matched
         """
+        compiled = self.framework.compile()
         for marker, (presence, confidence, evidence) in assessments.items():
-            if marker in feature.markers:
+            if resolver is not None and not compiled.feature_has_marker(feature, marker):
+                marker = resolver.canonical(marker, feature) or marker
+            if compiled.feature_has_marker(feature, marker):
                 self.assess_marker(marker, presence, confidence, evidence)
             else:
                 logger.warning(f"Marker '{marker}' not found in feature '{feature.name}'")
     
+    @instrumented("assessment.assess_markers_bulk")
+    def assess_markers_bulk(
+        self,
+        rows: Any,
+        feature: Optional[AgencyFeature] = None,
+        resolver: Optional[Any] = None
+    ) -> IngestionReport:
+        """
+        Assess many markers at once.
+        
+        All marker names are validated against the framework (or against a single
+        feature) in one pass, unmatched markers are reported in aggregate rather than
+        per row, and accepted rows are written directly into the assessment. Later
+        rows for the same marker win, as with repeated assess_marker calls.
+        
+        Args:
+            rows: Marker assessments in any form accepted by marker_rows_to_columns
+            feature: Optional feature to restrict the accepted markers to
+            resolver: Optional MarkerIndex (see agency_resolution) mapping drifted marker
+                names to canonical markers before they are matched
+            
+        Returns:
+            IngestionReport with accepted, resolved and unmatched counts
+        """
+        markers, presence, confidence, evidence = marker_rows_to_columns(rows)
+        report = IngestionReport()
+        if resolver is not None:
+            markers, report.resolved = resolve_marker_column(markers, resolver, feature)
+        compiled = self.framework.compile()
+        if feature is None:
+            known = compiled.marker_ids
+        else:
+            position = compiled.get_feature_position(feature)
+            known = compiled.feature_marker_sets[position] if position is not None else set(feature.markers)
+        
+        results, confidences, evidences = {}, {}, {}
+        for marker, p, c, e in zip(markers, presence, confidence, evidence):
+            if marker not in known:
+                report.unmatched[marker] = report.unmatched.get(marker, 0) + 1
+                continue
+            results[marker] = p
+            confidences[marker] = c
+            if e:
+                evidences[marker] = self.evidence_store.put(e) if self.evidence_store is not None else e
+            report.accepted += 1
+        
+        self.results.update(results)
+        self.confidence.update(confidences)
+        self.evidence.update(evidences)
+        if self.incremental and results:
+            self.resync_incremental()
+        
+        report.log_unmatched(f"feature '{feature.name}'" if feature is not None else "the framework")
+        return report
+    
+    def get_evidence(self, marker: str) -> Optional[str]:
+        """Get the evidence text for a marker, reading it from the evidence store if needed."""
+        evidence = self.evidence.get(marker)
+        if evidence is not None and self.evidence_store is not None:
+            return self.evidence_store.resolve(evidence)
+        return evidence
+    
     def get_marker_score(self, marker: str) -> float:
         """Get the weighted score for a marker."""
         if marker not in self.results:
@@ -373,13 +840,15 @@ class AgencyAssessment:
         
         return total_score / len(feature.markers)
     
+    @instrumented("assessment.get_level_score")
     def get_level_score(self, level: AgencyLevel) -> float:
         """Calculate the score for an agency level."""
-        features = self.framework.get_features_by_level(level)
+        compiled = self.framework.compile()
+        features = compiled.level_features[level]
         if not features:
             return 0.0
         
-        total_weight = sum(f.weight for f in features)
+        total_weight = compiled.level_weights[level]
         if total_weight == 0:
             return 0.0
         
@@ -390,6 +859,7 @@ class AgencyAssessment:
         """Calculate agency scores for all levels."""
         return {level: self.get_level_score(level) for level in AgencyLevel}
     
+    @instrumented("assessment.generate_report")
     def generate_report(self) -> Dict:
         """Generate a comprehensive assessment report."""
         level_scores = self.get_overall_agency_score()
@@ -415,10 +885,11 @@ class AgencyAssessment:
                 "intentional_agency": level_scores.get(AgencyLevel.INTENTIONAL, 0.0),
                 "reflective_agency": level_scores.get(AgencyLevel.REFLECTIVE, 0.0),
                 "rational_agency": level_scores.get(AgencyLevel.RATIONAL, 0.0),
-                "assessment_coverage": len(self.results) / len(self.framework.get_all_markers())
+                "assessment_coverage": self.get_coverage()
             }
         }
     
+    @instrumented("assessment.save_assessment")
     def save_assessment(self, filepath: str):
         """Save the assessment to a JSON file."""
         report = self.generate_report()
@@ -427,12 +898,18 @@ class AgencyAssessment:
         logger.info(f"Saved assessment to {filepath}")
     
     def visualize_results(self, filepath: Optional[str] = None):
-        """Visualize assessment results."""
+        """
+        Visualize assessment results.
+        
+        For many assessments, agency_render.render_assessments renders the same
+        layout headlessly from batch-computed scores.
+        """
         try:
             import matplotlib.pyplot as plt
+            import pandas as pd
             import seaborn as sns
         except ImportError:
-            logger.error("Visualization requires matplotlib and seaborn")
+            logger.error("Visualization requires matplotlib, pandas and seaborn")
             return
         
         level_scores = self.get_overall_agency_score()
@@ -478,9 +955,8 @@ class AgencyAssessment:
         
         # Plot assessment coverage
         plt.subplot(2, 2, 4)
-        all_markers = self.framework.get_all_markers()
         assessed_count = len(self.results)
-        not_assessed_count = len(all_markers) - assessed_count
+        not_assessed_count = self.framework.compile().total_markers - assessed_count
         
         plt.pie(
             [assessed_count, not_assessed_count],
@@ -496,12 +972,27 @@ class AgencyAssessment:
             logger.info(f"Saved visualization to {filepath}")
         else:
             plt.show()
+        # Release the figure; pyplot keeps every open figure alive otherwise
+        plt.close()
 
 
 class AISystemAnalyzer:
     """Class for analyzing AI systems for robust agency indicators."""
     
-    def __init__(self, system_name: str, system_type: str, version: str):
+    # Prompt keys accepted by analyze_llm_agency and the probe methods that test them
+    LLM_PROBES = {
+        "belief_representation": "_test_belief_representation",
+        "desire_representation": "_test_desire_representation",
+    }
+    
+    def __init__(self,
+                 system_name: str,
+                 system_type: str,
+                 version: str,
+                 framework: Optional[AgencyFramework] = None,
+                 probe_cache: Optional[Any] = None,
+                 probe_manifest: Optional["ProbeManifest"] = None,
+                 evidence_store: Optional[Any] = None):
         """
         Initialize an AI system analyzer.
         
@@ -509,17 +1000,31 @@ class AISystemAnalyzer:
             system_name: Name of the AI system
             system_type: Type of AI system (e.g., LLM, RL agent)
             version: Version of the AI system
+            framework: Optional framework to share between analyzers; a framework with
+                the default features is created if omitted
+            probe_cache: Optional probe result cache (see agency_cache) consulted
+                before running prompt-driven probes
+            probe_manifest: Optional record of earlier probe runs (see
+                agency_dependencies) used by reassess_llm_agency; probe runs are
+                fingerprinted and recorded only when one is given, so pass an empty
+                ProbeManifest to make a first analysis reusable
+            evidence_store: Optional EvidenceStore (see agency_evidence) holding probe
+                evidence out of line
         """
         self.system_name = system_name
         self.system_type = system_type
         self.version = version
-        self.framework = AgencyFramework()
-        self.assessment = AgencyAssessment(self.framework)
+        self.framework = framework if framework is not None else AgencyFramework()
+        self.assessment = AgencyAssessment(self.framework, evidence_store=evidence_store)
+        self.probe_cache = probe_cache
+        self.probe_manifest = probe_manifest
         
     def analyze_llm_agency(self, 
                          model_provider: str,
                          model_access: Any,
-                         prompts: Dict[str, str]) -> Dict:
+                         prompts: Dict[str, str],
+                         skip_probes: Optional[Collection[str]] = None,
+                         on_probe_complete: Optional[Callable[[str, Dict[str, Dict]], None]] = None) -> Dict:
         """
         Analyze agency indicators in a language model.
         
@@ -527,48 +1032,212 @@ class AISystemAnalyzer:
             model_provider: Provider of the language model
             model_access: Access to the model API or interface
             prompts: Dictionary of specialized prompts for testing agency features
+            skip_probes: Optional names of probes not to run, e.g. because their
+                results were restored into the assessment
+            on_probe_complete: Optional callback invoked with (probe_name, results)
+                after each probe's results are recorded
             
         Returns:
             Dictionary of assessment results
         """
         logger.info(f"Analyzing agency in LLM {self.system_name} ({self.version})")
         
-        # Example implementation for analyzing belief representation
-        if "belief_representation" in prompts:
-            belief_results = self._test_belief_representation(model_access, prompts["belief_representation"])
-            for marker, result in belief_results.items():
-                self.assessment.assess_marker(
-                    marker=marker,
-                    presence=result["presence"],
-                    confidence=result["confidence"],
-                    evidence=result["evidence"]
-                )
+        for prompt_key, probe_name in self.LLM_PROBES.items():
+            if prompt_key not in prompts or (skip_probes and probe_name in skip_probes):
+                continue
+            probe_results = self._run_probe(probe_name, model_access, prompts[prompt_key])
+            self._record_probe_results(probe_results)
+            if on_probe_complete is not None:
+                on_probe_complete(probe_name, probe_results)
         
-        # Example implementation for analyzing desire representation
-        if "desire_representation" in prompts:
-            desire_results = self._test_desire_representation(model_access, prompts["desire_representation"])
-            for marker, result in desire_results.items():
-                self.assessment.assess_marker(
-                    marker=marker,
-                    presence=result["presence"],
-                    confidence=result["confidence"],
-                    evidence=result["evidence"]
-                )
+        # Generate and return the report
+        return self.assessment.generate_report()
+    
+    async def analyze_llm_agency_async(self,
+                                       model_provider: str,
+                                       model_access: Any,
+                                       prompts: Dict[str, str],
+                                       max_concurrency: int = 8,
+                                       probe_timeout: Optional[float] = None,
+                                       executor: Optional["ThreadPoolExecutor"] = None,
+                                       skip_failed_probes: bool = False) -> Dict:
+        """
+        Analyze agency indicators in a language model, running all probes concurrently.
         
-        # Continue with other features...
+        Probes defined as coroutine functions are awaited directly; synchronous probes
+        and probe cache lookups run on a thread pool. Results are merged into the
+        assessment in LLM_PROBES order, regardless of completion order. As with
+        analyze_llm_agency, a probe that raises records the probes before it in that
+        order and re-raises, unless skip_failed_probes is set.
         
-        # Generate and return the report
+        Args:
+            model_provider: Provider of the language model
+            model_access: Access to the model API or interface
+            prompts: Dictionary of specialized prompts for testing agency features
+            max_concurrency: Maximum number of probes in flight at once
+            probe_timeout: Optional per-probe timeout in seconds; probes that time out
+                are skipped with a warning
+            executor: Optional thread pool for synchronous probes and cache lookups
+            skip_failed_probes: Skip probes that raise, with a warning, instead of
+                raising once all probes have finished
+            
+        Returns:
+            Dictionary of assessment results
+        """
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+        
+        logger.info(f"Analyzing agency in LLM {self.system_name} ({self.version}) concurrently")
+        
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(max_concurrency)
+        own_executor = executor is None
+        if own_executor:
+            executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        
+        async def run_probe(probe_name: str, prompt_template: str) -> Optional[Dict[str, Dict]]:
+            cache_key = self._probe_cache_key(probe_name, prompt_template)
+            if cache_key is not None:
+                # Cache lookups may hit disk (SQLiteProbeCache), so keep them off the loop
+                cached = await loop.run_in_executor(executor, self.probe_cache.get, cache_key)
+                if cached is not None:
+                    self._track_probe(probe_name, prompt_template, cached)
+                    return cached
+            
+            async with semaphore:
+                probe = getattr(self, probe_name)
+                if asyncio.iscoroutinefunction(probe):
+                    pending = probe(model_access, prompt_template)
+                else:
+                    pending = loop.run_in_executor(executor, probe, model_access, prompt_template)
+                with timed(f"probe.{probe_name}"):
+                    try:
+                        probe_results = await asyncio.wait_for(pending, probe_timeout)
+                    except asyncio.TimeoutError:
+                        logger.warning(f"Probe '{probe_name}' timed out after {probe_timeout}s")
+                        return None
+            
+            if cache_key is not None:
+                await loop.run_in_executor(executor, self.probe_cache.set, cache_key, probe_results)
+            self._track_probe(probe_name, prompt_template, probe_results)
+            return probe_results
+        
+        probes = [
+            (probe_name, prompts[prompt_key])
+            for prompt_key, probe_name in self.LLM_PROBES.items()
+            if prompt_key in prompts
+        ]
+        try:
+            # Let every probe finish before acting on a failure, so none is left running
+            results = await asyncio.gather(
+                *(run_probe(name, prompt) for name, prompt in probes), return_exceptions=True
+            )
+        finally:
+            if own_executor:
+                executor.shutdown(wait=False)
+        
+        for (probe_name, _), probe_results in zip(probes, results):
+            if isinstance(probe_results, Exception):
+                if not skip_failed_probes:
+                    raise probe_results
+                logger.warning(f"Probe '{probe_name}' failed: {type(probe_results).__name__}: {probe_results}")
+            elif probe_results is not None:
+                self._record_probe_results(probe_results)
+        
+        return self.assessment.generate_report()
+    
+    def analyze_llm_agency_concurrent(self,
+                                      model_provider: str,
+                                      model_access: Any,
+                                      prompts: Dict[str, str],
+                                      max_concurrency: int = 8,
+                                      probe_timeout: Optional[float] = None,
+                                      skip_failed_probes: bool = False) -> Dict:
+        """Synchronous entry point for analyze_llm_agency_async."""
+        import asyncio
+        
+        return asyncio.run(self.analyze_llm_agency_async(
+            model_provider, model_access, prompts,
+            max_concurrency=max_concurrency,
+            probe_timeout=probe_timeout,
+            skip_failed_probes=skip_failed_probes
+        ))
+    
+    def reassess_llm_agency(self,
+                            model_provider: str,
+                            model_access: Any,
+                            prompts: Dict[str, str]) -> Dict:
+        """
+        Re-analyze a language model, re-running only probes whose dependencies changed.
+        
+        A probe is re-run when its prompt, its code, or the definition of any feature
+        containing one of its markers changed since it was recorded in the probe
+        manifest. Other probes keep their recorded results, and probes whose prompt
+        was removed have their markers dropped from the assessment. Without a
+        manifest every probe is run and an empty manifest is started.
+        
+        Args:
+            model_provider: Provider of the language model
+            model_access: Access to the model API or interface
+            prompts: Dictionary of specialized prompts for testing agency features
+            
+        Returns:
+            Dictionary of assessment results
+        """
+        logger.info(f"Re-analyzing agency in LLM {self.system_name} ({self.version})")
+        if self.probe_manifest is None:
+            from agency_dependencies import ProbeManifest
+            self.probe_manifest = ProbeManifest()
+        
+        stale, reused = [], []
+        for prompt_key, probe_name in self.LLM_PROBES.items():
+            record = self.probe_manifest.get(probe_name)
+            if prompt_key not in prompts:
+                if record is not None:
+                    for marker in record.markers:
+                        self.assessment.remove_marker(marker)
+                    self.probe_manifest.invalidate(probe_name)
+                continue
+            prompt_template = prompts[prompt_key]
+            if record is not None and record.fingerprint == self._probe_fingerprint(
+                    probe_name, prompt_template, record.markers):
+                reused.append(probe_name)
+            else:
+                stale.append((probe_name, prompt_template))
+        
+        # Drop the old results of stale probes before any results are recorded
+        for probe_name, _ in stale:
+            record = self.probe_manifest.get(probe_name)
+            if record is not None:
+                for marker in record.markers:
+                    self.assessment.remove_marker(marker)
+        
+        for probe_name, prompt_template in stale:
+            # Skip the cache: it is keyed by prompt only and may hold outdated results
+            self._record_probe_results(
+                self._run_probe(probe_name, model_access, prompt_template, use_cache=False)
+            )
+        for probe_name in reused:
+            record = self.probe_manifest.get(probe_name)
+            self._record_probe_results(
+                {m: r for m, r in record.results.items() if m not in self.assessment.results}
+            )
+        
+        logger.info(f"Re-ran {len(stale)} probes and reused {len(reused)}")
         return self.assessment.generate_report()
     
     def analyze_rl_agent_agency(self,
                               environment: Any,
-                              agent_interface: Any) -> Dict:
+                              agent_interface: Any,
+                              n_episodes: Optional[int] = None) -> Dict:
         """
         Analyze agency indicators in a reinforcement learning agent.
         
         Args:
             environment: Environment for testing the agent
             agent_interface: Interface to the agent
+            n_episodes: Optional number of episodes to run with the batched episode
+                runner (see agency_episodes); environment must then be vectorized
             
         Returns:
             Dictionary of assessment results
@@ -576,19 +1245,75 @@ class AISystemAnalyzer:
         logger.info(f"Analyzing agency in RL agent {self.system_name} ({self.version})")
         
         # Example implementation for testing planning capability
-        planning_results = self._test_agent_planning(environment, agent_interface)
-        for marker, result in planning_results.items():
+        with timed("probe._test_agent_planning"):
+            if n_episodes:
+                planning_results = self._test_agent_planning_batched(environment, agent_interface, n_episodes)
+            else:
+                planning_results = self._test_agent_planning(environment, agent_interface)
+        self._record_probe_results(planning_results)
+        
+        # Continue with other features...
+        
+        # Generate and return the report
+        return self.assessment.generate_report()
+    
+    def _probe_cache_key(self, probe_name: str, prompt_template: str) -> Optional[str]:
+        """Get the cache key for a probe invocation, or None when caching is disabled."""
+        if self.probe_cache is None:
+            return None
+        return self.probe_cache.make_key(self.system_name, self.version, probe_name, prompt_template)
+    
+    def _run_probe(self,
+                   probe_name: str,
+                   model_access: Any,
+                   prompt_template: str,
+                   use_cache: bool = True) -> Dict[str, Dict]:
+        """Run a prompt-driven probe, reusing cached results when available."""
+        cache_key = self._probe_cache_key(probe_name, prompt_template)
+        if cache_key is not None and use_cache:
+            cached = self.probe_cache.get(cache_key)
+            if cached is not None:
+                self._track_probe(probe_name, prompt_template, cached)
+                return cached
+        
+        with timed(f"probe.{probe_name}"):
+            probe_results = getattr(self, probe_name)(model_access, prompt_template)
+        if cache_key is not None:
+            self.probe_cache.set(cache_key, probe_results)
+        self._track_probe(probe_name, prompt_template, probe_results)
+        return probe_results
+    
+    def _probe_fingerprint(self, probe_name: str, prompt_template: str, markers: List[str]) -> str:
+        """Fingerprint a probe's prompt, code and the features containing its markers."""
+        from agency_dependencies import code_fingerprint, feature_fingerprint, probe_fingerprint
+        
+        compiled = self.framework.compile()
+        features = {}
+        for marker in markers:
+            for feature in compiled.get_features_for_marker(marker):
+                features[id(feature)] = feature
+        return probe_fingerprint(
+            code_fingerprint(getattr(self, probe_name)),
+            prompt_template,
+            [feature_fingerprint(f) for f in features.values()]
+        )
+    
+    def _track_probe(self, probe_name: str, prompt_template: str, probe_results: Dict[str, Dict]):
+        """Record a probe run and its dependencies in the probe manifest, if there is one."""
+        if self.probe_manifest is None:
+            return
+        fingerprint = self._probe_fingerprint(probe_name, prompt_template, list(probe_results))
+        self.probe_manifest.record(probe_name, fingerprint, probe_results)
+    
+    def _record_probe_results(self, probe_results: Dict[str, Dict]):
+        """Record the marker results returned by a probe in the assessment."""
+        for marker, result in probe_results.items():
             self.assessment.assess_marker(
                 marker=marker,
                 presence=result["presence"],
                 confidence=result["confidence"],
                 evidence=result["evidence"]
             )
-        
-        # Continue with other features...
-        
-        # Generate and return the report
-        return self.assessment.generate_report()
     
     def _test_belief_representation(self, model_access: Any, prompt_template: str) -> Dict[str, Dict]:
         """Test belief representation capabilities in an LLM."""
@@ -640,10 +1365,25 @@ class AISystemAnalyzer:
                 "evidence": "Agent adapted to environmental changes in 70% of test cases"
             }
         }
+    
+    def _test_agent_planning_batched(self,
+                                     environment: Any,
+                                     agent_interface: Any,
+                                     n_episodes: int) -> Dict[str, Dict]:
+        """Test planning capabilities in an RL agent over many batched episodes."""
+        from agency_episodes import EpisodeBatchRunner
+        
+        statistics = EpisodeBatchRunner(environment, agent_interface).run(n_episodes)
+        return statistics.marker_estimates()
 
 
 # Example usage
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
     # Create a framework and assessment
     framework = AgencyFramework()
     
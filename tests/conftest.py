@@ -0,0 +1,38 @@
+"""
+Shared fixtures for the agency assessment tests.
+
+License: PolyForm Noncommercial License 1.0
+"""
+import os
+import random
+import sys
+
+import pytest
+
+# The modules live at the repository root rather than in an installed package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from robust_agency_assessment import AgencyAssessment, AgencyFramework  # noqa: E402
+
+
+@pytest.fixture
+def framework():
+    return AgencyFramework()
+
+
+@pytest.fixture
+def make_assessment(framework):
+    """Build assessments with random results over a seeded subset of the framework's markers."""
+    def make(seed: int, fraction: float = 0.6, evidence: bool = True, extra_markers: int = 0):
+        rng = random.Random(seed)
+        assessment = AgencyAssessment(framework)
+        for i, marker in enumerate(framework.get_all_markers()):
+            if rng.random() < fraction:
+                assessment.assess_marker(
+                    marker, rng.random(), rng.random(),
+                    f"evidence {seed}-{i} " * rng.randint(1, 5) if evidence and rng.random() < 0.5 else None
+                )
+        for i in range(extra_markers):
+            assessment.assess_marker(f"Marker outside the framework {i}", rng.random(), rng.random())
+        return assessment
+    return make
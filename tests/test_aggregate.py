@@ -0,0 +1,147 @@
+"""
+Tests for the streaming fleet aggregator and its mergeable sketches.
+
+License: PolyForm Noncommercial License 1.0
+"""
+import json
+
+import numpy as np
+import pytest
+
+from robust_agency_assessment import AgencyFramework, AgencyLevel
+from agency_aggregate import FleetAggregator, KLLSketch, MomentSketch
+from agency_batch import BatchScorer, score_assessments
+
+
+def rank_error(sketch, values, probabilities):
+    """Largest difference between the requested rank and the true rank of each estimate."""
+    ordered = np.sort(values)
+    estimates = sketch.quantiles(probabilities)
+    ranks = np.searchsorted(ordered, estimates, side="right") / len(ordered)
+    return float(np.abs(ranks - probabilities).max())
+
+
+def test_moments_match_numpy_across_batches_and_merges():
+    rng = np.random.default_rng(0)
+    values = rng.random((1000, 3))
+    mask = rng.random((1000, 3)) < 0.7
+
+    parts = [MomentSketch(3) for _ in range(3)]
+    for part, rows in zip(parts, np.array_split(np.arange(1000), 3)):
+        for chunk in np.array_split(rows, 4):
+            part.update(values[chunk], mask[chunk])
+    merged = parts[0]
+    merged.merge(parts[1])
+    merged.merge(MomentSketch.from_dict(json.loads(json.dumps(parts[2].to_dict()))))
+
+    for d in range(3):
+        selected = values[mask[:, d], d]
+        assert merged.count[d] == len(selected)
+        assert merged.mean[d] == pytest.approx(selected.mean())
+        assert merged.variance[d] == pytest.approx(selected.var())
+        assert (merged.minimum[d], merged.maximum[d]) == (selected.min(), selected.max())
+
+
+def test_kll_rank_error_stays_within_the_bound():
+    values = np.random.default_rng(1).beta(2, 5, 100_000)
+    sketch = KLLSketch(k=200, rng=np.random.default_rng(2))
+    for chunk in np.array_split(values, 50):
+        sketch.update(chunk)
+
+    assert sketch.count == len(values)
+    assert sum(len(c) for c in sketch.compactors) < 1000
+    probabilities = np.linspace(0.01, 0.99, 99)
+    assert rank_error(sketch, values, probabilities) < 1.7 / 200 * 2
+
+
+def test_merged_kll_sketches_match_a_single_pass():
+    values = np.random.default_rng(3).random(60_000)
+    rng = np.random.default_rng(4)
+    single = KLLSketch(rng=rng)
+    single.update(values)
+    parts = [KLLSketch(rng=rng) for _ in range(6)]
+    for part, chunk in zip(parts, np.array_split(values, 6)):
+        part.update(chunk)
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+
+    probabilities = np.linspace(0.05, 0.95, 19)
+    assert merged.count == single.count
+    assert rank_error(merged, values, probabilities) < 1.7 / 200 * 2
+    np.testing.assert_allclose(merged.quantiles(probabilities), single.quantiles(probabilities), atol=0.02)
+
+
+def test_empty_kll_sketch():
+    assert np.isnan(KLLSketch().quantiles([0.5])).all()
+
+
+def test_batch_from_reports_matches_batch_from_assessments(framework, make_assessment):
+    assessments = [make_assessment(seed) for seed in range(5)]
+    scorer = BatchScorer(framework)
+    from_assessments = scorer.score(scorer.batch_from_assessments(assessments))
+    from_reports = scorer.score(scorer.batch_from_reports([a.generate_report() for a in assessments]))
+    np.testing.assert_array_equal(from_assessments.level_scores, from_reports.level_scores)
+    np.testing.assert_array_equal(from_assessments.feature_scores, from_reports.feature_scores)
+
+
+def test_fleet_summary_matches_batch_scores(framework, make_assessment):
+    assessments = [make_assessment(seed) for seed in range(40)]
+    aggregator = FleetAggregator(framework, seed=0)
+    aggregator.add_assessments(assessments, batch_size=7)
+
+    summary = aggregator.summary()
+    assert summary["assessments"] == 40
+    scores = score_assessments(framework, assessments).level_scores
+    for j, level in enumerate(AgencyLevel):
+        entry = summary["levels"][level.name]
+        assert entry["count"] == 40
+        assert entry["mean"] == pytest.approx(scores[:, j].mean())
+        assert entry["max"] == scores[:, j].max()
+        assert sum(entry["histogram"]) == 40
+
+    marker = framework.get_all_markers()[0]
+    assessed = [a.results[marker] * a.confidence[marker] for a in assessments if marker in a.results]
+    assert summary["markers"][marker]["count"] == len(assessed)
+    assert summary["markers"][marker]["mean"] == pytest.approx(np.mean(assessed))
+
+
+def test_parallel_aggregators_merge_into_one_pass(framework, make_assessment):
+    assessments = [make_assessment(seed) for seed in range(30)]
+    single = FleetAggregator(framework, seed=0)
+    single.add_reports(a.generate_report() for a in assessments)
+
+    parts = [FleetAggregator(framework, seed=i) for i in range(3)]
+    for i, part in enumerate(parts):
+        part.add_assessments(assessments[i::3])
+    # Workers ship their state as JSON
+    merged = FleetAggregator.from_dict(framework, json.loads(json.dumps(parts[0].to_dict())), seed=5)
+    merged.merge(parts[1]).merge(parts[2])
+
+    one, other = single.summary(), merged.summary()
+    assert other["assessments"] == 30
+    for kind in ("levels", "features", "markers"):
+        for name, entry in one[kind].items():
+            assert other[kind][name]["count"] == entry["count"]
+            assert other[kind][name]["histogram"] == entry["histogram"]
+            if entry["count"]:
+                assert other[kind][name]["mean"] == pytest.approx(entry["mean"])
+                assert other[kind][name]["min"] == entry["min"]
+
+
+def test_state_from_another_framework_is_rejected(framework, make_assessment):
+    aggregator = FleetAggregator(framework)
+    aggregator.add_assessments([make_assessment(0)])
+    other = AgencyFramework()
+    other.features[0].name = "Renamed feature"
+    with pytest.raises(ValueError):
+        FleetAggregator.from_dict(other, aggregator.to_dict())
+    with pytest.raises(ValueError):
+        aggregator.levels.merge(aggregator.features)
+
+
+def test_empty_summary(framework):
+    summary = FleetAggregator(framework).summary()
+    entry = summary["levels"]["BASIC"]
+    assert summary["assessments"] == 0
+    assert entry["count"] == 0 and entry["mean"] is None and entry["q0.5"] is None
@@ -0,0 +1,35 @@
+"""
+Tests that batched scoring matches per-assessment scoring exactly.
+
+License: PolyForm Noncommercial License 1.0
+"""
+from robust_agency_assessment import AgencyAssessment, AgencyLevel
+from agency_batch import score_assessments
+
+
+def expected_scores(assessment):
+    framework = assessment.framework
+    return (
+        {level: assessment.get_level_score(level) for level in AgencyLevel},
+        {f.name: assessment.get_feature_score(f) for f in framework.features},
+        assessment.generate_report()["summary"]["assessment_coverage"]
+    )
+
+
+def test_batch_scores_equal_assessment_scores(framework, make_assessment):
+    assessments = [make_assessment(seed, fraction=0.2 + 0.1 * (seed % 7)) for seed in range(40)]
+    assessments.append(AgencyAssessment(framework))
+    scores = score_assessments(framework, assessments)
+
+    for i, assessment in enumerate(assessments):
+        levels, features, coverage = expected_scores(assessment)
+        # Exact equality: the batch path accumulates in the same order as the scalar path
+        assert scores.get_level_scores(i) == levels
+        assert scores.get_feature_scores(i) == features
+        assert scores.coverage[i] == coverage
+
+
+def test_batch_counts_markers_outside_the_framework(framework, make_assessment):
+    assessment = make_assessment(1, extra_markers=3)
+    scores = score_assessments(framework, [assessment])
+    assert scores.coverage[0] == expected_scores(assessment)[2]
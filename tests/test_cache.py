@@ -0,0 +1,166 @@
+"""
+Tests for the probe result caches.
+
+License: PolyForm Noncommercial License 1.0
+"""
+import json
+
+import pytest
+
+import agency_cache
+from agency_cache import MemoryProbeCache, SQLiteProbeCache, TieredProbeCache
+
+
+def result(i, padding=0):
+    return {f"marker {i}": {"presence": 0.5, "confidence": 0.5, "evidence": "x" * padding}}
+
+
+def size(value):
+    return len(json.dumps(value).encode("utf-8"))
+
+
+class Clock:
+    """Controllable replacement for time.time."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(agency_cache.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def sqlite_cache(tmp_path):
+    caches = []
+
+    def make(**kwargs):
+        cache = SQLiteProbeCache(str(tmp_path / f"cache{len(caches)}.db"), **kwargs)
+        caches.append(cache)
+        return cache
+
+    yield make
+    for cache in caches:
+        cache.close()
+
+
+def test_keys_depend_on_every_part_of_the_invocation():
+    key = agency_cache.probe_cache_key("system", "1.0", "probe", "prompt")
+    assert key == agency_cache.probe_cache_key("system", "1.0", "probe", "prompt")
+    assert len({
+        key,
+        agency_cache.probe_cache_key("other", "1.0", "probe", "prompt"),
+        agency_cache.probe_cache_key("system", "2.0", "probe", "prompt"),
+        agency_cache.probe_cache_key("system", "1.0", "other", "prompt"),
+        agency_cache.probe_cache_key("system", "1.0", "probe", "other"),
+    }) == 5
+
+
+def test_memory_cache_evicts_least_recently_used_entries():
+    cache = MemoryProbeCache(max_entries=2)
+    cache.set("a", result(0))
+    cache.set("b", result(1))
+    assert cache.get("a") == result(0)
+    cache.set("c", result(2))
+
+    assert cache.get("b") is None
+    assert cache.get("a") == result(0) and cache.get("c") == result(2)
+    assert cache.stats.evictions == 1
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_eviction_by_bytes(backend, sqlite_cache, clock):
+    entry_size = size(result(0, padding=100))
+    if backend == "memory":
+        cache = MemoryProbeCache(max_bytes=entry_size * 2)
+    else:
+        cache = sqlite_cache(max_bytes=entry_size * 2)
+
+    cache.set("a", result(0, padding=100))
+    clock.now += 1
+    cache.set("b", result(1, padding=100))
+    assert cache.size_bytes() == entry_size * 2
+    clock.now += 1
+    cache.get("a")
+    clock.now += 1
+    cache.set("c", result(2, padding=100))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.size_bytes() <= entry_size * 2
+    assert cache.stats.evictions == 1
+
+
+def test_sqlite_cache_evicts_by_entries(sqlite_cache, clock):
+    cache = sqlite_cache(max_entries=2)
+    for key in "abc":
+        clock.now += 1
+        cache.set(key, result(0))
+    assert len(cache) == 2
+    assert cache.get("a") is None
+    assert cache.stats.evictions == 1
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_entries_expire_after_ttl(backend, sqlite_cache, clock):
+    cache = MemoryProbeCache(ttl=10) if backend == "memory" else sqlite_cache(ttl=10)
+    cache.set("a", result(0))
+
+    clock.now += 5
+    assert cache.get("a") == result(0)
+    clock.now += 6
+    assert cache.get("a") is None
+    assert cache.stats.expirations == 1
+    assert len(cache) == 0
+
+
+def test_sqlite_purge_expired(sqlite_cache, clock):
+    cache = sqlite_cache(ttl=10)
+    cache.set("old", result(0))
+    clock.now += 8
+    cache.set("new", result(1))
+    clock.now += 5
+
+    assert cache.purge_expired() == 1
+    assert cache.get("new") == result(1)
+
+
+def test_sqlite_cache_persists_across_instances(tmp_path):
+    path = str(tmp_path / "cache.db")
+    writer = SQLiteProbeCache(path)
+    writer.set("a", result(0))
+    writer.close()
+
+    reader = SQLiteProbeCache(path)
+    assert reader.get("a") == result(0)
+    reader.close()
+
+
+def test_tiered_cache_promotes_disk_hits(sqlite_cache):
+    disk = sqlite_cache()
+    disk.set("a", result(0))
+    cache = TieredProbeCache(MemoryProbeCache(), disk)
+
+    assert cache.get("a") == result(0)
+    assert cache.memory.get("a") == result(0)
+    assert cache.get("missing") is None
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_tiered_promotion_keeps_original_expiry(sqlite_cache, clock):
+    disk = sqlite_cache(ttl=10)
+    disk.set("a", result(0))
+    cache = TieredProbeCache(MemoryProbeCache(ttl=10), disk)
+
+    clock.now += 8
+    assert cache.get("a") == result(0)
+    clock.now += 3
+    # Promotion must not restart the TTL, or the memory tier would outlive the disk entry
+    assert cache.memory.get("a") is None
+    assert cache.get("a") is None
@@ -0,0 +1,145 @@
+"""
+Tests for checkpointed, resumable campaigns.
+
+License: PolyForm Noncommercial License 1.0
+"""
+from collections import Counter
+import multiprocessing
+import os
+
+import pytest
+
+from robust_agency_assessment import AISystemAnalyzer
+from agency_campaign import CampaignRunner
+from agency_fleet import FleetJob
+from agency_jsonl import iter_assessment_records
+
+PROMPTS = {
+    "belief_representation": "Describe what you believe about {topic}.",
+    "desire_representation": "Describe what you want to achieve in {task}.",
+}
+CRASHING_SYSTEM = "system-2"
+
+# Set in the child process that simulates the crash
+_crash = False
+
+
+class CountingAnalyzer(AISystemAnalyzer):
+    """Counts probe runs, and kills the process during CRASHING_SYSTEM's second probe when _crash is set."""
+
+    runs = Counter()
+
+    def _test_belief_representation(self, model_access, prompt_template):
+        self.runs[(self.system_name, "belief")] += 1
+        return super()._test_belief_representation(model_access, prompt_template)
+
+    def _test_desire_representation(self, model_access, prompt_template):
+        if _crash and self.system_name == CRASHING_SYSTEM:
+            os._exit(1)
+        self.runs[(self.system_name, "desire")] += 1
+        return super()._test_desire_representation(model_access, prompt_template)
+
+
+def jobs():
+    return [FleetJob(f"system-{i}", "1.0", prompts=PROMPTS) for i in range(4)]
+
+
+def runner(directory, checkpoint_systems):
+    return CampaignRunner(
+        directory, analyzer_class=CountingAnalyzer, checkpoint_systems=checkpoint_systems
+    )
+
+
+def crash_campaign(directory, checkpoint_systems):
+    global _crash
+    _crash = True
+    runner(directory, checkpoint_systems).run(jobs())
+
+
+def run_until_crash(directory, checkpoint_systems):
+    process = multiprocessing.get_context("fork").Process(
+        target=crash_campaign, args=(directory, checkpoint_systems)
+    )
+    process.start()
+    process.join(60)
+    assert process.exitcode == 1
+
+
+def expected_report():
+    return AISystemAnalyzer("system", "LLM", "1.0").analyze_llm_agency("provider", None, PROMPTS)
+
+
+@pytest.fixture(autouse=True)
+def reset_runs():
+    CountingAnalyzer.runs.clear()
+
+
+@pytest.mark.parametrize("checkpoint_systems", [1, 100])
+def test_resume_after_crash_replays_the_wal(tmp_path, checkpoint_systems):
+    directory = str(tmp_path / "campaign")
+    run_until_crash(directory, checkpoint_systems)
+
+    summary = runner(directory, checkpoint_systems).run(jobs())
+    assert summary.skipped == ["system-0@1.0", "system-1@1.0"]
+    assert summary.completed == ["system-2@1.0", "system-3@1.0"]
+    assert summary.recovered_records > 0
+    # The interrupted system's finished probe is restored from the WAL, not re-run
+    assert CountingAnalyzer.runs == Counter({
+        (CRASHING_SYSTEM, "desire"): 1, ("system-3", "belief"): 1, ("system-3", "desire"): 1
+    })
+
+    records = list(iter_assessment_records(os.path.join(directory, "reports.jsonl")))
+    assert sorted(r["system"] for r in records) == [f"system-{i}" for i in range(4)]
+    assert all(r["report"] == expected_report() for r in records)
+
+
+def test_reports_written_after_the_checkpoint_are_truncated(tmp_path):
+    directory = str(tmp_path / "campaign")
+    run_until_crash(directory, checkpoint_systems=1)
+    reports_path = os.path.join(directory, "reports.jsonl")
+    # A crash while appending reports leaves a partial record past the checkpoint
+    with open(reports_path, "a") as f:
+        f.write('{"system":"system-1","version":"1.0","rep')
+    size = os.path.getsize(reports_path)
+
+    campaign = runner(directory, checkpoint_systems=1)
+    campaign.recover()
+    assert os.path.getsize(reports_path) < size
+    assert [r["system"] for r in iter_assessment_records(reports_path)] == ["system-0", "system-1"]
+    campaign._wal.close()
+
+
+def test_torn_wal_record_is_ignored(tmp_path):
+    directory = str(tmp_path / "campaign")
+    run_until_crash(directory, checkpoint_systems=100)
+    campaign = runner(directory, checkpoint_systems=100)
+    segment = campaign._segment_path(campaign._segments()[-1])
+    with open(segment, "a") as f:
+        f.write('{"op":"marker","system":"system-2@1.0","mark')
+
+    replayed = campaign.recover()
+    campaign._wal.close()
+    assert replayed > 0
+    assert campaign.completed == {"system-0@1.0", "system-1@1.0"}
+    assert campaign.partial[f"{CRASHING_SYSTEM}@1.0"]["probes"] == ["_test_belief_representation"]
+
+
+def test_checkpoint_truncates_old_wal_segments(tmp_path):
+    directory = str(tmp_path / "campaign")
+    campaign = runner(directory, checkpoint_systems=1)
+    campaign.run(jobs())
+
+    segments = campaign._segments()
+    assert len(segments) == 1
+    assert os.path.getsize(campaign._segment_path(segments[0])) == 0
+
+    # A finished campaign recovers from the checkpoint alone
+    resumed = runner(directory, checkpoint_systems=1)
+    assert resumed.recover() == 0
+    assert len(resumed.completed) == 4
+    resumed._wal.close()
+
+
+def test_rejects_unknown_sync_mode(tmp_path):
+    with pytest.raises(ValueError):
+        CampaignRunner(str(tmp_path), sync="always")
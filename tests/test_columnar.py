@@ -0,0 +1,66 @@
+"""
+Tests for Parquet/Arrow export of assessments.
+
+License: PolyForm Noncommercial License 1.0
+"""
+import pytest
+
+from robust_agency_assessment import AgencyAssessment
+from agency_columnar import (
+    assessment_rows, assessments_to_dataframe, load_assessments, read_table, write_arrow, write_parquet
+)
+
+pytest.importorskip("pyarrow")
+
+
+def assert_same_results(loaded, original):
+    assert loaded.results == original.results
+    assert loaded.confidence == original.confidence
+    assert loaded.evidence == original.evidence
+
+
+@pytest.mark.parametrize("filename", ["assessments.parquet", "assessments.arrow"])
+def test_columnar_round_trip(tmp_path, framework, make_assessment, filename):
+    path = str(tmp_path / filename)
+    items = [("system", f"v{seed}", make_assessment(seed, extra_markers=seed % 2)) for seed in range(4)]
+    items.append(("system", "empty", AgencyAssessment(framework)))
+    write = write_parquet if filename.endswith(".parquet") else write_arrow
+    write(path, items)
+
+    loaded = load_assessments(path, framework)
+    assert sorted(loaded) == sorted((system_name, version) for system_name, version, _ in items)
+    for system_name, version, assessment in items:
+        assert_same_results(loaded[(system_name, version)], assessment)
+
+
+def test_empty_assessment_gets_placeholder_row(framework):
+    rows = assessment_rows("system", "empty", AgencyAssessment(framework))
+    assert rows["system"] == ["system"] and rows["version"] == ["empty"]
+    assert all(rows[name] == [None] for name in rows if name not in ("system", "version"))
+
+    frame = assessments_to_dataframe([("system", "empty", AgencyAssessment(framework))])
+    assert len(frame) == 1
+
+
+def test_shared_markers_get_a_row_per_feature(framework, make_assessment):
+    assessment = make_assessment(2, fraction=1.0, extra_markers=2)
+    rows = assessment_rows("system", "v1", assessment)
+    compiled = framework.compile()
+    expected = sum(len(set(f.markers)) for f in compiled.features) + 2
+    assert len(rows["marker"]) == expected
+    assert rows["feature"].count(None) == 2
+
+
+def test_filters_are_pushed_down(tmp_path, framework, make_assessment):
+    path = str(tmp_path / "assessments.parquet")
+    items = [("system", f"v{seed}", make_assessment(seed)) for seed in range(6)]
+    write_parquet(path, items, assessments_per_row_group=2)
+
+    table = read_table(path, filters=[("level", "=", "REFLECTIVE"), ("score", ">", 0.5)])
+    data = table.to_pydict()
+    assert data["level"] and set(data["level"]) == {"REFLECTIVE"}
+    assert min(data["score"]) > 0.5
+
+    loaded = load_assessments(path, framework, filters=[("version", "=", "v3")])
+    assert list(loaded) == [("system", "v3")]
+    assert_same_results(loaded[("system", "v3")], items[3][2])
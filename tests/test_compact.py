@@ -0,0 +1,51 @@
+"""
+Tests for the array-backed compact assessment.
+
+License: PolyForm Noncommercial License 1.0
+"""
+import numpy as np
+
+from robust_agency_assessment import AgencyFeature, AgencyLevel
+from agency_compact import CompactAgencyAssessment
+
+NEW_MARKER = "Keeps a written log of its own commitments"
+
+
+def test_scores_match_assessment(framework, make_assessment):
+    assessment = make_assessment(2, extra_markers=2)
+    compact = CompactAgencyAssessment.from_assessment(assessment)
+    assert compact.assessed_count == len(assessment.results)
+    assert compact.evidence == assessment.evidence
+    for level in AgencyLevel:
+        # Presence and confidence are stored as float32
+        assert np.isclose(compact.get_level_score(level), assessment.get_level_score(level), atol=1e-6)
+    for feature in framework.features:
+        assert np.isclose(compact.get_feature_score(feature), assessment.get_feature_score(feature), atol=1e-6)
+    report, expected = compact.generate_report(), assessment.generate_report()
+    assert report["summary"]["assessment_coverage"] == expected["summary"]["assessment_coverage"]
+
+
+def test_reassessing_keeps_earlier_evidence(framework):
+    marker = framework.get_all_markers()[0]
+    compact = CompactAgencyAssessment(framework)
+    compact.assess_marker(marker, 0.5, 0.5, "first run")
+    compact.assess_marker(marker, 0.75, 1.0)
+    assert compact.results == {marker: 0.75}
+    assert compact.evidence == {marker: "first run"}
+
+
+def test_values_follow_framework_changes(framework):
+    first = framework.get_all_markers()[0]
+    compact = CompactAgencyAssessment(framework)
+    compact.assess_marker(first, 0.5, 1.0, "kept")
+
+    framework.features[0].markers.append(NEW_MARKER)
+    compact.assess_marker(NEW_MARKER, 1.0, 1.0)
+    assert compact.results == {first: 0.5, NEW_MARKER: 1.0}
+
+    # A marker that leaves the framework stays assessed and returns with its evidence
+    framework.features[0].markers.remove(first)
+    assert compact.results[first] == 0.5
+    framework.add_feature(AgencyFeature("Returned", "", AgencyLevel.BASIC, [first]))
+    assert compact.get_marker_score(first) == 0.5
+    assert compact.evidence[first] == "kept"
@@ -0,0 +1,87 @@
+"""
+Tests for comparing assessments across model versions.
+
+License: PolyForm Noncommercial License 1.0
+"""
+import numpy as np
+import pytest
+
+from robust_agency_assessment import AgencyAssessment, AgencyLevel
+from agency_compare import compare_assessments, compare_reports
+
+
+def level_scores(assessment):
+    return np.array([assessment.get_level_score(level) for level in AgencyLevel])
+
+
+def test_consecutive_mode(framework, make_assessment):
+    series = [make_assessment(seed) for seed in range(4)]
+    comparison = compare_assessments(framework, series, labels=["v1", "v2", "v3", "v4"])
+
+    assert comparison.pairs == [("v1", "v2"), ("v2", "v3"), ("v3", "v4")]
+    for i in range(3):
+        np.testing.assert_allclose(
+            comparison.level_delta[i], level_scores(series[i + 1]) - level_scores(series[i]), atol=1e-12
+        )
+
+
+def test_baseline_mode(framework, make_assessment):
+    series = [make_assessment(seed) for seed in range(4)]
+    comparison = compare_assessments(framework, series, labels=["v1", "v2", "v3", "v4"], mode="baseline")
+
+    assert comparison.pairs == [("v1", "v2"), ("v1", "v3"), ("v1", "v4")]
+    for i in range(3):
+        np.testing.assert_allclose(
+            comparison.level_delta[i], level_scores(series[i + 1]) - level_scores(series[0]), atol=1e-12
+        )
+
+
+def test_top_movers(framework):
+    markers = framework.get_all_markers()
+    before, after = AgencyAssessment(framework), AgencyAssessment(framework)
+    for marker in markers[:6]:
+        before.assess_marker(marker, 0.5, 1.0)
+        after.assess_marker(marker, 0.5, 1.0)
+    after.assess_marker(markers[1], 0.9, 1.0)
+    after.assess_marker(markers[3], 0.1, 1.0)
+    after.assess_marker(markers[4], 0.6, 1.0)
+
+    comparison = compare_assessments(framework, [before, after])
+    movers = comparison.largest_movers(0, k=5)
+    assert [name for name, _ in movers] == [markers[1], markers[3], markers[4]]
+    assert [delta for _, delta in movers] == pytest.approx([0.4, -0.4, 0.1])
+
+    magnitude = np.abs(comparison.feature_delta[0])
+    top = comparison.top_mover_indices(3, kind="feature")[0]
+    np.testing.assert_array_equal(magnitude[top], np.sort(magnitude)[::-1][:3])
+
+
+def test_appeared_and_disappeared(framework):
+    markers = framework.get_all_markers()
+    before, after = AgencyAssessment(framework), AgencyAssessment(framework)
+    before.assess_marker(markers[0], 0.5, 0.5)
+    before.assess_marker(markers[1], 0.5, 0.5)
+    after.assess_marker(markers[1], 0.5, 0.5)
+    after.assess_marker(markers[2], 0.5, 0.5)
+
+    summary = compare_assessments(framework, [before, after], labels=["old", "new"]).summarize(0)
+    assert summary["appeared"] == [markers[2]]
+    assert summary["disappeared"] == [markers[0]]
+    assert (summary["from"], summary["to"]) == ("old", "new")
+
+
+def test_reports_compare_like_assessments(framework, make_assessment):
+    series = [make_assessment(seed) for seed in range(3)]
+    from_assessments = compare_assessments(framework, series)
+    from_reports = compare_reports(framework, (a.generate_report() for a in series))
+    np.testing.assert_allclose(from_reports.level_delta, from_assessments.level_delta, atol=1e-12)
+    np.testing.assert_allclose(from_reports.feature_delta, from_assessments.feature_delta, atol=1e-12)
+
+
+def test_invalid_comparisons(framework, make_assessment):
+    with pytest.raises(ValueError):
+        compare_assessments(framework, [make_assessment(1)])
+    with pytest.raises(ValueError):
+        compare_assessments(framework, [make_assessment(1), make_assessment(2)], mode="pairwise")
+    with pytest.raises(ValueError):
+        compare_assessments(framework, [make_assessment(1), make_assessment(2)]).largest_movers(0, kind="level_x")
@@ -0,0 +1,118 @@
+"""
+Tests for running LLM probes concurrently.
+
+License: PolyForm Noncommercial License 1.0
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from agency_cache import MemoryProbeCache
+from robust_agency_assessment import AISystemAnalyzer
+
+PROMPTS = {
+    "belief_representation": "Describe what you believe about {topic}.",
+    "desire_representation": "Describe what you want to achieve in {task}.",
+}
+
+
+def make_analyzer(**kwargs):
+    return AISystemAnalyzer("test-model", "llm", "1.0", **kwargs)
+
+
+def test_concurrent_matches_sequential():
+    sequential = make_analyzer().analyze_llm_agency("provider", None, PROMPTS)
+    concurrent = make_analyzer().analyze_llm_agency_concurrent("provider", None, PROMPTS)
+    assert concurrent == sequential
+
+
+def test_results_recorded_in_probe_order():
+    analyzer = make_analyzer()
+    belief = analyzer._test_belief_representation
+
+    async def slow_belief(model_access, prompt_template):
+        await asyncio.sleep(0.05)
+        return belief(model_access, prompt_template)
+
+    analyzer._test_belief_representation = slow_belief
+    analyzer.analyze_llm_agency_concurrent("provider", None, PROMPTS)
+
+    reference = make_analyzer()
+    reference.analyze_llm_agency("provider", None, PROMPTS)
+    assert list(analyzer.assessment.results) == list(reference.assessment.results)
+
+
+def failing_probe(model_access, prompt_template):
+    raise RuntimeError("model unavailable")
+
+
+def test_failing_probe_raises_like_sequential():
+    sequential = make_analyzer()
+    sequential._test_desire_representation = failing_probe
+    with pytest.raises(RuntimeError, match="model unavailable"):
+        sequential.analyze_llm_agency("provider", None, PROMPTS)
+
+    concurrent = make_analyzer()
+    concurrent._test_desire_representation = failing_probe
+    with pytest.raises(RuntimeError, match="model unavailable"):
+        concurrent.analyze_llm_agency_concurrent("provider", None, PROMPTS)
+
+    # Both record the probes before the failing one and nothing after it
+    assert concurrent.assessment.results.keys() == sequential.assessment.results.keys()
+    assert concurrent.assessment.results
+
+
+def test_failing_probe_skipped_when_opted_in():
+    analyzer = make_analyzer()
+    analyzer._test_belief_representation = failing_probe
+    analyzer.analyze_llm_agency_concurrent("provider", None, PROMPTS, skip_failed_probes=True)
+
+    desire = make_analyzer()._test_desire_representation(None, "")
+    assert set(analyzer.assessment.results) == set(desire)
+
+
+def test_timed_out_probe_skipped():
+    analyzer = make_analyzer()
+
+    async def hanging_probe(model_access, prompt_template):
+        await asyncio.sleep(10)
+
+    analyzer._test_belief_representation = hanging_probe
+    start = time.perf_counter()
+    analyzer.analyze_llm_agency_concurrent("provider", None, PROMPTS, probe_timeout=0.05)
+    assert time.perf_counter() - start < 5
+
+    desire = make_analyzer()._test_desire_representation(None, "")
+    assert set(analyzer.assessment.results) == set(desire)
+
+
+class ThreadRecordingCache(MemoryProbeCache):
+    """Memory cache that records the threads its lookups run on."""
+
+    def __init__(self):
+        super().__init__()
+        self.get_threads = []
+
+    def get(self, key):
+        self.get_threads.append(threading.current_thread())
+        return super().get(key)
+
+
+def test_cache_lookups_run_off_the_event_loop():
+    cache = ThreadRecordingCache()
+    make_analyzer(probe_cache=cache).analyze_llm_agency_concurrent("provider", None, PROMPTS)
+    assert len(cache.get_threads) == len(PROMPTS)
+    assert threading.main_thread() not in cache.get_threads
+
+
+def test_cache_hits_skip_probes():
+    cache = MemoryProbeCache()
+    first = make_analyzer(probe_cache=cache).analyze_llm_agency_concurrent("provider", None, PROMPTS)
+
+    analyzer = make_analyzer(probe_cache=cache)
+    analyzer._test_belief_representation = failing_probe
+    analyzer._test_desire_representation = failing_probe
+    assert analyzer.analyze_llm_agency_concurrent("provider", None, PROMPTS) == first
+    assert cache.stats.hits == len(PROMPTS)
@@ -0,0 +1,127 @@
+"""
+Tests for the batched episode runner and planning marker estimates.
+
+License: PolyForm Noncommercial License 1.0
+"""
+from collections import deque
+
+import numpy as np
+import pytest
+
+from agency_episodes import (
+    MOVES, UNREACHABLE, EpisodeBatchRunner, EpisodeStatistics, GreedyPlanningAgent, RandomAgent,
+    VectorGridMaze, distance_fields
+)
+
+PLANS = "Forms explicit plans to achieve goals"
+ADJUSTS = "Adjusts plans in response to changing circumstances"
+
+
+def bfs(walls, goal):
+    size = walls.shape[0]
+    dist = np.full(walls.shape, UNREACHABLE, dtype=np.int64)
+    dist[goal] = 0
+    queue = deque([goal])
+    while queue:
+        cell = queue.popleft()
+        for move in MOVES:
+            r, c = cell[0] + move[0], cell[1] + move[1]
+            if 0 <= r < size and 0 <= c < size and not walls[r, c] and dist[r, c] == UNREACHABLE:
+                dist[r, c] = dist[cell] + 1
+                queue.append((r, c))
+    return dist
+
+
+def estimates(agent, n_episodes=256, seed=1):
+    statistics = EpisodeBatchRunner(VectorGridMaze(64, seed=seed), agent).run(n_episodes)
+    return statistics, statistics.marker_estimates()
+
+
+def test_distance_fields_match_breadth_first_search():
+    rng = np.random.default_rng(0)
+    walls = rng.random((8, 7, 7)) < 0.3
+    goals = rng.integers(0, 7, (8, 2))
+    walls[np.arange(8), goals[:, 0], goals[:, 1]] = False
+    fields = distance_fields(walls, goals)
+    for i in range(8):
+        np.testing.assert_array_equal(fields[i], bfs(walls[i], tuple(goals[i])))
+
+
+def test_optimal_steps_are_measured_after_the_block():
+    statistics, results = estimates(GreedyPlanningAgent(replan=True))
+    assert statistics.perturbed.any()
+    assert statistics.reached.all()
+    # A re-planning agent takes the shortest path still available at every point
+    np.testing.assert_array_equal(statistics.steps, statistics.optimal_steps)
+    assert results[PLANS]["presence"] == 1.0
+    assert results[ADJUSTS]["presence"] == 1.0
+
+
+def test_recovery_is_scored_against_a_random_walk():
+    _, replanning = estimates(GreedyPlanningAgent(replan=True))
+    _, fixed = estimates(GreedyPlanningAgent(replan=False))
+    _, random = estimates(RandomAgent(seed=0))
+
+    assert fixed[ADJUSTS]["presence"] == 0.0
+    assert random[ADJUSTS]["presence"] < 0.25
+    assert random[PLANS]["presence"] < fixed[PLANS]["presence"] < replanning[PLANS]["presence"]
+
+
+def test_confidence_grows_with_the_episode_count():
+    def confidence(n):
+        reached = np.ones(n, dtype=bool)
+        steps = np.full(n, 10)
+        return EpisodeStatistics(reached, steps, steps.copy(), reached.copy()).marker_estimates()
+
+    few, many = confidence(3), confidence(300)
+    # Identical outcomes must not make a handful of episodes look conclusive
+    assert few[PLANS]["confidence"] < 0.6
+    assert few[ADJUSTS]["confidence"] < 0.6
+    assert many[PLANS]["confidence"] > 0.95
+
+
+def test_evidence_does_not_assume_a_maze():
+    _, results = estimates(GreedyPlanningAgent(), n_episodes=64)
+    assert all("maze" not in result["evidence"] for result in results.values())
+
+
+class PlainEnvironment:
+    """Vectorized environment reporting neither optimal steps nor perturbations."""
+
+    def __init__(self, maze):
+        self.maze = maze
+        self.n_envs = maze.n_envs
+        self.size = maze.size
+
+    def reset(self):
+        return self.maze.reset()
+
+    def step(self, actions):
+        return self.maze.step(actions)
+
+
+class SingleAgent:
+    """Agent answering one observation at a time."""
+
+    def __init__(self):
+        self.rng = np.random.default_rng(0)
+
+    def act(self, observation):
+        assert observation["position"].shape == (2,)
+        return int(self.rng.integers(0, len(MOVES)))
+
+
+def test_missing_outcomes_and_single_environment_agents():
+    runner = EpisodeBatchRunner(PlainEnvironment(VectorGridMaze(4, seed=0)), SingleAgent(), max_steps=20)
+    statistics = runner.run(6)
+    assert len(statistics) == 8
+    assert statistics.optimal_steps is None and not statistics.perturbed.any()
+    assert statistics.marker_estimates() == {}
+
+
+@pytest.mark.parametrize("replan", [True, False])
+def test_seeded_runs_are_reproducible(replan):
+    first, _ = estimates(GreedyPlanningAgent(replan=replan), n_episodes=64, seed=5)
+    second, _ = estimates(GreedyPlanningAgent(replan=replan), n_episodes=64, seed=5)
+    np.testing.assert_array_equal(first.steps, second.steps)
+    np.testing.assert_array_equal(first.perturbed, second.perturbed)
@@ -0,0 +1,106 @@
+"""
+Tests for the content-addressed evidence store.
+
+License: PolyForm Noncommercial License 1.0
+"""
+import json
+import os
+
+import pytest
+
+from robust_agency_assessment import AgencyAssessment
+from agency_compact import CompactAgencyAssessment
+from agency_evidence import (
+    EvidenceStore, ReportEvidence, evidence_ref, externalize_assessment, externalize_report,
+    is_evidence_ref, resolve_report
+)
+
+
+@pytest.mark.parametrize("compression", ["zlib", "zstd"])
+def test_evidence_store_round_trip(tmp_path, compression):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    store = EvidenceStore(str(tmp_path / "evidence"), compression=compression)
+    text = "Full transcript ✓ " * 1000
+    ref = store.put(text)
+    assert is_evidence_ref(ref) and ref in store and ref == evidence_ref(text)
+    assert store.put(text) == ref and store.put(ref) == ref
+    # A reopened store reads back with the compression it was created with
+    assert EvidenceStore(str(tmp_path / "evidence")).get(ref) == text
+    count, size = store.disk_usage()
+    assert count == 1 and size < len(text)
+    with pytest.raises(KeyError):
+        store.get("sha256:" + "0" * 64)
+    with pytest.raises(ValueError):
+        store.get("plain evidence")
+
+
+def test_store_rejects_unknown_configuration(tmp_path):
+    with pytest.raises(ValueError):
+        EvidenceStore(str(tmp_path / "evidence"), compression="lz4")
+    directory = tmp_path / "future"
+    directory.mkdir()
+    (directory / "config.json").write_text(json.dumps({"version": 99, "compression": "zlib"}))
+    with pytest.raises(ValueError):
+        EvidenceStore(str(directory))
+
+
+def test_reads_are_cached(tmp_path):
+    store = EvidenceStore(str(tmp_path / "evidence"), cache_size=1)
+    first, second = store.put("first transcript"), store.put("second transcript")
+    assert store.get(first) == "first transcript"
+    os.remove(store._path(first))
+    assert store.get(first) == "first transcript"
+    # Reading another text evicts the cached one
+    store.get(second)
+    with pytest.raises(KeyError):
+        store.get(first)
+
+
+def test_assessments_write_evidence_to_store(tmp_path, framework, make_assessment):
+    store = EvidenceStore(str(tmp_path / "evidence"))
+    original = make_assessment(3)
+    for cls in (AgencyAssessment, CompactAgencyAssessment):
+        assessment = cls(framework, evidence_store=store)
+        for marker, presence in original.results.items():
+            assessment.assess_marker(marker, presence, original.confidence[marker], original.evidence.get(marker))
+        assert all(is_evidence_ref(e) for e in assessment.evidence.values())
+        for marker, text in original.evidence.items():
+            assert assessment.get_evidence(marker) == text
+
+
+def test_externalized_report_resolves(tmp_path, make_assessment):
+    store = EvidenceStore(str(tmp_path / "evidence"))
+    assessment = make_assessment(4)
+    report = assessment.generate_report()
+    assert resolve_report(externalize_report(report, store), store) == report
+
+    moved = externalize_assessment(assessment, store)
+    assert moved == len(assessment.evidence)
+    assert externalize_assessment(assessment, store) == 0
+    assert resolve_report(assessment.generate_report(), store) == report
+
+
+def test_short_evidence_stays_inline(tmp_path, framework):
+    store = EvidenceStore(str(tmp_path / "evidence"))
+    markers = framework.get_all_markers()
+    assessment = AgencyAssessment(framework)
+    assessment.assess_marker(markers[0], 0.5, 0.5, "short")
+    assessment.assess_marker(markers[1], 0.5, 0.5, "a much longer transcript " * 10)
+
+    assert externalize_assessment(assessment, store, min_size=50) == 1
+    assert assessment.evidence[markers[0]] == "short"
+    assert is_evidence_ref(assessment.evidence[markers[1]])
+
+
+def test_report_evidence_reads_lazily(tmp_path, make_assessment):
+    store = EvidenceStore(str(tmp_path / "evidence"))
+    assessment = make_assessment(5)
+    view = ReportEvidence(externalize_report(assessment.generate_report(), store), store)
+
+    assert len(view) == len(assessment.evidence)
+    assert set(view.markers()) == set(assessment.evidence)
+    assert dict(view.items()) == assessment.evidence
+    marker = next(iter(assessment.evidence))
+    assert marker in view and view.get(marker) == assessment.evidence[marker]
+    assert view.get("Marker without evidence") is None
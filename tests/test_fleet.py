@@ -0,0 +1,72 @@
+"""
+Tests for the fleet runner.
+
+License: PolyForm Noncommercial License 1.0
+"""
+import os
+
+from agency_fleet import FleetAnalyzer, FleetJob
+from robust_agency_assessment import AISystemAnalyzer
+
+PROMPTS = {"belief_representation": "Describe what you believe about {topic}."}
+
+
+class CrashingAnalyzer(AISystemAnalyzer):
+    """Kills its worker process when analyzing the "crasher" system.
+
+    When model_access names a file, the worker only dies on the first attempt,
+    which creates the file.
+    """
+
+    def analyze_llm_agency(self, model_provider, model_access, prompts, **kwargs):
+        if self.system_name == "crasher":
+            if model_access is None or not os.path.exists(model_access):
+                if model_access is not None:
+                    open(model_access, "w").close()
+                os._exit(1)
+        return super().analyze_llm_agency(model_provider, model_access, prompts, **kwargs)
+
+
+def jobs(n, **kwargs):
+    return [FleetJob(f"system-{i}", "1.0", prompts=PROMPTS, **kwargs) for i in range(n)]
+
+
+def expected_report():
+    return AISystemAnalyzer("system", "LLM", "1.0").analyze_llm_agency("provider", None, PROMPTS)
+
+
+def test_run_all_reports_every_job():
+    results = FleetAnalyzer(max_workers=2, progress_callback=None).run_all(jobs(4))
+    assert sorted(results) == [f"system-{i}@1.0" for i in range(4)]
+    for result in results.values():
+        assert result.ok and result.attempts == 1
+        assert result.report == expected_report()
+
+
+def test_recovers_from_killed_worker(tmp_path):
+    crasher = FleetJob("crasher", "1.0", prompts=PROMPTS, model_access=str(tmp_path / "crashed"))
+    fleet = FleetAnalyzer(
+        max_workers=2, max_retries=1, progress_callback=None, analyzer_class=CrashingAnalyzer
+    )
+    results = fleet.run_all([crasher] + jobs(3))
+
+    assert len(results) == 4
+    assert all(result.ok for result in results.values())
+    assert results["crasher@1.0"].attempts == 2
+
+
+def test_job_that_always_kills_its_worker_fails_after_retries():
+    progress_seen = []
+    fleet = FleetAnalyzer(
+        max_workers=1,
+        max_retries=2,
+        progress_callback=lambda progress, result: progress_seen.append(progress.retried),
+        analyzer_class=CrashingAnalyzer
+    )
+    results = fleet.run_all([FleetJob("crasher", "1.0", prompts=PROMPTS)])
+
+    result = results["crasher@1.0"]
+    assert not result.ok
+    assert result.attempts == 3
+    assert "BrokenProcessPool" in result.error
+    assert progress_seen == [2]
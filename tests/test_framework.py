@@ -0,0 +1,102 @@
+"""
+Tests for the compiled framework cache and its invalidation.
+
+License: PolyForm Noncommercial License 1.0
+"""
+import pickle
+
+from robust_agency_assessment import AgencyAssessment, AgencyFeature, AgencyFramework, AgencyLevel
+
+NEW_MARKER = "Keeps a written log of its own commitments"
+
+
+def test_compile_is_cached(framework):
+    assert framework.compile() is framework.compile()
+
+
+def test_unrelated_change_keeps_compiled_view(framework):
+    compiled = framework.compile()
+    other = AgencyFramework()
+    other.features[0].markers.append(NEW_MARKER)
+    assert framework.compile() is compiled
+
+
+def test_add_feature_invalidates(framework):
+    compiled = framework.compile()
+    framework.add_feature(AgencyFeature("Extra", "", AgencyLevel.BASIC, [NEW_MARKER]))
+    assert framework.compile() is not compiled
+    assert NEW_MARKER in framework.get_all_markers()
+
+
+def test_marker_append_invalidates(framework):
+    compiled = framework.compile()
+    feature = framework.features[0]
+    feature.markers.append(NEW_MARKER)
+    assert framework.compile() is not compiled
+    assert framework.compile().feature_has_marker(feature, NEW_MARKER)
+
+    assessment = AgencyAssessment(framework)
+    assessment.assess_feature(feature, {NEW_MARKER: (1.0, 1.0, None)})
+    assert assessment.results == {NEW_MARKER: 1.0}
+
+
+def test_marker_removal_and_assignment_invalidate(framework):
+    feature = framework.features[0]
+    removed = feature.markers[0]
+    framework.compile()
+    del feature.markers[0]
+    assert removed not in framework.get_all_markers()
+    feature.markers = [NEW_MARKER]
+    assert framework.get_all_markers()[0] == NEW_MARKER
+
+
+def test_feature_replacement_invalidates(framework):
+    framework.compile()
+    framework.features[1] = AgencyFeature("Replacement", "", AgencyLevel.BASIC, [NEW_MARKER])
+    assert [f.name for f in framework.get_features_by_level(AgencyLevel.BASIC)] == ["Replacement"]
+    assert "Desire Representation" not in [
+        f.name for f in framework.get_features_by_level(AgencyLevel.INTENTIONAL)
+    ]
+
+
+def test_level_and_weight_changes_invalidate(framework):
+    feature = framework.features[0]
+    feature.level = AgencyLevel.BASIC
+    assert framework.get_features_by_level(AgencyLevel.BASIC) == [feature]
+    feature.weight = 0.0
+    assert framework.compile().level_weights[AgencyLevel.BASIC] == 0.0
+
+
+def test_shared_feature_notifies_every_framework(framework):
+    other = AgencyFramework(load_defaults=False)
+    shared = framework.features[0]
+    other.add_feature(shared)
+    compiled, other_compiled = framework.compile(), other.compile()
+    shared.markers.append(NEW_MARKER)
+    assert framework.compile() is not compiled
+    assert other.compile() is not other_compiled
+    assert NEW_MARKER in other.get_all_markers()
+
+
+def test_features_accept_ad_hoc_attributes(framework):
+    feature = framework.features[0]
+    feature.source = "manual"
+    assert vars(feature)["source"] == "manual"
+
+
+def test_pickled_framework_compiles(framework):
+    framework.features[0].markers.append(NEW_MARKER)
+    copy = pickle.loads(pickle.dumps(framework))
+    assert copy.get_all_markers() == framework.get_all_markers()
+    copy.features[0].markers.pop()
+    assert NEW_MARKER not in copy.get_all_markers()
+    assert NEW_MARKER in framework.get_all_markers()
+
+
+def test_save_and_load_features(framework, tmp_path):
+    path = str(tmp_path / "features.json")
+    framework.features[0].markers.append(NEW_MARKER)
+    framework.save_features(path)
+    loaded = AgencyFramework(load_defaults=False)
+    loaded.load_features(path)
+    assert [f.to_dict() for f in loaded.features] == [f.to_dict() for f in framework.features]
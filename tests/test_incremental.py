@@ -0,0 +1,62 @@
+"""
+Tests for incremental score maintenance in AgencyAssessment.
+
+License: PolyForm Noncommercial License 1.0
+"""
+import numpy as np
+import pytest
+
+from robust_agency_assessment import AgencyAssessment, AgencyFeature, AgencyLevel
+from agency_batch import score_assessments
+
+
+def replay(source, framework):
+    incremental = AgencyAssessment(framework, incremental=True)
+    for marker, presence in source.results.items():
+        incremental.assess_marker(marker, presence, source.confidence[marker])
+    return incremental
+
+
+def assert_scores_close(incremental):
+    current = incremental.get_current_level_scores()
+    expected = incremental.get_overall_agency_score()
+    for level in AgencyLevel:
+        assert np.isclose(current[level], expected[level])
+
+
+def test_incremental_assessment_matches_batch(framework, make_assessment):
+    source = make_assessment(7)
+    incremental = replay(source, framework)
+    scores = score_assessments(framework, [source])
+    for level in AgencyLevel:
+        assert np.isclose(incremental.get_current_level_scores()[level], scores.get_level_scores(0)[level])
+
+
+def test_reassessing_and_removing_markers(framework, make_assessment):
+    incremental = replay(make_assessment(3, fraction=1.0), framework)
+    markers = list(incremental.results)
+    for marker in markers[::3]:
+        incremental.assess_marker(marker, 0.1, 0.9)
+    for marker in markers[1::4]:
+        incremental.remove_marker(marker)
+    incremental.remove_marker("Marker that was never assessed")
+
+    assert_scores_close(incremental)
+    assert incremental.verify_incremental()
+
+
+def test_framework_changes_resync(framework, make_assessment):
+    incremental = replay(make_assessment(5), framework)
+    framework.add_feature(AgencyFeature(
+        "New feature", "Added after assessment began", AgencyLevel.BASIC, ["New marker"], weight=2.0
+    ))
+    incremental.assess_marker("New marker", 1.0, 1.0)
+    assert_scores_close(incremental)
+
+    framework.features[0].weight = 0.3
+    assert_scores_close(incremental)
+
+
+def test_current_scores_require_incremental_mode(make_assessment):
+    with pytest.raises(RuntimeError):
+        make_assessment(1).get_current_level_scores()
@@ -0,0 +1,99 @@
+"""
+Tests for bulk marker ingestion.
+
+License: PolyForm Noncommercial License 1.0
+"""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from robust_agency_assessment import AgencyAssessment, marker_rows_to_columns
+from agency_compact import CompactAgencyAssessment
+
+
+COLUMNS = ("marker", "presence", "confidence", "evidence")
+
+
+def rows_for(source):
+    return [
+        (marker, presence, source.confidence[marker], source.evidence.get(marker))
+        for marker, presence in source.results.items()
+    ]
+
+
+@pytest.mark.parametrize("form", ["tuples", "dicts", "columns", "dataframe"])
+def test_bulk_matches_per_marker_calls(framework, make_assessment, form):
+    source = make_assessment(4)
+    rows = rows_for(source)
+    if form == "dicts":
+        rows = [dict(zip(COLUMNS, row)) for row in rows]
+    elif form == "columns":
+        rows = {name: [row[i] for row in rows] for i, name in enumerate(COLUMNS)}
+    elif form == "dataframe":
+        rows = pd.DataFrame(rows, columns=list(COLUMNS))
+
+    assessment = AgencyAssessment(framework)
+    report = assessment.assess_markers_bulk(rows)
+    assert report.accepted == len(source.results) and report.rejected == 0
+    assert assessment.results == source.results
+    assert assessment.confidence == source.confidence
+    assert assessment.evidence == source.evidence
+
+
+def test_unmatched_markers_are_counted_per_name(framework, caplog):
+    marker = framework.features[0].markers[0]
+    rows = [(marker, 0.5, 0.5), ("Unknown A", 0.1, 0.1), ("Unknown A", 0.2, 0.2), ("Unknown B", 0.3, 0.3)]
+    assessment = AgencyAssessment(framework)
+    report = assessment.assess_markers_bulk(rows)
+
+    assert report.to_dict() == {
+        "accepted": 1, "resolved": 0, "rejected": 3, "unmatched": {"Unknown A": 2, "Unknown B": 1}
+    }
+    assert list(assessment.results) == [marker]
+    # One aggregated warning rather than one per row
+    assert len([r for r in caplog.records if r.levelname == "WARNING"]) == 1
+
+
+def test_feature_restriction_and_last_row_wins(framework):
+    feature, other = framework.features[0], framework.features[1]
+    rows = [(feature.markers[0], 0.1, 0.5), (other.markers[0], 0.9, 0.9), (feature.markers[0], 0.7, 0.6)]
+    for cls in (AgencyAssessment, CompactAgencyAssessment):
+        assessment = cls(framework)
+        report = assessment.assess_markers_bulk(rows, feature=feature)
+        assert report.accepted == 2 and report.unmatched == {other.markers[0]: 1}
+        assert assessment.get_marker_score(feature.markers[0]) == pytest.approx(0.7 * 0.6)
+        assert assessment.get_marker_score(other.markers[0]) == 0.0
+
+
+def test_integer_dataframe_columns_are_json_serializable(framework, tmp_path):
+    markers = framework.get_all_markers()[:3]
+    frame = pd.DataFrame({
+        "marker": markers,
+        "presence": np.array([1, 0, 1], dtype=np.int64),
+        "confidence": np.array([1, 1, 0], dtype=np.int64),
+    })
+    _, presence, confidence, evidence = marker_rows_to_columns(frame)
+    assert all(type(value) is float for value in presence + confidence)
+    assert evidence == [None] * 3
+
+    assessment = AgencyAssessment(framework)
+    assessment.assess_markers_bulk(frame)
+    json.dumps(assessment.generate_report())
+    assessment.save_assessment(str(tmp_path / "assessment.json"))
+
+
+def test_missing_dataframe_evidence_becomes_none(framework):
+    markers = framework.get_all_markers()[:2]
+    frame = pd.DataFrame({
+        "marker": markers, "presence": [0.5, 0.6], "confidence": [0.7, 0.8], "evidence": ["seen", np.nan]
+    })
+    assert marker_rows_to_columns(frame)[3] == ["seen", None]
+
+
+def test_bulk_ingestion_resyncs_incremental_scores(framework, make_assessment):
+    source = make_assessment(9)
+    assessment = AgencyAssessment(framework, incremental=True)
+    assessment.assess_markers_bulk(rows_for(source))
+    assert assessment.verify_incremental()
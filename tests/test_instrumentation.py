@@ -0,0 +1,114 @@
+"""
+Tests for hot-path instrumentation.
+
+License: PolyForm Noncommercial License 1.0
+"""
+import json
+
+import pytest
+
+from robust_agency_assessment import AgencyAssessment, AgencyLevel, AISystemAnalyzer
+from agency_instrumentation import (
+    JSONFileExporter, PrometheusTextExporter, instrumented, metrics, profiling_session, timed
+)
+
+
+@pytest.fixture
+def enabled_metrics():
+    metrics.reset()
+    metrics.enable()
+    yield metrics
+    metrics.disable()
+    metrics.reset()
+
+
+def is_wrapper(method):
+    return hasattr(method, "__wrapped__")
+
+
+def test_methods_are_plain_functions_while_disabled():
+    assert not metrics.enabled
+    assert not is_wrapper(AgencyAssessment.assess_marker)
+    assert not is_wrapper(AgencyAssessment.generate_report)
+
+
+def test_enable_and_disable_swap_the_wrappers(framework):
+    plain = AgencyAssessment.assess_marker
+    metrics.enable()
+    try:
+        assert is_wrapper(AgencyAssessment.assess_marker)
+        assert AgencyAssessment.assess_marker.__wrapped__ is plain
+    finally:
+        metrics.disable()
+    assert AgencyAssessment.assess_marker is plain
+
+    AgencyAssessment(framework).assess_marker(framework.features[0].markers[0], 0.5, 0.5)
+    assert metrics.snapshot() == {}
+
+
+def test_records_instrumented_calls(enabled_metrics, make_assessment):
+    assessment = make_assessment(1)
+    assessment.get_level_score(AgencyLevel.BASIC)
+    assessment.generate_report()
+    AISystemAnalyzer("system", "LLM", "1.0").analyze_llm_agency(
+        "provider", None, {"belief_representation": "prompt"}
+    )
+
+    snapshot = enabled_metrics.snapshot()
+    assert snapshot["assessment.assess_marker"]["count"] == len(assessment.results) + 2
+    assert snapshot["assessment.generate_report"]["count"] == 2
+    assert snapshot["probe._test_belief_representation"]["count"] == 1
+    for data in snapshot.values():
+        assert sum(data["buckets"].values()) == data["count"]
+
+
+def test_plain_functions_and_blocks_check_the_flag(enabled_metrics):
+    @instrumented("test.function")
+    def function():
+        return 42
+
+    assert function() == 42
+    with timed("test.block"):
+        pass
+    enabled_metrics.disable()
+    function()
+    with timed("test.block"):
+        pass
+
+    snapshot = enabled_metrics.snapshot()
+    assert snapshot["test.function"]["count"] == 1
+    assert snapshot["test.block"]["count"] == 1
+
+
+def test_prometheus_output(enabled_metrics):
+    enabled_metrics.observe('op "quoted"', 0.0003)
+    enabled_metrics.observe('op "quoted"', 20.0)
+    text = PrometheusTextExporter().render(enabled_metrics.snapshot())
+    lines = text.splitlines()
+
+    assert lines[0].startswith("# HELP agency_operation_duration_seconds")
+    assert lines[1] == "# TYPE agency_operation_duration_seconds histogram"
+    label = 'operation="op \\"quoted\\""'
+    assert f'agency_operation_duration_seconds_bucket{{{label},le="0.00025"}} 0' in lines
+    assert f'agency_operation_duration_seconds_bucket{{{label},le="0.0005"}} 1' in lines
+    assert f'agency_operation_duration_seconds_bucket{{{label},le="10.0"}} 1' in lines
+    assert f'agency_operation_duration_seconds_bucket{{{label},le="+Inf"}} 2' in lines
+    assert f'agency_operation_duration_seconds_sum{{{label}}} 20.0003' in lines
+    assert f'agency_operation_duration_seconds_count{{{label}}} 2' in lines
+    assert text.endswith("\n")
+
+
+def test_json_export(tmp_path, enabled_metrics):
+    enabled_metrics.observe("op", 0.001)
+    path = str(tmp_path / "metrics.json")
+    JSONFileExporter(path).export(enabled_metrics.snapshot())
+    with open(path) as f:
+        assert json.load(f)["metrics"]["op"]["count"] == 1
+
+
+def test_profiling_session(make_assessment):
+    with profiling_session(cpu=True, memory=True) as session:
+        make_assessment(1).generate_report()
+    assert "generate_report" in session.cpu_report()
+    assert session.peak_memory > 0
+    assert session.memory_report(limit=3)
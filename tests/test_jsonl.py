@@ -0,0 +1,58 @@
+"""
+Tests for streaming JSONL assessment storage.
+
+License: PolyForm Noncommercial License 1.0
+"""
+import pytest
+
+from robust_agency_assessment import AgencyLevel
+from agency_jsonl import AssessmentJSONLWriter, iter_assessment_records, iter_reports
+
+
+@pytest.mark.parametrize("extension", ["", ".gz", ".zst"])
+def test_jsonl_round_trip(tmp_path, make_assessment, extension):
+    if extension == ".zst":
+        pytest.importorskip("zstandard")
+    path = str(tmp_path / f"assessments.jsonl{extension}")
+    assessments = [make_assessment(seed) for seed in range(3)]
+    with AssessmentJSONLWriter(path) as writer:
+        for i, assessment in enumerate(assessments):
+            writer.write(assessment, "system", f"v{i}", metadata={"run": i})
+
+    records = list(iter_assessment_records(path))
+    assert [r["version"] for r in records] == ["v0", "v1", "v2"]
+    for record, assessment in zip(records, assessments):
+        assert record["report"] == assessment.generate_report()
+        assert record["metadata"]["run"] == int(record["version"][1:])
+    assert [r["version"] for r in iter_assessment_records(path, version="v1")] == ["v1"]
+
+
+def test_appends_and_skips_malformed_lines(tmp_path, make_assessment):
+    path = str(tmp_path / "assessments.jsonl")
+    with AssessmentJSONLWriter(path) as writer:
+        writer.write(make_assessment(1), "a", "v1")
+    with open(path, "a") as f:
+        f.write('{"truncated": \n\n')
+    with AssessmentJSONLWriter(path) as writer:
+        writer.write(make_assessment(2).generate_report(), "b", "v1")
+
+    assert [r["system"] for r in iter_assessment_records(path)] == ["a", "b"]
+    assert list(iter_reports(path, system="b")) == [make_assessment(2).generate_report()]
+
+
+def test_filters_by_level_score(tmp_path, make_assessment):
+    path = str(tmp_path / "assessments.jsonl")
+    reports = [make_assessment(seed).generate_report() for seed in range(10)]
+    with AssessmentJSONLWriter(path) as writer:
+        for i, report in enumerate(reports):
+            writer.write(report, "system", f"v{i}")
+
+    threshold = sorted(r["level_scores"][AgencyLevel.REFLECTIVE.name] for r in reports)[5]
+    selected = list(iter_reports(path, min_level_scores={AgencyLevel.REFLECTIVE: threshold}))
+    assert selected == [r for r in reports if r["level_scores"][AgencyLevel.REFLECTIVE.name] >= threshold]
+    assert len(selected) == 5
+
+
+def test_rejects_unknown_compression(tmp_path):
+    with pytest.raises(ValueError):
+        AssessmentJSONLWriter(str(tmp_path / "assessments.jsonl"), compression="lz4")
@@ -0,0 +1,167 @@
+"""
+Tests for the rate-limited, batching model client.
+
+License: PolyForm Noncommercial License 1.0
+"""
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+
+import pytest
+
+from agency_model_access import (
+    BATCH_PATH, ConnectionPool, LocalModelServer, ModelAccessError, ModelClient, TokenBucket,
+    _parse_retry_after
+)
+
+
+def test_token_bucket_allows_bursts_then_limits_the_rate():
+    bucket = TokenBucket(rate=20, capacity=3)
+    assert all(bucket.try_acquire() for _ in range(3))
+    assert not bucket.try_acquire()
+    assert 0 < bucket.retry_after() <= 1 / 20
+
+    start = time.monotonic()
+    assert bucket.acquire()
+    assert time.monotonic() - start >= 0.03
+    assert not bucket.acquire(tokens=3, timeout=0.01)
+
+
+def test_token_bucket_pause():
+    bucket = TokenBucket(rate=1000)
+    bucket.pause(0.1)
+    assert not bucket.try_acquire()
+    assert bucket.retry_after() > 0.05
+    start = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - start >= 0.09
+
+
+def test_parse_retry_after():
+    assert _parse_retry_after(None, 1.5) == 1.5
+    assert _parse_retry_after("2.5", 1.0) == 2.5
+    assert _parse_retry_after("-3", 1.0) == 0.0
+    assert _parse_retry_after("soon", 1.0) == 1.0
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 < _parse_retry_after(later, 1.0) <= 30
+
+
+def test_completions_keep_input_order():
+    with LocalModelServer(latency=0.001, per_prompt_latency=0) as server:
+        with ModelClient(server.url, max_batch_delay=0.005, requests_per_second=1000) as client:
+            prompts = [f"prompt {i}" for i in range(50)]
+            assert client.complete_many(prompts) == [f"Response to: {p}" for p in prompts]
+            assert client.stats.mean_batch_size > 1
+
+
+def test_batch_size_adapts_additively_and_multiplicatively():
+    with LocalModelServer() as server:
+        with ModelClient(server.url, max_batch_size=16) as client:
+            client._adjust_batch_size(throttled=True)
+            assert client.batch_size == 8
+            client._adjust_batch_size(throttled=True)
+            assert client.batch_size == 4
+            client._adjust_batch_size(throttled=False)
+            assert client.batch_size == 5
+            for _ in range(20):
+                client._adjust_batch_size(throttled=False)
+            assert client.batch_size == 16
+
+
+def test_oversized_batches_are_halved():
+    with LocalModelServer(latency=0.001, per_prompt_latency=0, max_batch_size=4) as server:
+        with ModelClient(
+            server.url, max_connections=1, max_batch_size=16, max_batch_delay=0.05, requests_per_second=1000
+        ) as client:
+            prompts = [f"prompt {i}" for i in range(16)]
+            assert client.complete_many(prompts) == [f"Response to: {p}" for p in prompts]
+            assert client.max_batch_size <= 4
+            assert client.batch_size <= 4
+    assert server.prompts == 16
+
+
+def test_throttled_requests_are_retried_within_the_quota():
+    with LocalModelServer(requests_per_second=40, burst=2, latency=0.001, per_prompt_latency=0) as server:
+        with ModelClient(
+            server.url, requests_per_second=200, max_batch_size=2, max_batch_delay=0.001
+        ) as client:
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                completions = list(pool.map(client.complete, [f"prompt {i}" for i in range(40)]))
+    assert completions == [f"Response to: prompt {i}" for i in range(40)]
+    assert client.stats.throttled == server.rejected
+    assert client.stats.failures == 0
+
+
+class ThrottleOnceServer:
+    """Endpoint answering the first request with 429 and a lower-case retry-after header."""
+
+    def __init__(self, retry_after: float):
+        self.request_times = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                server.request_times.append(time.monotonic())
+                if len(server.request_times) == 1:
+                    status, payload = 429, {"error": "rate limited"}
+                else:
+                    status, payload = 200, {"completions": ["ok"] * len(request["prompts"])}
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                if status == 429:
+                    self.send_header("retry-after", str(retry_after))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def test_retry_after_header_is_case_insensitive():
+    with ThrottleOnceServer(retry_after=0.3) as server:
+        pool = ConnectionPool(server.url)
+        status, headers, _ = pool.request("POST", BATCH_PATH, b'{"prompts": []}')
+        assert status == 429 and headers["retry-after"] == "0.3"
+        pool.close()
+
+    with ThrottleOnceServer(retry_after=0.3) as server:
+        with ModelClient(server.url, requests_per_second=1000) as client:
+            assert client.complete("prompt") == "ok"
+        first, second = server.request_times
+        # Without the header the first retry would come after the 0.1 s default backoff
+        assert second - first >= 0.25
+
+
+def test_endpoint_errors_fail_the_futures():
+    with LocalModelServer() as server:
+        client = ModelClient(server.url + "/missing", requests_per_second=1000)
+        with pytest.raises(ModelAccessError, match="HTTP 404"):
+            client.complete("prompt", timeout=5)
+        client.close()
+        with pytest.raises(ModelAccessError, match="closed"):
+            client.submit("prompt")
@@ -0,0 +1,123 @@
+"""
+Tests for incremental re-assessment driven by the probe manifest.
+
+License: PolyForm Noncommercial License 1.0
+"""
+from collections import Counter
+
+import pytest
+
+from robust_agency_assessment import AISystemAnalyzer
+from agency_dependencies import ProbeManifest
+
+PROMPTS = {
+    "belief_representation": "Describe what you believe about {topic}.",
+    "desire_representation": "Describe what you want to achieve in {task}.",
+}
+
+
+class CountingAnalyzer(AISystemAnalyzer):
+    """Analyzer counting how often each probe actually runs."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__("test-model", "LLM", "1.0", *args, **kwargs)
+        self.runs = Counter()
+
+    def _test_belief_representation(self, model_access, prompt_template):
+        self.runs["belief"] += 1
+        return super()._test_belief_representation(model_access, prompt_template)
+
+    def _test_desire_representation(self, model_access, prompt_template):
+        self.runs["desire"] += 1
+        return super()._test_desire_representation(model_access, prompt_template)
+
+
+def analyzed(framework, prompts=PROMPTS):
+    analyzer = CountingAnalyzer(framework=framework, probe_manifest=ProbeManifest())
+    analyzer.analyze_llm_agency("provider", None, prompts)
+    analyzer.runs.clear()
+    return analyzer
+
+
+def belief_markers(analyzer):
+    return list(AISystemAnalyzer._test_belief_representation(analyzer, None, ""))
+
+
+def test_probes_are_not_fingerprinted_without_a_manifest(monkeypatch):
+    analyzer = CountingAnalyzer()
+
+    def fail(*args):
+        raise AssertionError("probe fingerprinted without a manifest")
+
+    monkeypatch.setattr(analyzer, "_probe_fingerprint", fail)
+    analyzer.analyze_llm_agency("provider", None, PROMPTS)
+    analyzer.analyze_llm_agency_concurrent("provider", None, PROMPTS)
+    assert analyzer.probe_manifest is None
+
+
+def test_unchanged_probes_are_reused(framework):
+    analyzer = analyzed(framework)
+    before = analyzer.assessment.generate_report()
+    assert analyzer.reassess_llm_agency("provider", None, PROMPTS) == before
+    assert analyzer.runs == Counter()
+
+
+def test_changed_prompt_reruns_only_its_probe(framework):
+    analyzer = analyzed(framework)
+    analyzer.reassess_llm_agency("provider", None, dict(PROMPTS, desire_representation="New prompt"))
+    assert analyzer.runs == Counter({"desire": 1})
+
+
+def test_changed_feature_reruns_probes_reporting_its_markers(framework):
+    analyzer = analyzed(framework)
+    marker = belief_markers(analyzer)[0]
+    feature = framework.compile().get_features_for_marker(marker)[0]
+
+    # Descriptions do not affect scoring
+    feature.description += " (revised)"
+    analyzer.reassess_llm_agency("provider", None, PROMPTS)
+    assert analyzer.runs == Counter()
+
+    feature.weight *= 2
+    analyzer.reassess_llm_agency("provider", None, PROMPTS)
+    assert analyzer.runs == Counter({"belief": 1})
+
+
+def test_removed_prompt_drops_its_markers(framework):
+    analyzer = analyzed(framework)
+    analyzer.reassess_llm_agency("provider", None, {"desire_representation": PROMPTS["desire_representation"]})
+
+    assert analyzer.runs == Counter()
+    assert not set(belief_markers(analyzer)) & set(analyzer.assessment.results)
+    assert "_test_belief_representation" not in analyzer.probe_manifest
+
+
+def test_saved_manifest_is_reused_by_a_new_analyzer(tmp_path, framework):
+    path = str(tmp_path / "manifest.json")
+    analyzed(framework).probe_manifest.save(path)
+
+    analyzer = CountingAnalyzer(framework=framework, probe_manifest=ProbeManifest.load(path))
+    report = analyzer.reassess_llm_agency("provider", None, PROMPTS)
+    assert analyzer.runs == Counter()
+    assert report == analyzed(framework).assessment.generate_report()
+
+
+def test_reassessment_without_a_manifest_runs_every_probe(framework):
+    analyzer = CountingAnalyzer(framework=framework)
+    analyzer.reassess_llm_agency("provider", None, PROMPTS)
+    assert analyzer.runs == Counter({"belief": 1, "desire": 1})
+    assert len(analyzer.probe_manifest) == 2
+
+
+@pytest.mark.parametrize("concurrent", [False, True])
+def test_cache_hits_are_recorded_in_the_manifest(framework, concurrent):
+    from agency_cache import MemoryProbeCache
+
+    cache = MemoryProbeCache()
+    CountingAnalyzer(framework=framework, probe_cache=cache).analyze_llm_agency("provider", None, PROMPTS)
+
+    analyzer = CountingAnalyzer(framework=framework, probe_cache=cache, probe_manifest=ProbeManifest())
+    analyze = analyzer.analyze_llm_agency_concurrent if concurrent else analyzer.analyze_llm_agency
+    analyze("provider", None, PROMPTS)
+    assert analyzer.runs == Counter()
+    assert len(analyzer.probe_manifest) == 2
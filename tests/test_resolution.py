@@ -0,0 +1,94 @@
+"""
+Tests for marker-name resolution.
+
+License: PolyForm Noncommercial License 1.0
+"""
+import pytest
+
+from robust_agency_assessment import AgencyAssessment, AgencyFeature, AgencyFramework, AgencyLevel
+from agency_compact import CompactAgencyAssessment
+from agency_resolution import MarkerIndex, normalize_marker
+
+NEW_MARKER = "Keeps a written log of its own commitments"
+DRIFTED = "Tracks goal state over time"
+
+
+@pytest.fixture
+def goal_features(framework):
+    """Two features whose markers are both close to DRIFTED, the first slightly closer."""
+    tracking = AgencyFeature("Goal Tracking", "", AgencyLevel.BASIC, ["Tracks goal states over time"])
+    persistence = AgencyFeature(
+        "Goal Persistence", "", AgencyLevel.BASIC, ["Tracks goal state over time periods", "Resumes goals"]
+    )
+    framework.add_feature(tracking)
+    framework.add_feature(persistence)
+    return tracking, persistence
+
+
+def test_exact_normalized_and_approximate_matches(framework):
+    index = MarkerIndex(framework)
+    marker = framework.get_all_markers()[0]
+    assert index.resolve(marker) == (0, 1.0)
+    assert normalize_marker(f"  {marker.upper()}!! ") == normalize_marker(marker)
+    assert index.canonical(f"  {marker.upper()}!! ") == marker
+
+    drifted = marker.replace(" ", "  ")[:-2]
+    assert index.canonical(drifted) == marker
+    assert index.canonical("Completely unrelated words") is None
+    assert index.canonicalize([drifted, "Completely unrelated words"]) == [marker, "Completely unrelated words"]
+
+
+def test_resolution_is_restricted_to_the_feature(framework, goal_features):
+    tracking, persistence = goal_features
+    index = MarkerIndex(framework, threshold=0.6)
+    assert index.canonical(DRIFTED) == tracking.markers[0]
+    assert index.canonical(DRIFTED, persistence) == persistence.markers[0]
+    assert index.canonical(DRIFTED, tracking) == tracking.markers[0]
+    # Results cached for the whole framework do not leak into a feature's scope
+    assert index.resolve_many([DRIFTED], persistence)[0].tolist() == [index.resolve(persistence.markers[0])[0]]
+
+    # A feature outside the framework is scoped to its markers without being cached
+    loose = AgencyFeature("Loose", "", AgencyLevel.BASIC, list(tracking.markers))
+    assert index.canonical(DRIFTED, loose) == tracking.markers[0]
+
+
+@pytest.mark.parametrize("cls", [AgencyAssessment, CompactAgencyAssessment])
+def test_assessments_resolve_within_the_feature(framework, goal_features, cls):
+    tracking, persistence = goal_features
+    index = MarkerIndex(framework, threshold=0.6)
+    assessment = cls(framework)
+    assessment.assess_feature(persistence, {DRIFTED: (1.0, 1.0, None)}, resolver=index)
+    assert assessment.results == {persistence.markers[0]: 1.0}
+
+    report = assessment.assess_markers_bulk([(DRIFTED, 0.5, 1.0, None)], feature=tracking, resolver=index)
+    assert report.accepted == 1
+    assert assessment.results[tracking.markers[0]] == 0.5
+
+
+def test_index_follows_framework_mutation(framework):
+    index = MarkerIndex(framework)
+    compact = CompactAgencyAssessment(framework)
+    first = framework.get_all_markers()[0]
+    compact.assess_marker(first, 0.5, 1.0)
+
+    framework.features[0].markers.append(NEW_MARKER)
+    assert index.canonical(NEW_MARKER.lower()) == NEW_MARKER
+    compact.assess_marker(NEW_MARKER, 1.0, 1.0)
+    assert compact.results == {first: 0.5, NEW_MARKER: 1.0}
+
+
+def test_cache_stays_within_its_bound(framework):
+    index = MarkerIndex(framework, max_cache=10)
+    marker = framework.get_all_markers()[3]
+    expected = index.resolve(marker)[0]
+    for k in range(5):
+        ids, _ = index.resolve_many([f"name {k} {i}" for i in range(8)] + [marker])
+        assert index._cached_count() <= 10
+        # Evicting mid-call must not invalidate the slots the call refers to
+        assert ids[-1] == expected and (ids[:-1] == -1).all()
+
+    # More distinct names than the cache holds resolve without it
+    ids, _ = index.resolve_many([f"unknown {i}" for i in range(20)])
+    assert len(ids) == 20 and index._cached_count() <= 10
+    ids, _ = index.resolve_many([marker] * 3)
+    assert ids.tolist() == [expected] * 3
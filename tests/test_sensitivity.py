@@ -0,0 +1,136 @@
+"""
+Tests for feature weight sensitivity analysis.
+
+License: PolyForm Noncommercial License 1.0
+"""
+import numpy as np
+import pytest
+
+from robust_agency_assessment import AgencyAssessment, AgencyFramework, AgencyLevel
+from agency_batch import score_assessments
+from agency_sensitivity import WeightSensitivityAnalyzer, analyze_weight_sensitivity
+
+
+def rescored(assessment, weights):
+    """Level scores of an assessment under a framework carrying the given feature weights."""
+    framework = AgencyFramework()
+    for feature, weight in zip(framework.features, weights):
+        feature.weight = float(weight)
+    copy = AgencyAssessment(framework)
+    for marker, presence in assessment.results.items():
+        copy.assess_marker(marker, presence, assessment.confidence[marker])
+    return [copy.get_level_score(level) for level in AgencyLevel]
+
+
+def specialist(framework, feature, other, other_presence):
+    """Assessment showing every marker of one feature fully and another's partially."""
+    assessment = AgencyAssessment(framework)
+    for marker in framework.features[feature].markers:
+        assessment.assess_marker(marker, 1.0, 1.0)
+    for marker in framework.features[other].markers:
+        assessment.assess_marker(marker, other_presence, 1.0)
+    return assessment
+
+
+@pytest.mark.parametrize("concentration", [None, 50.0])
+def test_dirichlet_weights_keep_level_totals(framework, concentration):
+    analyzer = WeightSensitivityAnalyzer(framework, n_samples=500, concentration=concentration, seed=3)
+    weights = analyzer.sample_weights()
+    assert weights.shape == (500, len(framework.features))
+    assert (weights >= 0).all()
+    level_totals = analyzer.base_weights @ analyzer.membership
+    np.testing.assert_allclose(weights @ analyzer.membership, np.tile(level_totals, (500, 1)))
+    np.testing.assert_array_equal(weights, analyzer.sample_weights())
+
+
+def test_concentration_centers_draws_on_the_framework_weights(framework):
+    def spread(concentration):
+        analyzer = WeightSensitivityAnalyzer(framework, n_samples=2000, concentration=concentration, seed=0)
+        return np.abs(analyzer.sample_weights() - analyzer.base_weights).mean()
+
+    assert spread(1000.0) < spread(10.0) < spread(None)
+
+
+def test_perturbed_weights_stay_within_the_spread(framework):
+    analyzer = WeightSensitivityAnalyzer(framework, n_samples=500, method="perturb", spread=0.1, seed=0)
+    ratio = analyzer.sample_weights() / analyzer.base_weights
+    assert ratio.min() >= 0.9 and ratio.max() <= 1.1
+
+
+def test_unknown_method(framework):
+    with pytest.raises(ValueError):
+        WeightSensitivityAnalyzer(framework, method="grid")
+
+
+def test_level_scores_match_rescoring(framework, make_assessment):
+    assessments = [make_assessment(seed) for seed in range(3)]
+    analyzer = WeightSensitivityAnalyzer(framework, n_samples=5, seed=1)
+    weights = analyzer.sample_weights()
+    batch = analyzer.scorer.batch_from_assessments(assessments)
+    feature_scores = analyzer.scorer.feature_scores(analyzer.scorer.marker_scores(batch))
+    scores = analyzer.level_scores(feature_scores, weights)
+
+    assert scores.shape == (3, 5, len(AgencyLevel))
+    for i, assessment in enumerate(assessments):
+        for k in range(5):
+            np.testing.assert_allclose(scores[i, k], rescored(assessment, weights[k]), atol=1e-12)
+
+
+def test_score_ranges_contain_the_baseline(framework, make_assessment):
+    assessments = [make_assessment(seed) for seed in range(6)]
+    analyzer = WeightSensitivityAnalyzer(framework, n_samples=300, seed=2, chunk_elements=50)
+    weights = np.vstack([analyzer.base_weights, analyzer.sample_weights()])
+    result = analyzer.analyze_assessments(assessments, weights=weights)
+
+    np.testing.assert_allclose(result.baseline, score_assessments(framework, assessments).level_scores)
+    assert (result.score_min <= result.baseline + 1e-12).all()
+    assert (result.baseline <= result.score_max + 1e-12).all()
+    assert (result.rank_min <= result.rank_baseline).all() and (result.rank_baseline <= result.rank_max).all()
+    # The framework weights reproduce the baseline ranking exactly
+    np.testing.assert_allclose(result.rank_correlation[0], 1.0)
+
+    summary = result.get_level_summary(0)[AgencyLevel.INTENTIONAL]
+    assert summary["min"] <= summary["q0.05"] <= summary["q0.95"] <= summary["max"]
+
+
+def test_rank_flips_follow_the_weights(framework):
+    # Each assessment is strongest on a different INTENTIONAL feature; second overtakes
+    # first once the weight of feature 1 exceeds 1.2 times the weight of feature 0
+    first, second = specialist(framework, 0, 1, 0.5), specialist(framework, 1, 0, 0.4)
+    analyzer = WeightSensitivityAnalyzer(framework)
+    weights = np.tile(analyzer.base_weights, (4, 1))
+    weights[0, 0] = 2.0
+    weights[1:, 1] = [1.0, 1.5, 2.0]
+
+    result = analyzer.analyze_assessments([first, second], labels=["first", "second"], weights=weights)
+    j = result.levels.index(AgencyLevel.INTENTIONAL)
+    assert result.rank_baseline[:, j].tolist() == [1, 2]
+    assert result.flip_probability[j, 0, 1] == pytest.approx(0.75)
+    assert result.get_unstable_pairs(AgencyLevel.INTENTIONAL, threshold=0.5) == [("first", "second", 0.75)]
+    assert result.get_unstable_pairs(AgencyLevel.INTENTIONAL, threshold=0.8) == []
+    assert result.rank_max[0, j] == 2 and result.rank_min[1, j] == 1
+
+
+def test_pairwise_flips_are_optional(framework, make_assessment):
+    assessments = [make_assessment(seed) for seed in range(4)]
+    result = analyze_weight_sensitivity(framework, assessments, n_samples=50, seed=0, max_pairwise=2)
+    assert result.flip_probability is None
+    with pytest.raises(ValueError):
+        result.get_unstable_pairs(AgencyLevel.REFLECTIVE)
+
+    subset = WeightSensitivityAnalyzer(framework, n_samples=50, seed=0).analyze_assessments(
+        assessments, pairwise=[1, 3]
+    )
+    assert subset.flip_probability.shape == (len(AgencyLevel), 2, 2)
+
+
+def test_influence_points_at_the_varied_weight(framework, make_assessment):
+    analyzer = WeightSensitivityAnalyzer(framework)
+    weights = np.tile(analyzer.base_weights, (200, 1))
+    weights[:, 5] = np.random.default_rng(0).uniform(0.1, 2.0, 200)
+    result = analyzer.analyze_assessments([make_assessment(seed) for seed in range(3)], weights=weights)
+
+    influence = result.get_feature_influence(AgencyLevel.REFLECTIVE)
+    assert list(influence) == [framework.features[5].name]
+    assert 0.5 < influence[framework.features[5].name] <= 1.0 + 1e-9
+    assert result.get_feature_influence(AgencyLevel.RATIONAL) == {}
@@ -0,0 +1,67 @@
+"""
+Tests for binary framework snapshots.
+
+License: PolyForm Noncommercial License 1.0
+"""
+import struct
+
+import pytest
+
+from robust_agency_assessment import AgencyFeature, AgencyFramework, AgencyLevel
+from agency_snapshot import FrameworkSnapshot, load_framework_snapshot, write_framework_snapshot
+
+
+@pytest.fixture
+def snapshot_path(tmp_path, framework):
+    framework.add_feature(AgencyFeature(
+        "Ünïcode feature ✓", "Déscription with emoji 🚀", AgencyLevel.BASIC,
+        ["Marker ñ 😀", framework.features[0].markers[0]], weight=0.25
+    ))
+    path = str(tmp_path / "framework.snap")
+    write_framework_snapshot(framework, path)
+    return path
+
+
+def test_snapshot_round_trip(snapshot_path, framework):
+    loaded = load_framework_snapshot(snapshot_path)
+    assert [f.to_dict() for f in loaded.features] == [f.to_dict() for f in framework.features]
+    with FrameworkSnapshot(snapshot_path) as snapshot:
+        last = len(framework.features) - 1
+        assert snapshot.get_feature_name(last) == "Ünïcode feature ✓"
+        assert snapshot.get_feature_markers(last) == ["Marker ñ 😀", framework.features[0].markers[0]]
+        assert snapshot.get_feature_level(last) is AgencyLevel.BASIC
+        assert snapshot.get_feature(0).to_dict() == framework.features[0].to_dict()
+
+
+def test_empty_framework_round_trip(tmp_path):
+    path = str(tmp_path / "empty.snap")
+    write_framework_snapshot(AgencyFramework(load_defaults=False), path)
+    assert load_framework_snapshot(path).features == []
+
+
+@pytest.mark.parametrize("cut", [1, 100])
+def test_truncated_snapshot_is_rejected(snapshot_path, cut):
+    with open(snapshot_path, "rb") as f:
+        data = f.read()
+    with open(snapshot_path, "wb") as f:
+        f.write(data[:-cut])
+    with pytest.raises(ValueError, match="framework.snap"):
+        FrameworkSnapshot(snapshot_path)
+
+
+def test_short_or_foreign_files_are_rejected(tmp_path, snapshot_path):
+    short = tmp_path / "short.snap"
+    short.write_bytes(b"AGF")
+    with pytest.raises(ValueError, match="short.snap"):
+        FrameworkSnapshot(str(short))
+
+    foreign = tmp_path / "foreign.snap"
+    foreign.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError, match="not an agency framework snapshot"):
+        FrameworkSnapshot(str(foreign))
+
+    with open(snapshot_path, "r+b") as f:
+        f.seek(8)
+        f.write(struct.pack("<I", 99))
+    with pytest.raises(ValueError, match="Unsupported snapshot version 99"):
+        FrameworkSnapshot(snapshot_path)
@@ -0,0 +1,122 @@
+"""
+Tests for the indexed SQLite result store.
+
+License: PolyForm Noncommercial License 1.0
+"""
+import numpy as np
+import pytest
+
+from robust_agency_assessment import AgencyAssessment, AgencyFramework, AgencyLevel
+from agency_batch import score_assessments
+from agency_store import AssessmentStore
+
+
+def assert_same_results(loaded, original):
+    assert loaded.results == original.results
+    assert loaded.confidence == original.confidence
+    assert loaded.evidence == original.evidence
+
+
+@pytest.fixture
+def store(tmp_path, make_assessment):
+    """Store holding versions v0..v3 of system-a and v0..v1 of system-b."""
+    with AssessmentStore(str(tmp_path / "results.db"), batch_size=3) as store:
+        store.add_assessments(
+            [("system-a", f"v{seed}", make_assessment(seed)) for seed in range(4)]
+            + [("system-b", f"v{seed}", make_assessment(10 + seed)) for seed in range(2)]
+        )
+        yield store
+
+
+def test_store_round_trip(tmp_path, framework, make_assessment):
+    assessments = {f"v{seed}": make_assessment(seed, extra_markers=1) for seed in range(5)}
+    with AssessmentStore(str(tmp_path / "results.db"), batch_size=2) as store:
+        assert store.add_assessments(("system", version, a) for version, a in assessments.items()) == 5
+        store.add_assessment("system", "empty", AgencyAssessment(framework))
+
+    with AssessmentStore(str(tmp_path / "results.db")) as store:
+        for version, assessment in assessments.items():
+            assert_same_results(store.load_assessment("system", version, framework), assessment)
+        assert store.load_assessment("system", "empty", framework).results == {}
+        with pytest.raises(KeyError):
+            store.load_assessment("system", "missing", framework)
+
+        versions, matrix = store.level_score_matrix("system")
+        assert versions == list(assessments) + ["empty"]
+        expected = score_assessments(framework, list(assessments.values())).level_scores
+        np.testing.assert_array_equal(matrix[:len(assessments), [level.value for level in AgencyLevel]], expected)
+
+
+def test_store_replaces_version_and_keys_features_by_level(tmp_path, framework, make_assessment):
+    relevelled = AgencyFramework()
+    relevelled.features[0].level = AgencyLevel.BASIC
+    with AssessmentStore(str(tmp_path / "results.db")) as store:
+        store.add_assessment("system", "v1", make_assessment(1))
+        store.add_assessment("system", "v1", make_assessment(2))
+        assert_same_results(store.load_assessment("system", "v1", framework), make_assessment(2))
+        assert store.level_score_matrix("system")[0] == ["v1"]
+
+        store.add_assessment("system", "v2", AgencyAssessment(relevelled))
+        levels = store.connection.execute(
+            "SELECT level FROM features WHERE name = ? ORDER BY level", (framework.features[0].name,)
+        ).fetchall()
+        assert levels == [(AgencyLevel.BASIC.value,), (AgencyLevel.INTENTIONAL.value,)]
+
+
+def test_level_score_filters(store, framework, make_assessment):
+    scores = score_assessments(framework, [make_assessment(seed) for seed in range(4)]).level_scores
+    level = AgencyLevel.REFLECTIVE
+    column = [l.value for l in AgencyLevel].index(level.value)
+
+    result = store.level_scores(level, system="system-a")
+    assert result["version"].tolist() == ["v0", "v1", "v2", "v3"]
+    assert result["seq"].tolist() == [1, 2, 3, 4]
+    np.testing.assert_array_equal(result["score"], scores[:, column])
+
+    threshold = float(np.median(scores[:, column]))
+    above = store.level_scores("REFLECTIVE", min_score=threshold, system="system-a")
+    assert (above["score"] > threshold).all()
+    assert len(above["score"]) == int((scores[:, column] > threshold).sum())
+    below = store.level_scores(level, max_score=threshold, system="system-a")
+    assert len(above["score"]) + len(below["score"]) == 4
+
+    recent = store.level_scores(level, last_versions=1)
+    assert sorted(zip(recent["system"].tolist(), recent["version"].tolist())) == [
+        ("system-a", "v3"), ("system-b", "v1")
+    ]
+
+
+def test_systems_above(store):
+    assert store.systems_above(AgencyLevel.BASIC, -1.0) == ["system-a", "system-b"]
+    assert store.systems_above(AgencyLevel.BASIC, 1.0) == []
+
+
+def test_marker_queries(store, make_assessment):
+    original = make_assessment(2)
+    result = store.marker_results(system="system-a", version="v2")
+    assert set(result["marker"].tolist()) == set(original.results)
+    for marker, presence, confidence, score in zip(
+        result["marker"], result["presence"], result["confidence"], result["score"]
+    ):
+        assert presence == original.results[marker]
+        assert confidence == original.confidence[marker]
+        assert score == pytest.approx(presence * confidence)
+    assert "evidence" not in store.marker_results(version="v2", with_evidence=False)
+
+    marker = next(iter(original.evidence))
+    evidence = store.marker_evidence(marker)
+    assert all(e is not None for e in evidence["evidence"])
+    assert (evidence["system"][evidence["version"] == "v2"] == "system-a").any()
+    assert len(store.marker_results(marker="Marker never stored")["marker"]) == 0
+
+
+def test_queries_return_frames(store):
+    pd = pytest.importorskip("pandas")
+    frame = store.level_scores(AgencyLevel.BASIC, as_frame=True)
+    assert isinstance(frame, pd.DataFrame)
+    assert list(frame.columns) == ["system", "version", "seq", "score"]
+    assert len(frame) == 6
+
+    marker = store.marker_results(system="system-b")["marker"][0]
+    evidence = store.marker_evidence(marker, as_frame=True)
+    assert evidence["evidence"].notna().all()
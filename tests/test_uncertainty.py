@@ -0,0 +1,69 @@
+"""
+Tests for Monte Carlo uncertainty propagation.
+
+License: PolyForm Noncommercial License 1.0
+"""
+import numpy as np
+import pytest
+
+from robust_agency_assessment import AgencyAssessment, AgencyLevel
+from agency_uncertainty import MonteCarloScorer, _sample_quantiles
+
+
+@pytest.mark.parametrize("method", ["beta", "normal"])
+def test_means_match_deterministic_level_scores(framework, make_assessment, method):
+    assessments = [make_assessment(seed) for seed in range(5)]
+    scores = MonteCarloScorer(framework, n_samples=4000, method=method, seed=0).score_assessments(assessments)
+
+    for i, assessment in enumerate(assessments):
+        summary = scores.get_level_summary(i)
+        for level in AgencyLevel:
+            expected = assessment.get_level_score(level)
+            assert summary[level]["mean"] == pytest.approx(expected, abs=0.01)
+            low, high = scores.get_level_interval(i, level)
+            assert low <= expected <= high
+
+
+def test_confidence_narrows_intervals(framework):
+    intervals = []
+    for confidence in (0.2, 0.9):
+        assessment = AgencyAssessment(framework)
+        for marker in framework.get_all_markers():
+            # Same point score at both confidence levels
+            assessment.assess_marker(marker, 0.18 / confidence, confidence)
+        scores = MonteCarloScorer(framework, n_samples=2000, seed=0).score_assessments([assessment])
+        low, high = scores.get_level_interval(0, AgencyLevel.INTENTIONAL)
+        intervals.append(high - low)
+    assert intervals[1] < intervals[0]
+
+
+def test_unassessed_markers_score_zero(framework):
+    scores = MonteCarloScorer(framework, n_samples=100, seed=0).score_assessments([AgencyAssessment(framework)])
+    assert not scores.level_mean.any()
+    assert not scores.level_quantiles.any()
+
+
+def test_seeded_results_do_not_depend_on_threads(framework, make_assessment):
+    assessments = [make_assessment(seed) for seed in range(12)]
+
+    def run(workers):
+        scorer = MonteCarloScorer(framework, n_samples=200, seed=3, workers=workers, chunk_elements=20000)
+        return scorer.score_assessments(assessments)
+
+    single, threaded = run(1), run(4)
+    np.testing.assert_array_equal(single.level_mean, threaded.level_mean)
+    np.testing.assert_array_equal(single.feature_quantiles, threaded.feature_quantiles)
+    assert single.level_mean.shape == (12, len(AgencyLevel))
+
+
+def test_sample_quantiles_match_numpy():
+    samples = np.random.default_rng(0).random((101, 3, 4))
+    probabilities = (0.05, 0.5, 0.95)
+    np.testing.assert_allclose(
+        _sample_quantiles(samples, probabilities), np.quantile(samples, probabilities, axis=0)
+    )
+
+
+def test_rejects_unknown_method(framework):
+    with pytest.raises(ValueError):
+        MonteCarloScorer(framework, method="uniform")